@@ -67,7 +67,8 @@ const config: CEP_Config = {
     jsxBin: "off",
   },
   installModules: [],
-  copyAssets: ["./js", "./jsx", "./exec", "./js/lib", "./list_audio_apps.py"],
+  copyAssets: ["./js", "./jsx", "./exec", "./js/lib", "./list_audio_apps.py",
+    "./session_inspector.py", "./audio_backend.py", "./session_cache.py", "./process_cache.py", "./app_subscriptions.py"],
   copyZipAssets: [],
 };
 
@@ -0,0 +1,102 @@
+"""
+Server-pushed audio app list for subscribed clients
+
+A subscriber gets one audio_apps_snapshot, then audio_apps_delta messages with
+only what changed (added apps, removed app names, updated apps). Nothing is sent
+when the list is unchanged, and nothing is scanned once the last subscriber leaves.
+"""
+import asyncio
+import json
+import logging
+
+
+def diff_apps(old, new):
+    """Compare {name: app} dicts; return (added, removed names, updated)"""
+    added = [app for name, app in new.items() if name not in old]
+    removed = [name for name in old if name not in new]
+    updated = [app for name, app in new.items() if name in old and old[name] != app]
+    return added, removed, updated
+
+
+class AppListPublisher:
+    """Rescans on session changes (and every interval) while anyone is subscribed"""
+
+    def __init__(self, collect, get_targets, interval=2.0, debounce=0.1):
+        self.collect = collect
+        self.get_targets = get_targets
+        self.interval = interval
+        self.debounce = debounce
+        self.subscribers = set()
+        self._apps = {}
+        self._changed = asyncio.Event()
+        self._publish_lock = asyncio.Lock()
+        self._task = None
+
+    async def subscribe(self, websocket):
+        """Add a subscriber and send it a full snapshot"""
+        async with self._publish_lock:
+            await self._publish(await self.collect())
+            self.subscribers.add(websocket)
+            snapshot = {
+                'type': 'audio_apps_snapshot',
+                'apps': list(self._apps.values()),
+                'current_targets': self.get_targets(),
+                'success': True
+            }
+        await websocket.send(json.dumps(snapshot))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def unsubscribe(self, websocket):
+        """Remove a subscriber; returns True if it was subscribed"""
+        if websocket not in self.subscribers:
+            return False
+        self.subscribers.discard(websocket)
+        if not self.subscribers:
+            self._apps = {}
+            if self._task:
+                self._task.cancel()
+                self._task = None
+        return True
+
+    def notify_changed(self):
+        """Ask for a rescan soon (called when a session appears or expires)"""
+        if self.subscribers:
+            self._changed.set()
+
+    async def _run(self):
+        while self.subscribers:
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=self.interval)
+                # Let a burst of session events settle into one rescan
+                await asyncio.sleep(self.debounce)
+            except asyncio.TimeoutError:
+                pass
+            self._changed.clear()
+            try:
+                async with self._publish_lock:
+                    await self._publish(await self.collect())
+            except Exception as e:
+                logging.debug(f"Audio app list refresh failed: {e}")
+
+    async def _publish(self, apps):
+        """Store the new list and broadcast a delta to existing subscribers if anything changed"""
+        new = {app['name']: app for app in apps}
+        added, removed, updated = diff_apps(self._apps, new)
+        self._apps = new
+        if not (added or removed or updated) or not self.subscribers:
+            return
+
+        delta = json.dumps({
+            'type': 'audio_apps_delta',
+            'added': added,
+            'removed': removed,
+            'updated': updated
+        })
+        logging.debug(f"Audio apps delta: +{len(added)} -{len(removed)} ~{len(updated)}")
+        for websocket in list(self.subscribers):
+            try:
+                await websocket.send(delta)
+            except Exception as e:
+                logging.debug(f"Dropping audio apps subscriber: {e}")
+                self.subscribers.discard(websocket)
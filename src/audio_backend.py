@@ -0,0 +1,463 @@
+"""
+Audio backends used by the control server
+
+The server only talks to the audio stack through an AudioBackend, so the same
+mute/unmute/fade code runs against Windows Core Audio (pycaw) in production and
+against an in-memory SimulatedBackend for load tests and profiling on any OS.
+"""
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+
+
+class AudioSession:
+    """Backend-neutral audio session: identity, process info and an opaque volume handle"""
+
+    __slots__ = ('key', 'pid', 'name', 'handle')
+
+    def __init__(self, key, pid, name, handle):
+        self.key = key
+        self.pid = pid
+        self.name = name
+        self.handle = handle
+
+    def __repr__(self):
+        return f"AudioSession({self.name!r}, pid={self.pid})"
+
+
+class AudioBackend:
+    """Interface every audio backend implements"""
+
+    name = 'base'
+
+    def initialize_thread(self):
+        """Prepare the calling thread for backend calls"""
+
+    def uninitialize_thread(self):
+        """Release per-thread backend state"""
+
+    def enumerate_sessions(self, known=None):
+        """Return the current AudioSessions, reusing entries from the known dict by key"""
+        raise NotImplementedError
+
+    def get_volume(self, session):
+        """Return the session's master volume (0.0 - 1.0)"""
+        raise NotImplementedError
+
+    def set_volume(self, session, level):
+        """Set the session's master volume (0.0 - 1.0)"""
+        raise NotImplementedError
+
+    def get_mute(self, session):
+        """True if the session is muted in the system mixer"""
+        raise NotImplementedError
+
+    def process_alive(self, pid):
+        """True if the process is still running"""
+        raise NotImplementedError
+
+    def list_pids(self):
+        """Return the pids of every running process"""
+        raise NotImplementedError
+
+    def process_create_time(self, pid):
+        """Return the process start time, or None if it is gone"""
+        raise NotImplementedError
+
+    def list_processes(self):
+        """Return [(pid, create_time)] for every running process (create_time None if unreadable)"""
+        return [(pid, self.process_create_time(pid)) for pid in self.list_pids()]
+
+    def process_info(self, pid):
+        """Return (name, exe, create_time) for a process, or None if it is gone
+
+        exe is '' when the path is not accessible.
+        """
+        raise NotImplementedError
+
+    def watch_sessions(self, on_added, on_removed):
+        """Call on_added(AudioSession) / on_removed(key) as sessions appear and expire
+
+        Callbacks may arrive on any thread. Returns a function that stops watching.
+        Backends without session notifications raise NotImplementedError.
+        """
+        raise NotImplementedError
+
+
+class PycawBackend(AudioBackend):
+    """Windows Core Audio sessions through pycaw/comtypes"""
+
+    name = 'pycaw'
+
+    def __init__(self):
+        # Session notifications are only delivered to a multithreaded apartment, and
+        # comtypes joins the importing thread to one at import time (0 = COINIT_MULTITHREADED)
+        if not hasattr(sys, 'coinit_flags'):
+            sys.coinit_flags = 0
+        import comtypes
+        import psutil
+        from pycaw.pycaw import AudioUtilities, ISimpleAudioVolume
+        self._comtypes = comtypes
+        self._psutil = psutil
+        self._audio_utilities = AudioUtilities
+        self._simple_audio_volume = ISimpleAudioVolume
+
+    def initialize_thread(self):
+        self._comtypes.CoInitializeEx(self._comtypes.COINIT_MULTITHREADED)
+
+    def uninitialize_thread(self):
+        self._comtypes.CoUninitialize()
+
+    def _wrap(self, session, known):
+        try:
+            pid = session.ProcessId
+            if not pid:
+                return None
+            key = (pid, session.InstanceIdentifier)
+        except Exception:
+            return None
+
+        entry = known.get(key)
+        if entry is None:
+            try:
+                if not session.Process:
+                    return None
+                name = session.Process.name()
+                handle = session._ctl.QueryInterface(self._simple_audio_volume)
+            except Exception:
+                return None
+            entry = AudioSession(key, pid, name, handle)
+        return entry
+
+    def enumerate_sessions(self, known=None):
+        known = known or {}
+        sessions = []
+        for session in self._audio_utilities.GetAllSessions():
+            entry = self._wrap(session, known)
+            if entry is not None:
+                sessions.append(entry)
+        return sessions
+
+    def get_volume(self, session):
+        return session.handle.GetMasterVolume()
+
+    def set_volume(self, session, level):
+        session.handle.SetMasterVolume(level, None)
+
+    def get_mute(self, session):
+        return bool(session.handle.GetMute())
+
+    def process_alive(self, pid):
+        return self._psutil.pid_exists(pid)
+
+    def list_pids(self):
+        return self._psutil.pids()
+
+    def process_create_time(self, pid):
+        try:
+            return self._psutil.Process(pid).create_time()
+        except (self._psutil.NoSuchProcess, self._psutil.AccessDenied):
+            return None
+
+    def list_processes(self):
+        # process_iter reads the start time in the same pass that lists the pids
+        return [
+            (process.pid, process.info['create_time'])
+            for process in self._psutil.process_iter(['create_time'])
+        ]
+
+    def process_info(self, pid):
+        try:
+            process = self._psutil.Process(pid)
+            with process.oneshot():
+                name = process.name()
+                create_time = process.create_time()
+        except (self._psutil.NoSuchProcess, self._psutil.AccessDenied):
+            return None
+        try:
+            exe = process.exe()
+        except (self._psutil.NoSuchProcess, self._psutil.AccessDenied):
+            exe = ''
+        return name, exe, create_time
+
+    def watch_sessions(self, on_added, on_removed):
+        from pycaw.callbacks import AudioSessionEvents, AudioSessionNotification
+
+        backend = self
+        registered = {}
+
+        class SessionEvents(AudioSessionEvents):
+            def __init__(self, key):
+                super().__init__()
+                self.key = key
+
+            def on_state_changed(self, new_state, new_state_id):
+                if new_state == 'Expired':
+                    on_removed(self.key)
+
+            def on_session_disconnected(self, disconnect_reason, disconnect_reason_id):
+                on_removed(self.key)
+
+        def register(session):
+            """Subscribe to one session's expiry; returns its entry, or None if it is not usable"""
+            entry = backend._wrap(session, {})
+            if entry is None or entry.key in registered:
+                return entry
+            events = SessionEvents(entry.key)
+            session.register_notification(events)
+            registered[entry.key] = (session, events)
+            return entry
+
+        class SessionCreated(AudioSessionNotification):
+            def on_session_created(self, new_session):
+                # pycaw has already wrapped the session (pycaw.utils.AudioSession)
+                entry = register(new_session)
+                if entry is not None:
+                    on_added(entry)
+
+        manager = self._audio_utilities.GetAudioSessionManager()
+        callback = SessionCreated()
+        manager.RegisterSessionNotification(callback)
+        # Windows only starts delivering notifications after the first enumeration
+        manager.GetSessionEnumerator()
+
+        # Sessions that already exist report their expiry too, not just ones created from now on
+        for session in self._audio_utilities.GetAllSessions():
+            try:
+                register(session)
+            except Exception as e:
+                logging.debug(f"Cannot watch session: {e}")
+
+        def stop():
+            manager.UnregisterSessionNotification(callback)
+            for session, _ in registered.values():
+                try:
+                    session.unregister_notification()
+                except Exception:
+                    pass
+            registered.clear()
+        return stop
+
+
+# Process names handed out to simulated sessions, in order
+SIMULATED_PROCESS_NAMES = [
+    'chrome.exe',
+    'Spotify.exe',
+    'firefox.exe',
+    'msedge.exe',
+    'Discord.exe',
+    'vlc.exe',
+    'Teams.exe',
+    'Zoom.exe'
+]
+
+
+class SimulatedBackend(AudioBackend):
+    """Deterministic in-memory audio stack with configurable per-call latency
+
+    latency is either a number of seconds applied to every call, or a dict keyed
+    by method name ('enumerate_sessions', 'get_volume', 'set_volume', ...).
+    """
+
+    name = 'simulated'
+
+    def __init__(self, session_count=8, latency=0.0, process_count=0, names=None):
+        self.latency = latency
+        self.calls = {}
+        self._names = names or SIMULATED_PROCESS_NAMES
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._volumes = {}
+        self._processes = {}
+        self._watchers = []
+        self._next_pid = 1000
+        # Process start times: strictly increasing, so a reused pid gets a new one
+        self._started = itertools.count(1)
+
+        for i in range(session_count):
+            self.add_session(self._names[i % len(self._names)])
+
+        # Idle processes without an audio session, so process scans have something to walk
+        for i in range(process_count):
+            pid = self._allocate_pid()
+            self._processes[pid] = (f"idle{i}.exe", f"C:\\Program Files\\Idle\\idle{i}.exe", float(next(self._started)))
+
+    def _allocate_pid(self):
+        pid = self._next_pid
+        self._next_pid += 4
+        return pid
+
+    def _call(self, method):
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+        delay = self.latency.get(method, 0.0) if isinstance(self.latency, dict) else self.latency
+        if delay:
+            time.sleep(delay)
+
+    def add_session(self, name, pid=None, volume=1.0):
+        """Start a simulated audio session (and its process if pid is new)"""
+        with self._lock:
+            if pid is None:
+                pid = self._allocate_pid()
+            self._processes.setdefault(pid, (name, f"C:\\Program Files\\{name[:-4]}\\{name}", float(next(self._started))))
+            key = (pid, f"sim|{pid}|{len(self._sessions)}")
+            session = AudioSession(key, pid, name, key)
+            self._sessions[key] = session
+            self._volumes[key] = volume
+            watchers = list(self._watchers)
+        for on_added, _ in watchers:
+            on_added(session)
+        return session
+
+    def remove_session(self, key):
+        """End a simulated audio session"""
+        with self._lock:
+            removed = self._sessions.pop(key, None) is not None
+            self._volumes.pop(key, None)
+            watchers = list(self._watchers)
+        if removed:
+            for _, on_removed in watchers:
+                on_removed(key)
+
+    def kill_process(self, pid):
+        """End a simulated process and all of its sessions"""
+        with self._lock:
+            self._processes.pop(pid, None)
+            keys = [key for key in self._sessions if key[0] == pid]
+            for key in keys:
+                del self._sessions[key]
+                del self._volumes[key]
+            watchers = list(self._watchers)
+        for key in keys:
+            for _, on_removed in watchers:
+                on_removed(key)
+
+    def volumes(self):
+        """Return {session key: volume} for inspection"""
+        with self._lock:
+            return dict(self._volumes)
+
+    def enumerate_sessions(self, known=None):
+        self._call('enumerate_sessions')
+        known = known or {}
+        with self._lock:
+            return [known.get(key, session) for key, session in self._sessions.items()]
+
+    def get_volume(self, session):
+        self._call('get_volume')
+        with self._lock:
+            if session.key not in self._volumes:
+                raise RuntimeError(f"Session {session.key} has expired")
+            return self._volumes[session.key]
+
+    def set_volume(self, session, level):
+        self._call('set_volume')
+        with self._lock:
+            if session.key not in self._volumes:
+                raise RuntimeError(f"Session {session.key} has expired")
+            self._volumes[session.key] = level
+
+    def get_mute(self, session):
+        self._call('get_mute')
+        with self._lock:
+            if session.key not in self._volumes:
+                raise RuntimeError(f"Session {session.key} has expired")
+        # The simulated mixer has no mute switch; muting is always done through the volume
+        return False
+
+    def process_alive(self, pid):
+        self._call('process_alive')
+        with self._lock:
+            return pid in self._processes
+
+    def list_pids(self):
+        self._call('list_pids')
+        with self._lock:
+            return list(self._processes)
+
+    def process_create_time(self, pid):
+        self._call('process_create_time')
+        with self._lock:
+            process = self._processes.get(pid)
+        return process[2] if process else None
+
+    def list_processes(self):
+        self._call('list_processes')
+        with self._lock:
+            return [(pid, process[2]) for pid, process in self._processes.items()]
+
+    def process_info(self, pid):
+        self._call('process_info')
+        with self._lock:
+            return self._processes.get(pid)
+
+    def watch_sessions(self, on_added, on_removed):
+        self._call('watch_sessions')
+        watcher = (on_added, on_removed)
+        with self._lock:
+            self._watchers.append(watcher)
+
+        def stop():
+            with self._lock:
+                if watcher in self._watchers:
+                    self._watchers.remove(watcher)
+        return stop
+
+
+class LazyBackend:
+    """Stands in for a backend and builds it on first use
+
+    Constructing PycawBackend imports comtypes, pycaw and psutil, which is most of
+    the server's startup time; deferring it lets the WebSocket listener bind first.
+    Whichever thread touches the backend first (normally the COM worker) pays the cost.
+    """
+
+    def __init__(self, name, factory):
+        self.name = name
+        self.load_seconds = None
+        self._factory = factory
+        self._backend = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._backend is not None
+
+    def load(self):
+        """Build the real backend if needed and return it"""
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    started = time.perf_counter()
+                    backend = self._factory()
+                    self.load_seconds = time.perf_counter() - started
+                    self._backend = backend
+        return self._backend
+
+    def __getattr__(self, name):
+        return getattr(self.load(), name)
+
+
+def create_backend(name=None, lazy=False):
+    """Create the backend named by name or AUDIOSTOP_BACKEND (default: pycaw)
+
+    With lazy=True a LazyBackend is returned and nothing heavy is imported yet.
+    """
+    name = name or os.getenv('AUDIOSTOP_BACKEND', 'pycaw')
+    if lazy:
+        return LazyBackend(name, lambda: create_backend(name))
+    if name == 'pycaw':
+        return PycawBackend()
+    if name == 'simulated':
+        # AUDIOSTOP_SIM_NAMES (comma-separated) sets the session process names, e.g. from a recorded trace
+        names = [n for n in os.getenv('AUDIOSTOP_SIM_NAMES', '').split(',') if n] or None
+        return SimulatedBackend(
+            session_count=int(os.getenv('AUDIOSTOP_SIM_SESSIONS', str(len(names)) if names else '8')),
+            latency=float(os.getenv('AUDIOSTOP_SIM_LATENCY_MS', '0')) / 1000.0,
+            process_count=int(os.getenv('AUDIOSTOP_SIM_PROCESSES', '0')),
+            names=names
+        )
+    raise ValueError(f"Unknown audio backend: {name}")
@@ -1,21 +1,36 @@
+import time
+
+# Startup timings are measured from here (the ready message reports them)
+PROCESS_STARTED = time.perf_counter()
+
 import asyncio
 import websockets
 import logging
 import threading
-import time
 import os
 import sys
 import json
-from pycaw.pycaw import AudioUtilities, ISimpleAudioVolume
-import comtypes
-import psutil
-
-# Initialize logging with better formatting
-logging.basicConfig(
-    level=logging.DEBUG,  # Changed to DEBUG to see more details
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%H:%M:%S'
-)
+from audio_backend import create_backend
+from app_subscriptions import AppListPublisher
+from clients import ClientRegistry
+from com_executor import PRIORITY_HIGH, PRIORITY_LOW, ComExecutor
+from config_store import ConfigStore
+from fade_engine import FadeEngine
+from lifecycle import LifecycleManager
+from log_pipeline import LOG_LEVELS, set_log_level, start_logging, stop_logging
+from metrics import InstrumentedBackend, Metrics
+from mute_controller import MUTED, MuteController
+from process_cache import ProcessInfoCache
+from resource_monitor import ResourceMonitor
+from recorder import CommandRecorder, RecordingBackend
+from protocol import CLOSE, NUMBER, PROTOCOL_VERSION, QUEUED, CommandDispatcher, ProtocolError
+from session_cache import SessionCache
+from session_inspector import process_apps, session_apps, sort_apps
+from session_watcher import SessionWatcher
+from state_store import ServerState, StateStore
+from volume_store import VolumeSnapshotStore
+
+IMPORTS_DONE = time.perf_counter()
 
 # Application path
 if getattr(sys, 'frozen', False):
@@ -23,457 +38,838 @@ if getattr(sys, 'frozen', False):
 else:
     application_path = os.path.dirname(os.path.abspath(__file__))
 
-# Determine AppData path
-appdata_folder = os.getenv('APPDATA')
-config_folder = os.path.join(appdata_folder, 'AudioStop')
+# Determine AppData path (AUDIOSTOP_CONFIG_DIR overrides it for tests and benchmarks)
+appdata_folder = os.getenv('APPDATA') or os.path.expanduser('~')
+config_folder = os.getenv('AUDIOSTOP_CONFIG_DIR') or os.path.join(appdata_folder, 'AudioStop')
 config_file_path = os.path.join(config_folder, 'config.json')
 
 # Ensure the config folder exists
 os.makedirs(config_folder, exist_ok=True)
-logging.info(f"Config folder: {config_folder}")
-
-# Load or create config file
-if not os.path.exists(config_file_path):
-    logging.info("Creating default config file")
-    default_config = {
-        'target_processes': ['chrome.exe', 'Spotify.exe', 'firefox.exe', 'msedge.exe'],
-        'unmute_delay_seconds': 3.0,
-        'muting_enabled': True
-    }
-    with open(config_file_path, 'w') as config_file:
-        json.dump(default_config, config_file, indent=4)
 
-# Load config
-with open(config_file_path, 'r') as config_file:
-    config = json.load(config_file)
-
-# Global variables
-TARGET_PROCESSES = config.get('target_processes', [])
-UNMUTE_DELAY_SECONDS = config.get('unmute_delay_seconds', 3.0)
-muting_enabled = config.get('muting_enabled', True)
+# Load or create config file (later writes are debounced and atomic, external edits hot-reload)
+default_config = {
+    'target_processes': ['chrome.exe', 'Spotify.exe', 'firefox.exe', 'msedge.exe'],
+    'unmute_delay_seconds': 3.0,
+    'muting_enabled': True,
+    'log_level': 'INFO'
+}
+created_default_config = not os.path.exists(config_file_path)
+config_store = ConfigStore(config_file_path, default_config, on_reload=lambda changed: apply_config(changed))
+config = config_store.load()
+
+# Logging goes through a queue to a background writer (console + rotating file)
+log_file_path = os.path.join(config_folder, 'audiostop.log')
+try:
+    start_logging(config.get('log_level', 'INFO'), log_file_path)
+except ValueError as e:
+    start_logging('INFO', log_file_path)
+    logging.warning("Invalid log_level in config, using INFO: %s", e)
+
+logging.info("Config folder: %s", config_folder)
+if created_default_config:
+    logging.info("Created default config file")
+
+# Runtime settings: an immutable, versioned ServerState swapped in whole on every change.
+# Read state_store.current for a consistent snapshot (no lock); per-app rules (plus
+# target_processes as exact-name mute rules) are compiled into its rule_set.
+state_store = StateStore(ServerState.from_config(config, dict(
+    default_config, rules=[], fade_duration_seconds=0.4, fade_steps=20, fade_curve='linear'
+)))
+initial_state = state_store.current
 
 logging.info(f"AudioStop Server Started")
-logging.info(f"Muting enabled: {muting_enabled}")
-logging.info(f"Unmute delay: {UNMUTE_DELAY_SECONDS}s")
-logging.info(f"Target processes: {', '.join(TARGET_PROCESSES)}")
-
-# Lock for thread-safe operations
-state_lock = threading.Lock()
-exit_event = threading.Event()
-
-# Global variable to track the unmute task
-unmute_task = None
-
-# Function to initialize COM, run a function, and uninitialize COM
-def com_wrapper(func, *args, **kwargs):
-    """Thread-safe COM wrapper"""
-    comtypes.CoInitialize()
+logging.info(f"Muting enabled: {initial_state.muting_enabled}")
+logging.info(f"Unmute delay: {initial_state.unmute_delay_seconds}s")
+logging.info(f"Target processes: {', '.join(initial_state.target_processes)}")
+logging.info(f"Mute rules: {len(initial_state.rule_set)}")
+
+# Shutdown event and parent-process watch
+lifecycle = LifecycleManager()
+
+# Connected clients and the clients holding a mute
+clients = ClientRegistry()
+
+# Fire-and-forget work started from callbacks; held here so the loop cannot collect it mid-run
+background_tasks = set()
+
+def spawn(coro):
+    """Run coro as a background task that is kept alive until done and whose failure is logged"""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_task_done)
+    return task
+
+def background_task_done(task):
+    background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logging.error(f"Background task failed: {task.exception()!r}")
+
+# Shutdown policy: 'explicit' (shutdown message or parent exit) or 'last_client'
+# (exit once no client has been connected for shutdown_grace_seconds)
+SHUTDOWN_POLICY = config.get('shutdown_policy', 'explicit')
+SHUTDOWN_GRACE_SECONDS = config.get('shutdown_grace_seconds', 10.0)
+idle_shutdown_task = None
+
+# Hot-path latency histograms and counters (get_metrics, dumped to metrics_file on shutdown)
+metrics = Metrics()
+METRICS_FILE = config.get('metrics_file')
+
+# Audio backend (pycaw on Windows, AUDIOSTOP_BACKEND=simulated for load tests).
+# Built lazily on the COM worker so pycaw/comtypes load after the listener is bound.
+audio_backend = create_backend(lazy=True)
+
+# Opt-in trace of inbound commands and backend volume calls for replay.py (AUDIOSTOP_RECORD=path)
+RECORD_PATH = os.getenv('AUDIOSTOP_RECORD')
+recorder = CommandRecorder(RECORD_PATH) if RECORD_PATH else None
+backend = InstrumentedBackend(RecordingBackend(audio_backend, recorder) if recorder else audio_backend, metrics)
+logging.info(f"Audio backend: {backend.name}")
+
+# Resource watchdog: RSS, threads, handles and object counts against the post-warm-up baseline
+# (resource_monitor_interval_seconds = 0 turns it off; AUDIOSTOP_TRACEMALLOC=frames traces from startup)
+resource_monitor = ResourceMonitor(
+    interval=config.get('resource_monitor_interval_seconds', 60.0),
+    thresholds=config.get('resource_thresholds'),
+    metrics=metrics
+)
+TRACEMALLOC_FRAMES = os.getenv('AUDIOSTOP_TRACEMALLOC')
+if TRACEMALLOC_FRAMES:
     try:
-        result = func(*args, **kwargs)
-    finally:
-        comtypes.CoUninitialize()
-    return result
+        frames = max(1, int(TRACEMALLOC_FRAMES))
+    except ValueError:
+        logging.warning(f"Ignoring AUDIOSTOP_TRACEMALLOC={TRACEMALLOC_FRAMES!r}: not a frame count, tracing 1 frame")
+        frames = 1
+    resource_monitor.start_tracing(frames)
+
+# Startup phases in ms since PROCESS_STARTED; server_ready once sessions are enumerated
+startup_timings = {'imports_ms': round((IMPORTS_DONE - PROCESS_STARTED) * 1000, 1)}
+server_ready = False
+# Mutes wait for this, so the journal restore never raises a session a new mute just silenced
+journal_restored = asyncio.Event()
+
+# Persistent session table, kept current by the session watcher
+session_cache = SessionCache(backend)
+
+# Pre-mute volumes, journaled so a crashed server can restore them on the next start
+volume_store = VolumeSnapshotStore(os.path.join(config_folder, 'volume_journal.json'))
+
+# Process metadata keyed by (pid, create_time), scanned incrementally
+process_cache = ProcessInfoCache(backend)
+
+# Whether target apps are currently held silent (new sessions get muted on arrival)
+audio_muted = False
+
+# The rule set the last full mute was made with (a rule change makes a re-mute necessary)
+muted_rule_set = None
+
+# Pinned worker thread that initializes COM once and owns the session objects
+com_executor = ComExecutor(backend)
+
+# All unmute fades ramp together on one clock
+fade_engine = FadeEngine(
+    com_executor,
+    backend,
+    duration=initial_state.fade_duration_seconds,
+    steps=initial_state.fade_steps,
+    curve=initial_state.fade_curve
+)
+state_store.subscribe(
+    lambda state, changed, source: fade_engine.configure(
+        duration=state.fade_duration_seconds, steps=state.fade_steps, curve=state.fade_curve
+    ),
+    keys=('fade_duration_seconds', 'fade_steps', 'fade_curve')
+)
 
-# Function to fade volume to unmute
-async def fade_to_unmute(volume):
-    """Smoothly unmute audio with fade effect"""
+# Function to resolve the exe path of a session's process (for path rules, runs on the COM worker)
+def process_exe(pid):
+    info = process_cache.get(pid)
+    return info.exe if info is not None else None
+
+# Function to match sessions against the mute rules
+async def match_rules(sessions):
+    """Return [(session, rule)] for the sessions a rule applies to"""
+    rules = state_store.current.rule_set
+    if rules.needs_exe:
+        # Path rules need the process's exe, which is a backend lookup
+        return await com_executor.run(rules.match_sessions, sessions, process_exe, priority=PRIORITY_HIGH)
+    return rules.match_sessions(sessions)
+
+# Function to get target sessions from the session table
+async def get_target_sessions():
+    """Look up [(session, rule)] targets, refreshing the table only if the background refresh fell behind"""
+    if session_cache.is_stale():
+        # Not announced: the command itself handles every target this refresh finds
+        await com_executor.run(session_cache.refresh, priority=PRIORITY_HIGH)
+    return await match_rules(session_cache.all())
+
+# Function to mute target sessions that start while playback is running
+def on_session_added(entry):
+    """Mute a newly appeared target session on arrival while muted"""
+    app_publisher.notify_changed()
+    if not audio_muted:
+        return
+    rules = state_store.current.rule_set
+    if not rules.needs_exe and rules.match(entry.name) is None:
+        return
+    spawn(mute_new_session(entry))
+
+async def mute_new_session(entry):
+    """Mute one session that appeared mid-playback and remember its volume"""
     try:
-        steps = 20
-        sleep_time = 0.02  # Total fade time = 0.4 seconds
-        for i in range(steps):
-            new_volume = (i + 1) / steps
-            await asyncio.to_thread(com_wrapper, volume.SetMasterVolume, new_volume, None)
-            await asyncio.sleep(sleep_time)
+        targets = await match_rules([entry])
+        if not targets:
+            return
+        result = (await com_executor.run(mute_sessions, targets, priority=PRIORITY_HIGH))[0]
     except Exception as e:
-        logging.error(f"Failed to fade volume: {e}")
+        logging.error(f"Failed to mute new session {entry.name}: {e}")
+        return
+    if result['success']:
+        volume_store.record([result])
+        logging.info("✓ Muted new session %s", entry.name)
+    else:
+        logging.error(f"Failed to mute new session {entry.name}: {result['error']}")
+
+# Session notifications keep the table current between commands
+session_watcher = SessionWatcher(
+    backend,
+    com_executor,
+    session_cache,
+    on_added=on_session_added,
+    on_removed=lambda key: app_publisher.notify_changed()
+)
+
+# Function to mute a set of sessions in one pass (runs on the COM worker)
+def mute_sessions(targets, originals=None):
+    """Read every session's volume, then mute/duck them back to back; return per-session results
+
+    originals maps session keys to volumes recorded by an earlier mute, so ducking
+    a session that is already ducked (or half faded back) starts from its real volume.
+    """
+    originals = originals or {}
+    results = []
+    for session, rule in targets:
+        result = {'key': session.key, 'name': session.name, 'pid': session.pid, 'rule': rule, 'success': True}
+        try:
+            result['previous'] = backend.get_volume(session)
+            result['level'] = originals.get(session.key, result['previous']) * rule.level
+        except Exception as e:
+            result.update(success=False, error=str(e))
+        results.append(result)
+    
+    # Second pass with nothing but SetMasterVolume so every app goes silent together
+    for (session, _), result in zip(targets, results):
+        if not result['success']:
+            continue
+        try:
+            backend.set_volume(session, result['level'])
+        except Exception as e:
+            result.update(success=False, error=str(e))
+    return results
 
 # Function to mute specific processes instantly
 async def mute_target_processes():
-    """Instantly mute all configured applications"""
+    """Instantly mute all configured applications; return per-session results"""
+    global audio_muted, muted_rule_set
+    await journal_restored.wait()
     try:
-        sessions = await asyncio.to_thread(com_wrapper, AudioUtilities.GetAllSessions)
-        muted_count = 0
+        audio_muted = True
+        muted_rule_set = state_store.current.rule_set
+        # A new mute always wins over fades that are still ramping up
+        fade_engine.cancel()
+        targets = await get_target_sessions()
+        if not targets:
+            return []
         
-        for session in sessions:
-            if session.Process and session.Process.name() in TARGET_PROCESSES:
-                try:
-                    volume = session._ctl.QueryInterface(ISimpleAudioVolume)
-                    current_volume = await asyncio.to_thread(com_wrapper, volume.GetMasterVolume)
-                    if current_volume > 0.0:
-                        await asyncio.to_thread(com_wrapper, volume.SetMasterVolume, 0.0, None)
-                        muted_count += 1
-                        logging.info(f"✓ Muted {session.Process.name()}")
-                except Exception as e:
-                    logging.error(f"Failed to mute {session.Process.name()}: {e}")
+        originals = {snapshot.key: snapshot.volume for snapshot in volume_store.snapshots()}
+        results = await com_executor.run(mute_sessions, targets, originals, priority=PRIORITY_HIGH)
+        muted_count = 0
+        for result in results:
+            if result['success']:
+                muted_count += 1
+                logging.debug("✓ Muted %s", result['name'])
+            else:
+                logging.error(f"Failed to mute {result['name']}: {result['error']}")
+                session_cache.discard(result['key'])
         
+        # Originals are kept for unmute and journaled in case the server dies while muted
+        volume_store.record(results)
+        metrics.increment('sessions.muted', muted_count)
+        metrics.increment('errors.mute', len(results) - muted_count)
         if muted_count > 0:
-            logging.info(f"Muted {muted_count} application(s)")
+            logging.info("Muted %d application(s)", muted_count)
+        return results
     except Exception as e:
         logging.error(f"Error in mute_target_processes: {e}")
+        return []
+
+# Function to get the unmute delay for a muted session
+def unmute_delay_for(snapshot, default_delay):
+    """The rule's own unmute delay, or the global one"""
+    rule = snapshot.rule
+    if rule is not None and rule.unmute_delay_seconds is not None:
+        return rule.unmute_delay_seconds
+    return default_delay
+
+# Function to fade one group of sessions back to their original volume
+async def restore_sessions(ramps, fade_options):
+    """Fade [(entry, level, volume)] back up; forget their snapshots once the fade finished"""
+    with metrics.timer('unmute.fade'):
+        finished = await fade_engine.fade(ramps, **fade_options)
+    metrics.increment('sessions.unmuted', len(ramps))
+    for entry, _, volume in ramps:
+        logging.debug("✓ Unmuted %s to %.0f%%", entry.name, volume * 100)
+    
+    # Keep the snapshots if a new mute interrupted the fade: they are still the originals
+    if finished:
+        volume_store.forget([entry.key for entry, _, _ in ramps])
+    return len(ramps)
 
 # Function to unmute specific processes with delay and fade
-async def unmute_target_processes():
-    """Unmute all configured applications after delay"""
+async def unmute_target_processes(on_restoring=None):
+    """Unmute all muted applications, each after its rule's delay
+
+    on_restoring() is called once, right before the first volumes come back.
+    """
+    global audio_muted
     try:
-        with state_lock:
-            delay_seconds = UNMUTE_DELAY_SECONDS
-        
-        logging.info(f"Unmuting in {delay_seconds}s...")
-        await asyncio.sleep(delay_seconds)
-        
-        if exit_event.is_set():
-            return
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        handled = set()
+        fades = []
+        default_delay = state_store.current.unmute_delay_seconds
         
-        sessions = await asyncio.to_thread(com_wrapper, AudioUtilities.GetAllSessions)
-        unmuted_count = 0
+        delays = {unmute_delay_for(snapshot, default_delay) for snapshot in volume_store.snapshots()} or {default_delay}
+        logging.info("Unmuting in %ss...", ', '.join(f"{delay:g}" for delay in sorted(delays)))
         
-        for session in sessions:
-            if session.Process and session.Process.name() in TARGET_PROCESSES:
-                try:
-                    volume = session._ctl.QueryInterface(ISimpleAudioVolume)
-                    current_volume = await asyncio.to_thread(com_wrapper, volume.GetMasterVolume)
-                    if current_volume == 0.0:
-                        await fade_to_unmute(volume)
-                        unmuted_count += 1
-                        logging.info(f"✓ Unmuted {session.Process.name()}")
-                except Exception as e:
-                    logging.error(f"Failed to unmute {session.Process.name()}: {e}")
+        # Wake up once per distinct delay; sessions muted on arrival meanwhile are picked up too
+        while True:
+            pending = [snapshot for snapshot in volume_store.snapshots() if snapshot.key not in handled]
+            next_delay = min((unmute_delay_for(snapshot, default_delay) for snapshot in pending), default=default_delay)
+            changed = await state_store.wait_for_change(max(0.0, started + next_delay - loop.time()))
+            if changed is not None:
+                # A new unmute delay applies to the wait already running (measured from the unmute)
+                default_delay = changed.unmute_delay_seconds
+                continue
+            
+            if lifecycle.shutting_down:
+                return
+            
+            if audio_muted and on_restoring is not None:
+                on_restoring()
+            audio_muted = False
+            if not pending:
+                break
+            
+            # Restore exactly what each session had before mute, without reading volumes back
+            groups = {}
+            gone = []
+            for snapshot in volume_store.snapshots():
+                if snapshot.key in handled or unmute_delay_for(snapshot, default_delay) > next_delay:
+                    continue
+                handled.add(snapshot.key)
+                entry = session_cache.get(snapshot.key)
+                if entry is None:
+                    gone.append(snapshot.key)
+                    continue
+                fade = snapshot.rule.fade if snapshot.rule is not None else None
+                groups.setdefault(fade, []).append((entry, snapshot.level, snapshot.volume))
+            volume_store.forget(gone)
+            
+            # Every app in a group fades back in together instead of one after another
+            for fade, ramps in groups.items():
+                options = dict(zip(('duration', 'steps', 'curve'), fade)) if fade else {}
+                fades.append(asyncio.ensure_future(restore_sessions(ramps, options)))
         
-        if unmuted_count > 0:
-            logging.info(f"Unmuted {unmuted_count} application(s)")
+        unmuted = sum(await asyncio.gather(*fades))
+        if unmuted:
+            logging.info("Unmuted %d application(s)", unmuted)
     except asyncio.CancelledError:
         logging.debug("Unmute cancelled")
     except Exception as e:
         logging.error(f"Error in unmute_target_processes: {e}")
 
+# Function to tell whether the last full mute still covers every target
+def mute_is_current():
+    """Same rules, and the session table is current (sessions added since were muted on arrival)"""
+    return muted_rule_set is state_store.current.rule_set and not session_cache.is_stale()
+
+# Authoritative mute state; bursts of mute/unmute collapse into the last one
+mute_controller = MuteController(mute_target_processes, unmute_target_processes, mute_is_current, metrics)
+
 async def get_audio_applications():
     """Get list of all audio-capable applications (even if not currently playing)"""
     try:
         audio_apps = []
         seen_processes = set()
         
-        # List of processes to ignore
-        ignored_processes = [
-            'audiodg.exe', 
-            'System', 
-            'svchost.exe',
-            'Adobe Premiere Pro.exe',
-            'AfterFX.exe',
-            'Photoshop.exe',
-            'csrss.exe',
-            'winlogon.exe',
-            'dwm.exe',
-            'explorer.exe',
-            'taskhost.exe',
-            'taskhostw.exe'
-        ]
-        
-        # Priority apps (will be sorted first) - these are known audio applications
-        priority_apps = [
-            'Spotify.exe',
-            'chrome.exe',
-            'firefox.exe',
-            'msedge.exe',
-            'brave.exe',
-            'opera.exe',
-            'Discord.exe',
-            'Deezer.exe',
-            'iTunes.exe',
-            'vlc.exe',
-            'AIMP.exe',
-            'foobar2000.exe',
-            'steam.exe',
-            'battle.net.exe',
-            'Origin.exe',
-            'EpicGamesLauncher.exe',
-            'Teams.exe',
-            'Zoom.exe',
-            'Skype.exe',
-            'WhatsApp.exe',
-            'Telegram.exe',
-            'OBS64.exe',
-            'obs32.exe',
-            'Streamlabs OBS.exe'
-        ]
-        
         # First, get all processes with active audio sessions
-        try:
-            sessions = await asyncio.to_thread(com_wrapper, AudioUtilities.GetAllSessions)
-            for session in sessions:
-                if session.Process:
-                    try:
-                        process_name = session.Process.name()
-                        if not process_name:
-                            continue
-                    except Exception as e:
-                        logging.debug(f"Could not get process name: {e}")
-                        continue
-                    
-                    # Skip ignored processes and duplicates
-                    if process_name not in seen_processes and process_name not in ignored_processes:
-                        try:
-                            # Get process info
-                            process = psutil.Process(session.Process.pid)
-                            
-                            # Determine priority
-                            is_priority = process_name in priority_apps
-                            
-                            # Get full path safely
-                            full_path = ''
-                            try:
-                                full_path = process.exe() if hasattr(process, 'exe') else ''
-                            except (psutil.AccessDenied, psutil.NoSuchProcess):
-                                pass
-                            
-                            audio_apps.append({
-                                'name': process_name,
-                                'exe': process_name,
-                                'fullPath': full_path,
-                                'pid': session.Process.pid,
-                                'priority': is_priority,
-                                'active': True  # Has active audio session
-                            })
-                            seen_processes.add(process_name)
-                        except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
-                            logging.debug(f"Could not access process {process_name} (PID {session.Process.pid}): {e}")
-                            pass
-                        except Exception as e:
-                            logging.debug(f"Unexpected error processing {process_name}: {e}")
-                            pass
-        except Exception as e:
-            logging.debug(f"Error getting audio sessions: {e}")
+        with metrics.timer('get_audio_applications.sessions'):
+            try:
+                if session_cache.is_stale():
+                    # Behind any mute that is queued; dropped unstarted if the request is cancelled
+                    await session_watcher.refresh(priority=PRIORITY_LOW)
+                # Full paths come from the process cache (validated by create_time)
+                audio_apps.extend(await asyncio.to_thread(
+                    lambda: list(session_apps(session_cache.all(), process_exe, seen_processes))
+                ))
+            except Exception as e:
+                logging.debug(f"Error getting audio sessions: {e}")
         
         # Then, scan all running processes to find known audio applications
         # that might not have active audio sessions currently
-        try:
-            for proc in psutil.process_iter(['pid', 'name', 'exe']):
+        with metrics.timer('get_audio_applications.process_scan'):
+            try:
+                # Incremental: only pids that appeared since the last scan are looked up.
+                # If this request is cancelled (timeout, client gone) the thread stops too.
+                stop_scan = threading.Event()
                 try:
-                    process_name = proc.info['name']
-                    if not process_name:
-                        continue
-                    
-                    # Only add if it's a priority app and not already seen
-                    if process_name in priority_apps and process_name not in seen_processes:
-                        if process_name not in ignored_processes:
-                            full_path = proc.info.get('exe', '')
-                            audio_apps.append({
-                                'name': process_name,
-                                'exe': process_name,
-                                'fullPath': full_path,
-                                'pid': proc.info['pid'],
-                                'priority': True,
-                                'active': False  # No active audio session
-                            })
-                            seen_processes.add(process_name)
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    pass
-                except Exception as e:
-                    logging.debug(f"Error scanning process: {e}")
-                    pass
-        except Exception as e:
-            logging.debug(f"Error scanning all processes: {e}")
+                    processes = await asyncio.to_thread(process_cache.scan, stop_scan.is_set)
+                except asyncio.CancelledError:
+                    stop_scan.set()
+                    raise
+                audio_apps.extend(process_apps(processes or [], seen_processes))
+            except Exception as e:
+                logging.debug(f"Error scanning all processes: {e}")
         
         # Sort: active apps first, then priority apps, then alphabetically
-        audio_apps.sort(key=lambda x: (
-            not x.get('active', False),  # Active sessions first
-            not x.get('priority', False),  # Then priority apps
-            x['name'].lower()  # Then alphabetically
-        ))
-        
-        return audio_apps
+        return sort_apps(audio_apps)
     except Exception as e:
         logging.error(f"Error getting audio applications: {e}")
         import traceback
         logging.debug(traceback.format_exc())
         return []
 
-async def handler(websocket):
-    """WebSocket message handler"""
-    global unmute_task, muting_enabled, UNMUTE_DELAY_SECONDS, TARGET_PROCESSES
-    logging.info("✓ Client connected")
+# Function to apply config values from update_config or an external edit of config.json
+def apply_config(changes, source=None):
+    """Apply the known config keys in changes to the running server as one new state version"""
+    changed = state_store.update(changes, source)
+    state = state_store.current
+    if 'muting_enabled' in changed:
+        logging.info(f"Muting enabled set to: {state.muting_enabled}")
+    if 'unmute_delay_seconds' in changed:
+        logging.info(f"Unmute delay set to: {state.unmute_delay_seconds}s")
+    if 'target_processes' in changed:
+        logging.info(f"Target processes set to: {', '.join(state.target_processes)}")
+    if changed & {'target_processes', 'rules'}:
+        logging.info(f"Mute rules: {len(state.rule_set)}")
+    if changed & {'fade_duration_seconds', 'fade_steps', 'fade_curve'}:
+        logging.info(f"Fade set to: {state.fade_duration_seconds}s, {state.fade_steps} steps, {state.fade_curve}")
     
-    try:
-        async for message in websocket:
-            # Log ALL received messages immediately
-            logging.info(f"📨 [RAW] Received message: {message[:200]}")  # Limit length for safety
-            # Try to parse as JSON for config updates
-            try:
-                data = json.loads(message)
-                logging.info(f"✓ Parsed JSON: type={data.get('type', 'unknown')}")
-                
-                # Handle request for audio applications list
-                if data.get('type') == 'get_audio_apps':
-                    logging.info("✓ Received get_audio_apps request")
-                    try:
-                        # Send immediate acknowledgment
-                        logging.info("Processing get_audio_apps request...")
-                        
-                        # Call get_audio_applications with timeout protection
-                        try:
-                            audio_apps = await asyncio.wait_for(
-                                get_audio_applications(),
-                                timeout=5.0  # 5 second timeout
-                            )
-                        except asyncio.TimeoutError:
-                            logging.error("get_audio_applications() timed out after 5 seconds")
-                            audio_apps = []
-                        
-                        logging.info(f"Found {len(audio_apps)} audio application(s)")
-                        if audio_apps:
-                            logging.info(f"Applications: {', '.join([app.get('name', 'Unknown') for app in audio_apps])}")
-                        
-                        response = {
-                            'type': 'audio_apps_list',
-                            'apps': audio_apps,
-                            'current_targets': TARGET_PROCESSES,
-                            'success': True
-                        }
-                        response_json = json.dumps(response)
-                        logging.info(f"Sending response ({len(response_json)} bytes)...")
-                        await websocket.send(response_json)
-                        logging.info(f"✓ Successfully sent audio apps list: {len(audio_apps)} apps")
-                    except Exception as e:
-                        logging.error(f"✗ Error handling get_audio_apps request: {e}")
-                        import traceback
-                        logging.error(traceback.format_exc())
-                        try:
-                            error_response = {
-                                'type': 'audio_apps_list',
-                                'apps': [],
-                                'current_targets': TARGET_PROCESSES,
-                                'success': False,
-                                'error': str(e)
-                            }
-                            await websocket.send(json.dumps(error_response))
-                            logging.info("✓ Sent error response")
-                        except Exception as send_error:
-                            logging.error(f"Failed to send error response: {send_error}")
-                    continue
-                
-                # Handle request for current config
-                if data.get('type') == 'get_config':
-                    logging.info("✓ Received get_config request")
-                    with state_lock:
-                        config_response = {
-                            'type': 'config_data',
-                            'muting_enabled': muting_enabled,
-                            'unmute_delay_seconds': UNMUTE_DELAY_SECONDS,
-                            'target_processes': TARGET_PROCESSES
-                        }
-                        await websocket.send(json.dumps(config_response))
-                        logging.info("✓ Sent config_data response")
-                    continue
-                
-                # Handle config updates
-                if data.get('type') == 'update_config':
-                    with state_lock:
-                        if 'muting_enabled' in data:
-                            muting_enabled = data['muting_enabled']
-                            logging.info(f"Muting enabled set to: {muting_enabled}")
-                        
-                        if 'unmute_delay_seconds' in data:
-                            UNMUTE_DELAY_SECONDS = float(data['unmute_delay_seconds'])
-                            logging.info(f"Unmute delay set to: {UNMUTE_DELAY_SECONDS}s")
-                        
-                        if 'target_processes' in data:
-                            TARGET_PROCESSES = data['target_processes']
-                            logging.info(f"Target processes set to: {', '.join(TARGET_PROCESSES)}")
-                        
-                        # Save to config file
-                        config['muting_enabled'] = muting_enabled
-                        config['unmute_delay_seconds'] = UNMUTE_DELAY_SECONDS
-                        config['target_processes'] = TARGET_PROCESSES
-                        
-                        with open(config_file_path, 'w') as config_file:
-                            json.dump(config, config_file, indent=4)
-                        
-                        logging.info("Configuration saved")
-                    
-                    # Send confirmation
-                    await websocket.send(json.dumps({'type': 'config_updated', 'success': True}))
-                    continue
-                    
-            except json.JSONDecodeError as e:
-                # Not JSON, treat as simple command
-                logging.debug(f"Message is not JSON: {message}, error: {e}")
-                pass
-            
-            with state_lock:
-                current_muting_enabled = muting_enabled
+    if 'log_level' in changed:
+        logging.info("Log level set to: %s", set_log_level(state.log_level))
 
-            if message == 'shutdown':
-                logging.info("Shutdown command received")
-                exit_event.set()
-                break
+# Function to collect the persisted config values
+def current_config():
+    """Return the server's current settings as stored in config.json"""
+    return state_store.current.to_config()
 
-            if not current_muting_enabled:
-                continue
+# Tell clients about new settings, whether from update_config or an edit of config.json
+def on_settings_changed(state, changed, source):
+    config_message = dict(state.to_config(), type='config_data')
+    # The client that sent update_config gets config_updated instead
+    spawn(clients.broadcast(config_message, exclude=source))
 
-            if message == 'mute':
-                # Cancel any pending unmute task
-                if unmute_task and not unmute_task.done():
-                    unmute_task.cancel()
-                await mute_target_processes()
+state_store.subscribe(on_settings_changed)
 
-            elif message == 'unmute':
-                # Cancel any pending unmute task
-                if unmute_task and not unmute_task.done():
-                    unmute_task.cancel()
-                # Schedule a new unmute task
-                unmute_task = asyncio.create_task(unmute_target_processes())
+# New targets or rules while muted: apply them now instead of on the next mute
+def on_rules_changed(state, changed, source):
+    if mute_controller.state == MUTED:
+        spawn(mute_controller.request('mute'))
 
-    except asyncio.CancelledError:
-        logging.info("Handler cancelled")
-    except websockets.exceptions.ConnectionClosed:
-        logging.info("✗ Client disconnected")
-        exit_event.set()
-    except Exception as e:
-        logging.error(f"Error in handler: {e}")
+state_store.subscribe(on_rules_changed, keys=('target_processes', 'rules'))
 
-async def wait_for_exit_event():
-    """Wait for exit event"""
-    loop = asyncio.get_running_loop()
-    await loop.run_in_executor(None, exit_event.wait)
+# Function to restore volumes left muted by a previous run that crashed
+async def restore_journaled_volumes():
+    """Put back volumes recorded in the journal for sessions that are still muted
 
-def monitor_parent():
-    """Monitor parent process and exit if it dies"""
-    parent_pid = os.getppid()
-    logging.info(f"Monitoring parent process (PID: {parent_pid})")
+    Mutes are held back until this returns (see journal_restored).
+    """
+    try:
+        await _restore_journaled_volumes()
+    finally:
+        journal_restored.set()
+
+async def _restore_journaled_volumes():
+    snapshots = await asyncio.to_thread(volume_store.load_journal)
+    if not snapshots:
+        return
     
+    logging.info("Found volume journal with %d session(s) from a previous run", len(snapshots))
+    sessions = [session_cache.get(snapshot.key) for snapshot in snapshots]
+    live = [(session, snapshot) for session, snapshot in zip(sessions, snapshots) if session is not None]
+    levels = await com_executor.run_batch([(backend.get_volume, (session,)) for session, _ in live])
+    
+    # Only sessions still at the level we set were left muted/ducked by us; anything else was changed since
+    calls = [
+        (backend.set_volume, (session, snapshot.volume))
+        for (session, snapshot), level in zip(live, levels)
+        if not isinstance(level, Exception) and abs(level - snapshot.level) < 0.001
+    ]
+    results = await com_executor.run_batch(calls)
+    restored = sum(1 for result in results if not isinstance(result, Exception))
+    logging.info("✓ Restored %d volume(s) from the journal", restored)
+    volume_store.forget([snapshot.key for snapshot in snapshots])
+
+# Function to tell every client about the mute holds
+async def broadcast_mute_state():
+    """Broadcast whether any client is holding a mute"""
+    holders = len(clients.mute_holders)
+    await clients.broadcast({
+        'type': 'mute_state',
+        'muted': holders > 0,
+        'holders': holders,
+        'state': mute_controller.state
+    })
+
+# Function to run a mute/unmute transport command
+async def run_transport_command(command, client):
+    """Apply a client's mute/unmute; audio stays muted while any client holds a mute"""
+    if not state_store.current.muting_enabled:
+        return
+    
+    if command == 'mute':
+        if clients.hold_mute(client):
+            await mute_controller.request('mute')
+            await broadcast_mute_state()
+    elif command == 'unmute':
+        # Only the last holder letting go brings the audio back
+        if clients.release_mute(client):
+            await mute_controller.request('unmute')
+            await broadcast_mute_state()
+
+# Function to clean up after a client goes away
+async def client_disconnected(client):
+    """Release the client's mute hold and apply the shutdown policy"""
+    global idle_shutdown_task
+    # Cancel the client's background requests before dropping its subscription
+    was_holding = clients.remove(client)
+    app_publisher.unsubscribe(client.websocket)
+    if was_holding and not clients.mute_holders:
+        logging.info("%s disconnected while holding a mute, releasing it", client)
+        await mute_controller.request('unmute')
+        await broadcast_mute_state()
+    
+    if SHUTDOWN_POLICY == 'last_client' and not clients:
+        idle_shutdown_task = asyncio.create_task(shutdown_when_idle())
+
+# Function to stop the server once no client has come back for the grace period
+async def shutdown_when_idle():
+    """Shutdown policy 'last_client': exit unless a client reconnects in time"""
+    await asyncio.sleep(SHUTDOWN_GRACE_SECONDS)
+    if not clients:
+        lifecycle.request_shutdown(f"no clients for {SHUTDOWN_GRACE_SECONDS}s")
+
+# Function to build the readiness handshake message
+def ready_message():
+    """Tell a client the backend is loaded and sessions are enumerated"""
+    return {
+        'type': 'ready',
+        'protocol_version': PROTOCOL_VERSION,
+        'commands': commands.commands,
+        'backend': backend.name,
+        'timings': startup_timings
+    }
+
+# Function to finish startup in the background once the listener is bound
+async def warm_up():
+    """Load the backend, enumerate sessions and restore journaled volumes, then announce ready"""
+    global server_ready
+    started = time.perf_counter()
     try:
-        parent_process = psutil.Process(parent_pid)
-    except psutil.NoSuchProcess:
-        logging.info("Parent process not found, exiting")
-        exit_event.set()
+        # The worker builds the backend (pycaw/comtypes imports) when it initializes COM
+        com_executor.start()
+        await com_executor.run(audio_backend.load)
+        startup_timings['backend_ms'] = round((time.perf_counter() - started) * 1000, 1)
+
+        started = time.perf_counter()
+        await session_watcher.start()
+        startup_timings['sessions_ms'] = round((time.perf_counter() - started) * 1000, 1)
+
+        await restore_journaled_volumes()
+    except Exception as e:
+        logging.error(f"Failed to start audio backend: {e}")
+        # Queued mutes fail on the backend instead of waiting forever
+        journal_restored.set()
+        lifecycle.request_shutdown("audio backend failed to start")
         return
 
-    while not exit_event.is_set():
-        if not parent_process.is_running():
-            logging.info("Parent process terminated, exiting")
-            exit_event.set()
-            break
-        time.sleep(2)
+    startup_timings['ready_ms'] = round((time.perf_counter() - PROCESS_STARTED) * 1000, 1)
+    server_ready = True
+    logging.info("✓ Ready in %.1f ms (%s)", startup_timings['ready_ms'], startup_timings)
+    await clients.broadcast(ready_message())
+    # Baseline once the backend, sessions and caches are loaded, so startup is not counted as growth
+    resource_monitor.start()
+
+# Clients subscribed to the audio app list get pushed deltas
+app_publisher = AppListPublisher(get_audio_applications, lambda: list(state_store.current.target_processes))
+
+# WebSocket commands, dispatched by message type. App enumeration is slow and runs
+# in the background (two at a time) so it never holds up a mute on the same connection.
+commands = CommandDispatcher(max_slow=2, metrics=metrics)
+
+@commands.command('mute')
+async def on_mute(client, data):
+    await run_transport_command('mute', client)
+
+@commands.command('unmute')
+async def on_unmute(client, data):
+    await run_transport_command('unmute', client)
+
+@commands.command('shutdown')
+async def on_shutdown(client, data):
+    lifecycle.request_shutdown("shutdown command")
+    return CLOSE
+
+@commands.command('get_audio_apps', slow=True)
+async def on_get_audio_apps(client, data):
+    """Reply with the audio application list"""
+    websocket = client.websocket
+    try:
+        # Call get_audio_applications with timeout protection
+        try:
+            audio_apps = await asyncio.wait_for(
+                get_audio_applications(),
+                timeout=5.0  # 5 second timeout
+            )
+        except asyncio.TimeoutError:
+            logging.error("get_audio_applications() timed out after 5 seconds")
+            audio_apps = []
+    
+        logging.info("Found %d audio application(s)", len(audio_apps))
+        if audio_apps and logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug("Applications: %s", ', '.join(app.get('name', 'Unknown') for app in audio_apps))
+    
+        response = {
+            'type': 'audio_apps_list',
+            'apps': audio_apps,
+            'current_targets': list(state_store.current.target_processes),
+            'success': True
+        }
+        response_json = json.dumps(response)
+        await websocket.send(response_json)
+        logging.debug("✓ Sent audio apps list (%d bytes)", len(response_json))
+    except Exception as e:
+        logging.error(f"✗ Error handling get_audio_apps request: {e}")
+        import traceback
+        logging.error(traceback.format_exc())
+        try:
+            error_response = {
+                'type': 'audio_apps_list',
+                'apps': [],
+                'current_targets': list(state_store.current.target_processes),
+                'success': False,
+                'error': str(e)
+            }
+            await websocket.send(json.dumps(error_response))
+            logging.info("✓ Sent error response")
+        except Exception as send_error:
+            logging.error(f"Failed to send error response: {send_error}")
+
+@commands.command('playhead', {'samples': (list, True)})
+async def on_playhead(client, data):
+    """Feed playhead position samples [[timestamp, seconds], ...] to the client's transport state machine"""
+    transport = client.transport
+    for sample in data['samples']:
+        try:
+            timestamp, position = float(sample[0]), float(sample[1])
+        except (TypeError, ValueError, IndexError):
+            raise ProtocolError('invalid_message', "samples must be [timestamp, seconds] pairs", 'playhead')
+        command = transport.feed(timestamp, position)
+        if command:
+            logging.info("Transport %s: %s", transport.state, command)
+            await client.websocket.send(json.dumps({'type': 'transport_state', 'state': transport.state}))
+            await run_transport_command(command, client)
+
+@commands.command('subscribe_audio_apps', slow=True)
+async def on_subscribe_audio_apps(client, data):
+    logging.info("✓ Received subscribe_audio_apps request")
+    try:
+        await app_publisher.subscribe(client.websocket)
+    except Exception as e:
+        logging.error(f"✗ Error subscribing to audio apps: {e}")
+        await client.websocket.send(json.dumps({
+            'type': 'audio_apps_snapshot',
+            'apps': [],
+            'current_targets': list(state_store.current.target_processes),
+            'success': False,
+            'error': str(e)
+        }))
+
+@commands.command('unsubscribe_audio_apps', cancels='subscribe_audio_apps')
+async def on_unsubscribe_audio_apps(client, data):
+    app_publisher.unsubscribe(client.websocket)
+    logging.info("✓ Client unsubscribed from audio apps")
+
+@commands.command('set_log_level', {'level': (str, False)})
+async def on_set_log_level(client, data):
+    """Change the log level at runtime"""
+    try:
+        level = set_log_level(data.get('level', 'INFO'))
+        logging.info("Log level set to: %s", level)
+        await client.websocket.send(json.dumps({'type': 'log_level', 'level': level, 'success': True}))
+    except ValueError as e:
+        await client.websocket.send(json.dumps({
+            'type': 'log_level',
+            'success': False,
+            'error': str(e),
+            'levels': list(LOG_LEVELS)
+        }))
+
+@commands.command('get_metrics')
+async def on_get_metrics(client, data):
+    await client.websocket.send(json.dumps({'type': 'metrics_data', 'metrics': metrics.snapshot()}))
+
+@commands.command('get_resources', slow=True)
+async def on_get_resources(client, data):
+    """Reply with the resource baseline, latest sample, growth and fastest-growing object types"""
+    if data.get('sample') or resource_monitor.latest is None:
+        await resource_monitor.check()
+    await client.websocket.send(json.dumps({'type': 'resources_data', 'resources': resource_monitor.report()}))
+
+@commands.command('memory_snapshot', {
+    'action': (str, True),
+    'frames': (int, False),
+    'limit': (int, False),
+    'key': (str, False),
+    'reset': (bool, False)
+}, slow=True)
+async def on_memory_snapshot(client, data):
+    """tracemalloc on demand: 'start' takes the baseline, 'diff' lists the top growing sites, 'stop' ends tracing"""
+    action = data['action']
+    response = {'type': 'memory_snapshot_data', 'action': action, 'success': True}
+    try:
+        if action == 'start':
+            response.update(await asyncio.to_thread(resource_monitor.start_tracing, max(1, data.get('frames', 1))))
+        elif action == 'diff':
+            if data.get('key', 'lineno') not in ('lineno', 'filename', 'traceback'):
+                raise ProtocolError('invalid_message', "key must be lineno, filename or traceback", 'memory_snapshot')
+            response.update(await asyncio.to_thread(
+                resource_monitor.trace_diff, data.get('limit', 20), data.get('key', 'lineno'), data.get('reset', False)
+            ))
+        elif action == 'stop':
+            resource_monitor.stop_tracing()
+        else:
+            raise ProtocolError('invalid_message', "action must be start, diff or stop", 'memory_snapshot')
+    except RuntimeError as e:
+        response.update(success=False, error=str(e))
+    await client.websocket.send(json.dumps(response))
+
+@commands.command('get_config')
+async def on_get_config(client, data):
+    # A snapshot of the current state: nothing to lock, however long the send takes
+    config_response = dict(type='config_data', **current_config())
+    await client.websocket.send(json.dumps(config_response))
+    logging.debug("✓ Sent config_data response")
+
+@commands.command('update_config', {
+    'muting_enabled': (bool, False),
+    'unmute_delay_seconds': (NUMBER, False),
+    'target_processes': (list, False),
+    'rules': (list, False),
+    'fade_duration_seconds': (NUMBER, False),
+    'fade_steps': (int, False),
+    'fade_curve': (str, False),
+    'log_level': (str, False)
+})
+async def on_update_config(client, data):
+    """Apply and persist config changes (written by the config store, off the event loop)"""
+    # The other clients hear about the new settings from the state store
+    apply_config(data, source=client)
+    config_store.update(current_config())
+    
+    await client.websocket.send(json.dumps({'type': 'config_updated', 'success': True}))
+
+async def handler(websocket):
+    """WebSocket message handler"""
+    client = clients.add(websocket)
+    logging.info("✓ Client connected (%s, %d connected)", client, len(clients))
+    if recorder:
+        recorder.client_opened(client.id)
+    
+    # A reconnecting client cancels a pending idle shutdown
+    if idle_shutdown_task and not idle_shutdown_task.done():
+        idle_shutdown_task.cancel()
+    
+    try:
+        # Clients that connect before warm-up finishes get the ready message by broadcast
+        if server_ready:
+            await websocket.send(json.dumps(ready_message()))
+        
+        async for message in websocket:
+            received = time.perf_counter()
+            command_name = 'unknown'
+            result = None
+            if recorder:
+                recorder.command(client.id, message)
+            try:
+                # Raw messages only at DEBUG: this runs for every playhead sample
+                logging.debug("📨 [RAW] Received message: %.200s", message)
+                command_name, result = await commands.dispatch(client, message)
+                if result is CLOSE:
+                    break
+            finally:
+                # Slow commands record their own latency when their task finishes
+                if result is not QUEUED:
+                    metrics.record(f"command.{command_name}", time.perf_counter() - received)
+
+    except asyncio.CancelledError:
+        logging.info("Handler cancelled")
+    except websockets.exceptions.ConnectionClosed:
+        pass
+    except Exception as e:
+        logging.error(f"Error in handler: {e}")
+        metrics.increment('errors.handler')
+    finally:
+        logging.info("✗ Client disconnected (%s, %d left)", client, len(clients) - 1)
+        if recorder:
+            recorder.client_closed(client.id)
+        await client_disconnected(client)
 
 async def main():
     """Main async entry point"""
     try:
-        # Start the WebSocket server
+        if recorder:
+            recorder.start(audio_backend.name, dict(config, **current_config()))
+            logging.info(f"Recording commands and volume calls to {RECORD_PATH}")
+
+        # Bind the WebSocket server first so the extension can connect right away
         server = await websockets.serve(handler, 'localhost', 3350)
+        startup_timings['listening_ms'] = round((time.perf_counter() - PROCESS_STARTED) * 1000, 1)
         logging.info("✓ WebSocket server running on ws://localhost:3350")
 
-        # Wait for exit event
-        await wait_for_exit_event()
+        # Backend, session table and journal restore load in the background
+        spawn(warm_up())
+        config_store.start_watching()
+
+        # Wait for a shutdown request (client, idle policy, signal or parent exit)
+        lifecycle.start()
+        await lifecycle.wait()
+        lifecycle.stop()
         
         logging.info("Shutting down server...")
         server.close()
         await server.wait_closed()
 
+        await session_watcher.stop()
+        resource_monitor.stop()
+        config_store.stop_watching()
+        await config_store.flush()
+        await volume_store.flush()
+
         # Cancel all pending tasks
-        pending = asyncio.all_tasks()
+        pending = asyncio.all_tasks() - {asyncio.current_task()}
         for task in pending:
-            if task is not asyncio.current_task():
-                task.cancel()
+            task.cancel()
         await asyncio.gather(*pending, return_exceptions=True)
+        com_executor.shutdown()
+        if recorder:
+            recorder.close()
+
+        if METRICS_FILE:
+            try:
+                metrics.dump(METRICS_FILE)
+                logging.info(f"Metrics written to {METRICS_FILE}")
+            except Exception as e:
+                logging.error(f"Failed to write metrics: {e}")
 
         logging.info("✓ AudioStop stopped")
     except Exception as e:
@@ -482,10 +878,6 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        # Start parent process monitor
-        parent_monitor_thread = threading.Thread(target=monitor_parent, daemon=True)
-        parent_monitor_thread.start()
-
         # Run main async loop
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -493,6 +885,9 @@ if __name__ == "__main__":
     except Exception as e:
         logging.error(f"Fatal error: {e}")
         sys.exit(1)
+    finally:
+        # Flush whatever is still queued for the background writer
+        stop_logging()
 
 
 # Build command:
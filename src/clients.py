@@ -0,0 +1,92 @@
+"""
+Connected clients, their per-connection state, and reference-counted mute holds
+
+The UI panel and the background monitor (and any number of reloads of either)
+can be connected at once. A client that sends 'mute' holds the mute until it
+sends 'unmute' or disconnects; audio only comes back when the last holder lets go.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import time
+
+from transport import TransportStateMachine
+
+
+class ClientState:
+    """State owned by one WebSocket connection"""
+
+    def __init__(self, client_id, websocket):
+        self.id = client_id
+        self.websocket = websocket
+        self.connected_at = time.monotonic()
+        # Playhead samples from this client drive its own transport state machine
+        self.transport = TransportStateMachine()
+        # Background work for this client's slow requests, cancelled when it disconnects
+        self.tasks = set()
+
+    def spawn(self, coro, name=None):
+        """Run coro as a task owned by this client (name lets cancel_tasks pick it out)"""
+        task = asyncio.create_task(coro, name=name)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    def cancel_tasks(self, name=None):
+        """Cancel this client's tasks, or only the ones spawned under name"""
+        for task in list(self.tasks):
+            if name is None or task.get_name() == name:
+                task.cancel()
+
+    def __repr__(self):
+        return f"client #{self.id}"
+
+
+class ClientRegistry:
+    """All connected clients plus the set of clients currently holding a mute"""
+
+    def __init__(self):
+        self.clients = {}
+        self.mute_holders = set()
+        self._ids = itertools.count(1)
+
+    def add(self, websocket):
+        client = ClientState(next(self._ids), websocket)
+        self.clients[client.id] = client
+        return client
+
+    def remove(self, client):
+        """Forget a client and cancel its background work; returns True if it was holding a mute"""
+        self.clients.pop(client.id, None)
+        client.cancel_tasks()
+        if client.id in self.mute_holders:
+            self.mute_holders.discard(client.id)
+            return True
+        return False
+
+    def hold_mute(self, client):
+        """Register client as a mute holder; True if it is the first holder"""
+        first = not self.mute_holders
+        self.mute_holders.add(client.id)
+        return first
+
+    def release_mute(self, client):
+        """Drop client's mute hold; True if nobody holds a mute any more"""
+        self.mute_holders.discard(client.id)
+        return not self.mute_holders
+
+    def __len__(self):
+        return len(self.clients)
+
+    async def broadcast(self, message, exclude=None):
+        """Send a JSON message to every connected client (except exclude)"""
+        payload = json.dumps(message)
+        targets = [client for client in self.clients.values() if client is not exclude]
+        results = await asyncio.gather(
+            *(client.websocket.send(payload) for client in targets),
+            return_exceptions=True
+        )
+        for client, result in zip(targets, results):
+            if isinstance(result, Exception):
+                logging.debug(f"Broadcast to {client} failed: {result}")
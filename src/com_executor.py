@@ -0,0 +1,140 @@
+"""
+Long-lived worker threads for audio backend (COM) calls
+
+Each worker initializes the backend once when it starts and keeps its apartment
+for the lifetime of the server, instead of paying CoInitialize/CoUninitialize on
+every call. Work items are queued with futures so callers on the event loop can
+await them, and a batch of calls runs as a single work item.
+
+The queue is ordered by priority: mute and fade batches (PRIORITY_HIGH) run
+before queued enumeration work (PRIORITY_LOW), so a mute only ever waits for the
+one item already running. Items whose future was cancelled before they started
+are skipped.
+
+If a worker cannot initialize the backend (pycaw missing, COM unavailable), the
+executor records the error and fails every queued and later item with it, so
+callers see the failure instead of awaiting forever.
+"""
+import asyncio
+import concurrent.futures
+import itertools
+import logging
+import queue
+import threading
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+# Sorts after all work so shutdown lets queued items run first
+_STOP = PRIORITY_LOW + 1
+
+
+class ComExecutor:
+    """Pool of pinned threads that own the backend's per-thread state"""
+
+    def __init__(self, backend, workers=1, name='com-worker'):
+        self.backend = backend
+        self.workers = workers
+        self.name = name
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._threads = []
+        self._start_lock = threading.Lock()
+        # Set when a worker failed to initialize the backend; every item fails from then on
+        self.error = None
+
+    def start(self):
+        """Start the worker threads (called implicitly on first submit)"""
+        with self._start_lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"{self.name}-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _worker(self):
+        try:
+            # For a lazy backend this is also where it gets built
+            self.backend.initialize_thread()
+        except BaseException as e:
+            logging.error(f"{threading.current_thread().name} failed to initialize the audio backend: {e}")
+            self.error = e
+            self._fail_pending()
+            return
+        try:
+            while True:
+                _, _, item = self._queue.get()
+                if item is None:
+                    break
+                future, func, args = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(func(*args))
+                except BaseException as e:
+                    future.set_exception(e)
+        finally:
+            self.backend.uninitialize_thread()
+
+    def _failure(self):
+        error = RuntimeError(f"{self.name} is not available: {self.error}")
+        error.__cause__ = self.error
+        return error
+
+    def _fail_pending(self):
+        """Fail every queued item with the initialization error"""
+        while True:
+            try:
+                _, _, item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None and item[0].set_running_or_notify_cancel():
+                item[0].set_exception(self._failure())
+
+    def submit(self, func, *args, priority=PRIORITY_NORMAL):
+        """Queue func(*args) and return a concurrent.futures.Future"""
+        if not self._threads:
+            self.start()
+        future = concurrent.futures.Future()
+        self._queue.put((priority, next(self._sequence), (future, func, args)))
+        # Checked after queueing: a worker failing concurrently may have drained before our put
+        if self.error is not None:
+            self._fail_pending()
+        return future
+
+    def submit_batch(self, calls, priority=PRIORITY_NORMAL):
+        """Queue [(func, args), ...] as one work item; the future resolves to a list of results
+
+        A failing call does not stop the batch: its slot holds the exception instead.
+        """
+        return self.submit(_run_batch, calls, priority=priority)
+
+    async def run(self, func, *args, priority=PRIORITY_NORMAL):
+        """Await func(*args) on a worker thread (cancelling the await drops it if not started)"""
+        return await asyncio.wrap_future(self.submit(func, *args, priority=priority))
+
+    async def run_batch(self, calls, priority=PRIORITY_NORMAL):
+        """Await a batch of calls dispatched as one work item"""
+        return await asyncio.wrap_future(self.submit_batch(calls, priority=priority))
+
+    def shutdown(self, timeout=2.0):
+        """Stop the workers after the queued work has run"""
+        with self._start_lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put((_STOP, next(self._sequence), None))
+        for thread in threads:
+            thread.join(timeout)
+            if thread.is_alive():
+                logging.warning(f"{thread.name} did not stop within {timeout}s")
+
+
+def _run_batch(calls):
+    results = []
+    for func, args in calls:
+        try:
+            results.append(func(*args))
+        except Exception as e:
+            results.append(e)
+    return results
@@ -0,0 +1,126 @@
+"""
+config.json persistence: debounced, atomic, off the event loop, with hot reload
+
+Rapid updates (a slider drag in the panel) are coalesced into one write that runs
+on a worker thread and replaces the file atomically (temp file + rename), so a
+crash mid-write can never leave a truncated config. The file is also watched so
+edits made outside the server are picked up without a restart.
+"""
+import asyncio
+import json
+import logging
+import os
+
+
+class ConfigStore:
+    """In-memory config dict backed by a JSON file"""
+
+    def __init__(self, path, defaults, debounce=0.5, watch_interval=1.0, on_reload=None):
+        self.path = path
+        self.defaults = defaults
+        self.debounce = debounce
+        self.watch_interval = watch_interval
+        self.on_reload = on_reload
+        self.data = {}
+        self.writes = 0
+        self._known_mtime = None
+        # Set by update(), cleared when a write starts: a change made mid-write gets another write
+        self._dirty = False
+        self._flush_requested = asyncio.Event()
+        self._save_task = None
+        self._watch_task = None
+
+    def load(self):
+        """Read the file (creating it from defaults if missing) and return the data"""
+        if not os.path.exists(self.path):
+            self._write(dict(self.defaults))
+        with open(self.path, 'r') as config_file:
+            self.data = json.load(config_file)
+        self._known_mtime = self._mtime()
+        return self.data
+
+    def _mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _write(self, data):
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as config_file:
+            json.dump(data, config_file, indent=4)
+            config_file.flush()
+            os.fsync(config_file.fileno())
+        os.replace(temp_path, self.path)
+        self._known_mtime = self._mtime()
+        self.writes += 1
+
+    def update(self, changes):
+        """Apply changes in memory and schedule a coalesced write"""
+        self.data.update(changes)
+        self._dirty = True
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.create_task(self._save_later())
+
+    async def _save_later(self):
+        self._flush_requested.clear()
+        try:
+            await asyncio.wait_for(self._flush_requested.wait(), self.debounce)
+        except asyncio.TimeoutError:
+            pass
+        await self._save()
+
+    async def _save(self):
+        # Only ever one writer (this task): updates made during a write are picked up by the next pass
+        while self._dirty:
+            self._dirty = False
+            try:
+                await asyncio.to_thread(self._write, dict(self.data))
+                logging.info("Configuration saved")
+            except Exception as e:
+                logging.error(f"Failed to save configuration: {e}")
+
+    async def flush(self):
+        """Write any pending update now and wait for it (used on shutdown)"""
+        while self._dirty or (self._save_task is not None and not self._save_task.done()):
+            if self._save_task is None or self._save_task.done():
+                self._save_task = asyncio.create_task(self._save())
+            # Skip the rest of the debounce; never cancel a write that is in progress
+            self._flush_requested.set()
+            await self._save_task
+
+    def start_watching(self):
+        """Poll the file's mtime and reload it when someone else changes it"""
+        if self._watch_task is None or self._watch_task.done():
+            self._watch_task = asyncio.create_task(self._watch())
+
+    def stop_watching(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.watch_interval)
+            # Our own pending write wins over whatever is on disk
+            if self._save_task is not None and not self._save_task.done():
+                continue
+            mtime = self._mtime()
+            if mtime is None or mtime == self._known_mtime:
+                continue
+            self._known_mtime = mtime
+            try:
+                data = await asyncio.to_thread(self._read)
+            except (OSError, ValueError) as e:
+                logging.warning(f"Ignoring unreadable config change: {e}")
+                continue
+            changed = {key: value for key, value in data.items() if self.data.get(key) != value}
+            self.data = data
+            if changed:
+                logging.info(f"Config file changed on disk: {', '.join(changed)}")
+                if self.on_reload:
+                    self.on_reload(changed)
+
+    def _read(self):
+        with open(self.path, 'r') as config_file:
+            return json.load(config_file)
@@ -0,0 +1,165 @@
+"""
+Fade scheduler that ramps every session together on one clock
+
+All active ramps advance from a single timer tick, and each tick issues one
+batched volume-set to the COM worker regardless of how many sessions are fading.
+"""
+import asyncio
+import functools
+import logging
+import math
+import time
+
+from com_executor import PRIORITY_HIGH
+
+
+# Fade curves: map progress t (0.0 - 1.0) to gain (0.0 - 1.0)
+CURVES = {
+    'linear': lambda t: t,
+    'equal_power': lambda t: math.sin(t * math.pi / 2),
+    'logarithmic': lambda t: math.log10(1 + 9 * t)
+}
+
+
+@functools.lru_cache(maxsize=32)
+def build_curve(name, steps):
+    """Precompute a curve as steps + 1 gain values"""
+    if name not in CURVES:
+        raise ValueError(f"Unknown fade curve: {name}")
+    shape = CURVES[name]
+    return tuple(shape(i / steps) for i in range(steps + 1))
+
+
+class Ramp:
+    """One session's volume ramp"""
+
+    __slots__ = ('session', 'start', 'end', 'curve', 'duration', 'started', 'last_level', 'future')
+
+    def __init__(self, session, start, end, curve, duration, started, future):
+        self.session = session
+        self.start = start
+        self.end = end
+        self.curve = curve
+        self.duration = duration
+        self.started = started
+        self.last_level = None
+        self.future = future
+
+    def level_at(self, now):
+        """Volume for this ramp at time now, and whether the ramp is finished"""
+        steps = len(self.curve) - 1
+        progress = (now - self.started) / self.duration if self.duration > 0 else 1.0
+        index = min(steps, math.ceil(progress * steps))
+        if index >= steps:
+            return self.end, True
+        return self.start + (self.end - self.start) * self.curve[index], False
+
+
+class FadeEngine:
+    """Runs all active ramps from one timer tick with one batched volume-set per tick"""
+
+    def __init__(self, executor, backend, duration=0.4, steps=20, curve='linear'):
+        self.executor = executor
+        self.backend = backend
+        self.duration = duration
+        self.steps = steps
+        self.curve = curve
+        self._ramps = {}
+        self._task = None
+
+    def configure(self, duration=None, steps=None, curve=None):
+        """Change the default fade profile for new ramps"""
+        if duration is not None:
+            self.duration = max(0.0, float(duration))
+        if steps is not None:
+            self.steps = max(1, int(steps))
+        if curve is not None:
+            build_curve(curve, self.steps)
+            self.curve = curve
+
+    @property
+    def active(self):
+        """True while any ramp is running"""
+        return bool(self._ramps)
+
+    def fade(self, targets, duration=None, steps=None, curve=None):
+        """Ramp [(session, start, end), ...] together; return a future that resolves when done
+
+        The future's result is True if every ramp finished, False if any was cancelled.
+        """
+        duration = self.duration if duration is None else duration
+        table = build_curve(curve or self.curve, steps or self.steps)
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+
+        futures = []
+        for session, start, end in targets:
+            previous = self._ramps.pop(session.key, None)
+            if previous is not None and not previous.future.done():
+                previous.future.set_result(False)
+            future = loop.create_future()
+            self._ramps[session.key] = Ramp(session, start, end, table, duration, now, future)
+            futures.append(future)
+
+        if self._ramps and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+        done = loop.create_future()
+        if not futures:
+            done.set_result(True)
+            return done
+
+        def on_ramps_done(_):
+            if not done.done():
+                done.set_result(all(f.result() for f in futures))
+        asyncio.gather(*futures).add_done_callback(on_ramps_done)
+        return done
+
+    def cancel(self, keys=None):
+        """Stop ramps mid-flight (all of them if keys is None); sessions keep their current level"""
+        keys = list(self._ramps) if keys is None else [key for key in keys if key in self._ramps]
+        for key in keys:
+            ramp = self._ramps.pop(key)
+            if not ramp.future.done():
+                ramp.future.set_result(False)
+        if keys:
+            logging.debug("Cancelled %d fade(s)", len(keys))
+        return len(keys)
+
+    async def _run(self):
+        while self._ramps:
+            now = time.monotonic()
+            ticked = []
+            finished = set()
+            for ramp in self._ramps.values():
+                level, done = ramp.level_at(now)
+                if level != ramp.last_level:
+                    ramp.last_level = level
+                    ticked.append(ramp)
+                if done:
+                    finished.add(ramp)
+
+            failed = set()
+            if ticked:
+                calls = [(self.backend.set_volume, (ramp.session, ramp.last_level)) for ramp in ticked]
+                try:
+                    # Fade steps are audible: they go ahead of queued enumeration work
+                    results = await self.executor.run_batch(calls, priority=PRIORITY_HIGH)
+                except Exception as e:
+                    logging.error(f"Failed to fade volume: {e}")
+                    results = [e] * len(ticked)
+                for ramp, result in zip(ticked, results):
+                    if isinstance(result, Exception):
+                        logging.error(f"Failed to fade {ramp.session.name}: {result}")
+                        failed.add(ramp)
+
+            for ramp in finished | failed:
+                # The ramp may have been cancelled or replaced while the batch was running
+                if self._ramps.get(ramp.session.key) is ramp:
+                    del self._ramps[ramp.session.key]
+                    if not ramp.future.done():
+                        ramp.future.set_result(ramp not in failed)
+
+            if self._ramps:
+                # One clock for everything: tick at the finest step among active ramps
+                await asyncio.sleep(min(ramp.duration / (len(ramp.curve) - 1) for ramp in self._ramps.values()))
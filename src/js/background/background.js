@@ -11,9 +11,12 @@ console.log('[AudioStop Background] CSInterface imported successfully');
 
 let audioServerProcess = null;
 let websocket = null;
-let isPlaying = false;
-let lastPosition = null;
 let monitoringInterval = null;
+let connectAttempts = 0;
+
+// Reconnect quickly while the server is starting, backing off to 3 seconds
+const CONNECT_RETRY_MIN_MS = 50;
+const CONNECT_RETRY_MAX_MS = 3000;
 
 console.log("[AudioStop Background] Starting...");
 
@@ -87,7 +90,8 @@ function startAudioServer() {
 
         audioServerProcess = spawn(audioExecutablePath, [], {
             cwd: path.dirname(audioExecutablePath),
-            env: { ...process.env },
+            // The server exits with this process; the pid it sees as its parent may be a bootloader
+            env: { ...process.env, AUDIOSTOP_PARENT_PID: String(process.pid) },
             stdio: ['ignore', 'pipe', 'pipe'],  // Allow stdout and stderr to be captured
             detached: false,
             windowsHide: true
@@ -122,10 +126,9 @@ function startAudioServer() {
 
         console.log('[AudioStop Background] Audio server started successfully (PID: ' + audioServerProcess.pid + ')');
         
-        // Wait 2 seconds for server to start, then connect WebSocket
-        setTimeout(() => {
-            connectWebSocket();
-        }, 2000);
+        // Connect right away; retries are cheap until the listener is bound
+        connectAttempts = 0;
+        connectWebSocket();
     } else {
         console.error('[AudioStop Background] This script should only be run in a Node.js environment.');
     }
@@ -195,23 +198,44 @@ function connectWebSocket() {
         websocket = new WebSocket('ws://localhost:3350');
         
         websocket.onopen = () => {
-            console.log('[AudioStop Background] WebSocket connected');
+            console.log(`[AudioStop Background] WebSocket connected after ${connectAttempts} retries`);
+            connectAttempts = 0;
             startTimelineMonitoring();
         };
         
+        websocket.onmessage = (event) => {
+            try {
+                const data = JSON.parse(event.data);
+                if (data.type === 'ready') {
+                    console.log(`[AudioStop Background] Server ready (${data.backend}):`, data.timings);
+                } else if (data.type === 'transport_state') {
+                    console.log(`[AudioStop Background] Transport: ${data.state}`);
+                }
+            } catch (e) {
+                // Ignore non-JSON messages
+            }
+        };
+        
         websocket.onerror = (error) => {
-            console.error('[AudioStop Background] WebSocket error:', error);
+            // Refused connections are expected while the server is still starting
+            if (connectAttempts === 0) {
+                console.error('[AudioStop Background] WebSocket error:', error);
+            }
         };
         
         websocket.onclose = () => {
-            console.log('[AudioStop Background] WebSocket closed');
             websocket = null;
-            // Retry connection after 3 seconds
+            // Retry with exponential backoff: fast while the server is still starting
+            const delay = Math.min(CONNECT_RETRY_MIN_MS * 2 ** connectAttempts, CONNECT_RETRY_MAX_MS);
+            connectAttempts++;
+            if (connectAttempts === 1) {
+                console.log('[AudioStop Background] WebSocket closed');
+            }
             setTimeout(() => {
                 if (audioServerProcess) {
                     connectWebSocket();
                 }
-            }, 3000);
+            }, delay);
         };
     } catch (error) {
         console.error('[AudioStop Background] Failed to create WebSocket:', error);
@@ -263,23 +287,14 @@ function startTimelineMonitoring() {
                 
                 if (position.error) return;
                 
-                const currentPosition = position.seconds;
-                
-                if (lastPosition !== null) {
-                    const isMoving = currentPosition > lastPosition;
-                    
-                    if (isMoving !== isPlaying) {
-                        isPlaying = isMoving;
-                        const message = isPlaying ? 'mute' : 'unmute';
-                        
-                        if (websocket && websocket.readyState === WebSocket.OPEN) {
-                            websocket.send(message);
-                            console.log(`[AudioStop Background] Sent: ${message}`);
-                        }
-                    }
+                // Stream the raw position; the server's transport state machine
+                // decides when playback really started or stopped
+                if (websocket && websocket.readyState === WebSocket.OPEN) {
+                    websocket.send(JSON.stringify({
+                        type: 'playhead',
+                        samples: [[Date.now() / 1000, position.seconds]]
+                    }));
                 }
-                
-                lastPosition = currentPosition;
             } catch (e) {
                 console.error('[AudioStop Background] Error parsing position:', e);
             }
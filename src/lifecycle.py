@@ -0,0 +1,164 @@
+"""
+Server lifecycle: the shutdown event and parent-process supervision
+
+Shutdown is an asyncio.Event set from the loop (shutdown message, idle policy,
+signals, parent exit), so waiting for it costs no thread. The parent process is
+watched through a waitable handle: a pidfd registered with the loop's reader on
+Linux, the proactor's wait_for_handle on Windows. Where neither exists, a
+coroutine polls the parent instead of a dedicated thread.
+
+The process to watch is the one named by AUDIOSTOP_PARENT_PID (the extension
+passes its own pid). Without it, the direct parent is used, except in a
+PyInstaller onefile build: there the parent is the bootloader that unpacked us,
+which only exits after we do, so its parent is watched instead.
+"""
+import asyncio
+import logging
+import os
+import signal
+import sys
+
+
+def host_pid():
+    """Pid of the process whose exit should stop the server"""
+    configured = os.environ.get('AUDIOSTOP_PARENT_PID')
+    if configured:
+        try:
+            return int(configured)
+        except ValueError:
+            logging.warning(f"Ignoring AUDIOSTOP_PARENT_PID={configured!r}: not a pid")
+    parent_pid = os.getppid()
+    if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
+        # Onefile: our parent is the bootloader, which only exits once we have
+        try:
+            import psutil
+            return psutil.Process(parent_pid).ppid() or parent_pid
+        except Exception as e:
+            logging.warning(f"Cannot find the process above the bootloader, watching it instead: {e}")
+    return parent_pid
+
+
+class LifecycleManager:
+    """Owns the shutdown event and notices immediately when the parent process exits"""
+
+    def __init__(self, parent_pid=None, poll_interval=2.0):
+        self.parent_pid = parent_pid if parent_pid is not None else host_pid()
+        self.poll_interval = poll_interval
+        self.shutdown_reason = None
+        self.parent_watch = None
+        self._shutdown = asyncio.Event()
+        self._loop = None
+        self._pidfd = None
+        self._process_handle = None
+        self._handle_future = None
+        self._task = None
+
+    @property
+    def shutting_down(self):
+        return self._shutdown.is_set()
+
+    def request_shutdown(self, reason):
+        """Start shutting down (first reason wins); must be called on the loop"""
+        if not self._shutdown.is_set():
+            self.shutdown_reason = reason
+            logging.info(f"Shutdown requested: {reason}")
+            self._shutdown.set()
+
+    async def wait(self):
+        """Wait until shutdown is requested"""
+        await self._shutdown.wait()
+
+    def start(self):
+        """Watch the parent process and install signal handlers (call on the loop)"""
+        self._loop = asyncio.get_running_loop()
+        self._install_signal_handlers()
+        for watch in (self._watch_pidfd, self._watch_process_handle, self._watch_polling):
+            try:
+                if watch():
+                    break
+            except (OSError, AttributeError, NotImplementedError) as e:
+                logging.debug(f"{watch.__name__} unavailable: {e}")
+        logging.info(f"Monitoring parent process (PID: {self.parent_pid}, {self.parent_watch})")
+
+    def stop(self):
+        """Release the parent watch"""
+        if self._pidfd is not None:
+            self._loop.remove_reader(self._pidfd)
+            os.close(self._pidfd)
+            self._pidfd = None
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._handle_future is not None:
+            self._handle_future.cancel()
+            self._handle_future = None
+        if self._process_handle is not None:
+            import _winapi
+            _winapi.CloseHandle(self._process_handle)
+            self._process_handle = None
+
+    def _parent_exited(self):
+        self.request_shutdown(f"parent process {self.parent_pid} exited")
+
+    def _install_signal_handlers(self):
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                self._loop.add_signal_handler(signum, self.request_shutdown, f"signal {signum.name}")
+            except (NotImplementedError, RuntimeError):
+                # Windows loops have no add_signal_handler; Ctrl+C still raises KeyboardInterrupt
+                pass
+
+    # Linux: a pidfd becomes readable when the process exits
+    def _watch_pidfd(self):
+        if not hasattr(os, 'pidfd_open'):
+            return False
+        try:
+            self._pidfd = os.pidfd_open(self.parent_pid)
+        except ProcessLookupError:
+            self.parent_watch = 'gone'
+            self._parent_exited()
+            return True
+        self._loop.add_reader(self._pidfd, self._parent_exited)
+        self.parent_watch = 'pidfd'
+        return True
+
+    # Windows: the proactor waits on the process handle without a thread of ours
+    def _watch_process_handle(self):
+        if sys.platform != 'win32':
+            return False
+        proactor = getattr(self._loop, '_proactor', None)
+        if proactor is None:
+            return False
+        import _winapi
+        synchronize = getattr(_winapi, 'SYNCHRONIZE', 0x00100000)
+        try:
+            self._process_handle = _winapi.OpenProcess(synchronize, False, self.parent_pid)
+        except OSError:
+            self.parent_watch = 'gone'
+            self._parent_exited()
+            return True
+        self._handle_future = proactor.wait_for_handle(self._process_handle)
+        self._handle_future.add_done_callback(
+            lambda future: None if future.cancelled() else self._parent_exited()
+        )
+        self.parent_watch = 'process handle'
+        return True
+
+    # Fallback: poll from a coroutine
+    def _watch_polling(self):
+        self._task = asyncio.create_task(self._poll_parent())
+        self.parent_watch = f"polling every {self.poll_interval}s"
+        return True
+
+    async def _poll_parent(self):
+        import psutil
+        try:
+            parent_process = psutil.Process(self.parent_pid)
+        except psutil.NoSuchProcess:
+            self._parent_exited()
+            return
+        while not self.shutting_down:
+            await asyncio.sleep(self.poll_interval)
+            if not parent_process.is_running():
+                self._parent_exited()
+                return
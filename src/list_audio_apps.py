@@ -1,84 +1,57 @@
 #!/usr/bin/env python3
 """
-Utility script to list all applications currently playing audio
+Utility script to list applications that can play audio
+
+Prints one JSON object per line (NDJSON) as each app is found, so a slow process
+scan does not hold back the apps that have audio sessions. With --watch the scan
+repeats every interval and only changes are printed, as {"event": ..., "app": ...}.
+The entries are the ones the server sends in its audio_apps_list reply.
+
+    python list_audio_apps.py
+    python list_audio_apps.py --watch 2
+    python list_audio_apps.py --json        # one sorted {"success": true, "apps": [...]} document
 """
+import argparse
 import json
 import sys
-from pycaw.pycaw import AudioUtilities
-import comtypes
-import psutil
+import time
+
+from audio_backend import create_backend
+from session_inspector import SessionInspector, app_id, sort_apps, watch_changes
+
+
+def emit(record):
+    print(json.dumps(record), flush=True)
 
-def get_audio_applications():
-    """Get list of applications currently playing audio"""
-    comtypes.CoInitialize()
+
+def main(args):
+    backend = create_backend(args.backend)
+    backend.initialize_thread()
     try:
-        sessions = AudioUtilities.GetAllSessions()
-        audio_apps = []
-        seen_processes = set()
-        
-        # List of processes to ignore
-        ignored_processes = [
-            'audiodg.exe', 
-            'System', 
-            'svchost.exe',
-            'Adobe Premiere Pro.exe',
-            'AfterFX.exe',
-            'Photoshop.exe'
-        ]
-        
-        # Priority apps (will be sorted first)
-        priority_apps = [
-            'Spotify.exe',
-            'chrome.exe',
-            'firefox.exe',
-            'msedge.exe',
-            'brave.exe',
-            'opera.exe',
-            'Discord.exe',
-            'Deezer.exe',
-            'iTunes.exe',
-            'vlc.exe',
-            'AIMP.exe',
-            'foobar2000.exe'
-        ]
-        
-        for session in sessions:
-            if session.Process and session.Process.name():
-                process_name = session.Process.name()
-                
-                # Skip ignored processes and duplicates
-                if process_name not in seen_processes and process_name not in ignored_processes:
-                    try:
-                        # Get process info
-                        process = psutil.Process(session.Process.pid)
-                        
-                        # Determine priority
-                        is_priority = process_name in priority_apps
-                        
-                        audio_apps.append({
-                            'name': process_name,
-                            'exe': process_name,
-                            'fullPath': process.exe() if hasattr(process, 'exe') else '',
-                            'pid': session.Process.pid,
-                            'priority': is_priority
-                        })
-                        seen_processes.add(process_name)
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        pass
-        
-        # Sort: priority apps first, then alphabetically
-        audio_apps.sort(key=lambda x: (not x['priority'], x['name'].lower()))
-        
-        return audio_apps
+        inspector = SessionInspector(backend)
+        if args.watch:
+            for event, app in watch_changes(inspector.iter_apps, app_id, args.watch):
+                emit({'event': event, 'time': round(time.time(), 3), 'app': app})
+        elif args.json:
+            emit({'success': True, 'apps': sort_apps(list(inspector.iter_apps()))})
+        else:
+            for app in inspector.iter_apps():
+                emit(app)
     finally:
-        comtypes.CoUninitialize()
+        backend.uninitialize_thread()
+
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="List applications that can play audio")
+    parser.add_argument('--watch', type=float, metavar='SECONDS', help="rescan every SECONDS and print only changes")
+    parser.add_argument('--json', action='store_true', help="print a single sorted JSON document instead of NDJSON")
+    parser.add_argument('--backend', help="audio backend (default: AUDIOSTOP_BACKEND or pycaw)")
+    args = parser.parse_args()
+
     try:
-        apps = get_audio_applications()
-        # Output as JSON
-        print(json.dumps({'success': True, 'apps': apps}))
+        main(args)
+    except KeyboardInterrupt:
+        pass
     except Exception as e:
-        print(json.dumps({'success': False, 'error': str(e)}))
+        emit({'success': False, 'error': str(e)})
         sys.exit(1)
-
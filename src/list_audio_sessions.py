@@ -1,73 +1,101 @@
 """
 Utility script to list all audio sessions
 Useful for finding process names to add to the config
+
+Prints one JSON object per line (NDJSON) per session as it is read. With --watch
+the sessions are rescanned every interval and only changes are printed (new and
+ended sessions, volume and mute changes); process info is cached between scans.
+--text prints the readable listing instead.
+
+    python list_audio_sessions.py
+    python list_audio_sessions.py --watch 1
+    python list_audio_sessions.py --text
 """
 
+import argparse
+import json
 import sys
 import os
+import time
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from pycaw.pycaw import AudioUtilities
-import comtypes
+from audio_backend import create_backend
+from session_inspector import SessionInspector, session_id, watch_changes
+
+
+def emit(record):
+    print(json.dumps(record), flush=True)
+
 
-def list_audio_sessions():
-    """List all active audio sessions"""
+def print_sessions(inspector):
+    """Readable listing, printed session by session"""
     print("=" * 60)
     print("AudioStop - Liste des Sessions Audio Actives")
     print("=" * 60)
     print()
-    
-    comtypes.CoInitialize()
+
+    count = 0
     try:
-        sessions = AudioUtilities.GetAllSessions()
-        
-        active_sessions = []
-        for session in sessions:
-            if session.Process:
-                volume = session.SimpleAudioVolume
-                current_volume = volume.GetMasterVolume()
-                is_muted = volume.GetMute()
-                
-                active_sessions.append({
-                    'name': session.Process.name(),
-                    'pid': session.Process.pid,
-                    'volume': current_volume,
-                    'muted': is_muted
-                })
-        
-        if not active_sessions:
+        for count, session in enumerate(inspector.iter_sessions(), 1):
+            print(f"{count}. {session['name']}")
+            print(f"   PID:    {session['pid']}")
+            print(f"   Volume: {session['volume']:.0%}")
+            print(f"   Muted:  {'Oui' if session['muted'] else 'Non'}")
+            print(flush=True)
+
+        if not count:
             print("Aucune session audio active trouvée.")
             print()
             print("Astuce: Lancez une application avec du son")
             print("        (ex: Chrome, Spotify, YouTube)")
         else:
-            print(f"Trouvé {len(active_sessions)} session(s) audio:\n")
-            
-            for i, session in enumerate(active_sessions, 1):
-                print(f"{i}. {session['name']}")
-                print(f"   PID:    {session['pid']}")
-                print(f"   Volume: {session['volume']:.0%}")
-                print(f"   Muted:  {'Oui' if session['muted'] else 'Non'}")
-                print()
-            
             print("-" * 60)
             print("\nPour ajouter une application à AudioStop:")
             print("1. Copiez le nom du processus (ex: chrome.exe)")
             print("2. Faites un clic droit sur l'icône système tray")
             print("3. Sélectionnez 'Edit muted applications'")
             print("4. Ajoutez le nom du processus")
-            
+
     except Exception as e:
         print(f"Erreur: {e}")
-    finally:
-        comtypes.CoUninitialize()
-    
+
     print()
     print("=" * 60)
 
+
+def list_audio_sessions(args):
+    backend = create_backend(args.backend)
+    backend.initialize_thread()
+    try:
+        inspector = SessionInspector(backend)
+        if args.text:
+            print_sessions(inspector)
+        elif args.watch:
+            for event, session in watch_changes(inspector.iter_sessions, session_id, args.watch):
+                emit({'event': event, 'time': round(time.time(), 3), 'session': session})
+        else:
+            for session in inspector.iter_sessions():
+                emit(session)
+    finally:
+        backend.uninitialize_thread()
+
+
 if __name__ == "__main__":
-    list_audio_sessions()
-    input("\nAppuyez sur Entrée pour fermer...")
+    parser = argparse.ArgumentParser(description="List audio sessions")
+    parser.add_argument('--watch', type=float, metavar='SECONDS', help="rescan every SECONDS and print only changes")
+    parser.add_argument('--text', action='store_true', help="print a readable listing and wait for Enter")
+    parser.add_argument('--backend', help="audio backend (default: AUDIOSTOP_BACKEND or pycaw)")
+    args = parser.parse_args()
+
+    try:
+        list_audio_sessions(args)
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        emit({'success': False, 'error': str(e)})
+        sys.exit(1)
 
+    if args.text:
+        input("\nAppuyez sur Entrée pour fermer...")
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+WebSocket load generator and latency benchmark for the audio control server
+
+Starts the server against the simulated audio backend and drives it over real
+WebSocket connections with scripted workloads. For every message type it reports
+end-to-end latency (send until the matching reply arrives) and throughput, and
+saves the results as JSON so runs can be compared across versions.
+
+Workloads:
+    toggle    rapid mute/unmute from one client (latency until mute_state)
+    apps      concurrent get_audio_apps from several clients
+    config    update_config spam interleaved with get_config
+    playhead  a stream of playhead samples (fire-and-forget: throughput only)
+    mixed     all of the above at the same time
+
+    python load_benchmark.py --workload mixed --iterations 500 --output results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from metrics import LatencyHistogram
+from startup_benchmark import connect_when_listening, server_command
+
+WORKLOADS = ('toggle', 'apps', 'config', 'playhead', 'mixed')
+
+
+class LoadRecorder:
+    """Latency samples and message counts per message type"""
+
+    def __init__(self):
+        self.histograms = {}
+        self.sent = {}
+
+    def sent_one(self, name):
+        self.sent[name] = self.sent.get(name, 0) + 1
+
+    def record(self, name, seconds):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram(window=None)
+        histogram.record(seconds)
+
+    def report(self, duration):
+        messages = {}
+        for name, count in sorted(self.sent.items()):
+            entry = {'sent': count, 'throughput_per_s': round(count / duration, 1) if duration else None}
+            if name in self.histograms:
+                entry.update(self.histograms[name].summary())
+            messages[name] = entry
+        return {'duration_s': round(duration, 3), 'messages': messages}
+
+
+async def request(websocket, recorder, name, payload, reply_type, timeout):
+    """Send payload and time it until a reply of reply_type arrives (other traffic is skipped)"""
+    started = time.perf_counter()
+    recorder.sent_one(name)
+    await websocket.send(payload)
+    deadline = started + timeout
+    while True:
+        message = json.loads(await asyncio.wait_for(websocket.recv(), max(deadline - time.perf_counter(), 0.001)))
+        if message.get('type') == reply_type:
+            break
+    recorder.record(name, time.perf_counter() - started)
+    return message
+
+
+async def toggle_workload(connect, recorder, iterations, args):
+    async with await connect() as websocket:
+        for i in range(iterations):
+            command = 'mute' if i % 2 == 0 else 'unmute'
+            await request(websocket, recorder, command, command, 'mute_state', args.timeout)
+        if iterations % 2:
+            await request(websocket, recorder, 'unmute', 'unmute', 'mute_state', args.timeout)
+
+
+async def apps_workload(connect, recorder, iterations, args):
+    async def client(count):
+        async with await connect() as websocket:
+            payload = json.dumps({'type': 'get_audio_apps'})
+            for _ in range(count):
+                await request(websocket, recorder, 'get_audio_apps', payload, 'audio_apps_list', args.timeout)
+
+    per_client = max(1, iterations // args.clients)
+    await asyncio.gather(*(client(per_client) for _ in range(args.clients)))
+
+
+async def config_workload(connect, recorder, iterations, args):
+    # One connection: update_config broadcasts config_data to every *other* client,
+    # which a second reader could not tell apart from its own get_config reply
+    async with await connect() as websocket:
+        read = json.dumps({'type': 'get_config'})
+        for i in range(iterations):
+            write = json.dumps({'type': 'update_config', 'unmute_delay_seconds': 1.0 + (i % 10) / 10})
+            await request(websocket, recorder, 'update_config', write, 'config_updated', args.timeout)
+            await request(websocket, recorder, 'get_config', read, 'config_data', args.timeout)
+
+
+async def playhead_workload(connect, recorder, iterations, args):
+    async with await connect() as websocket:
+        started = time.time()
+        for i in range(iterations):
+            # A steady 1x playback stream, one sample per message like background.js
+            timestamp = started + i * 0.1
+            recorder.sent_one('playhead')
+            await websocket.send(json.dumps({'type': 'playhead', 'samples': [[timestamp, i * 0.1]]}))
+        # A reply to a later request means every sample has been handled (metrics_data is never broadcast)
+        await request(websocket, recorder, 'get_metrics', json.dumps({'type': 'get_metrics'}), 'metrics_data', args.timeout)
+
+
+async def mixed_workload(connect, recorder, iterations, args):
+    await asyncio.gather(
+        toggle_workload(connect, recorder, iterations, args),
+        apps_workload(connect, recorder, iterations, args),
+        config_workload(connect, recorder, iterations, args),
+        playhead_workload(connect, recorder, iterations, args)
+    )
+
+
+WORKLOAD_FUNCTIONS = {
+    'toggle': toggle_workload,
+    'apps': apps_workload,
+    'config': config_workload,
+    'playhead': playhead_workload,
+    'mixed': mixed_workload
+}
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_benchmark(args):
+    workloads = WORKLOADS[:-1] if args.workload == 'all' else (args.workload,)
+    results = {
+        'revision': git_revision(),
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'settings': {
+            'iterations': args.iterations,
+            'clients': args.clients,
+            'sim_sessions': args.sim_sessions,
+            'sim_latency_ms': args.sim_latency_ms
+        },
+        'workloads': {}
+    }
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        env = dict(
+            os.environ,
+            AUDIOSTOP_BACKEND='simulated',
+            AUDIOSTOP_CONFIG_DIR=config_dir,
+            AUDIOSTOP_SIM_SESSIONS=str(args.sim_sessions),
+            AUDIOSTOP_SIM_LATENCY_MS=str(args.sim_latency_ms)
+        )
+        process = subprocess.Popen(
+            server_command(args.server), env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            control = await connect_when_listening(process, time.perf_counter() + args.timeout)
+
+            async def connect():
+                return await connect_when_listening(process, time.perf_counter() + args.timeout)
+
+            async with control:
+                for name in workloads:
+                    recorder = LoadRecorder()
+                    started = time.perf_counter()
+                    await WORKLOAD_FUNCTIONS[name](connect, recorder, args.iterations, args)
+                    results['workloads'][name] = recorder.report(time.perf_counter() - started)
+
+                reply = await request(
+                    control, LoadRecorder(), 'get_metrics', json.dumps({'type': 'get_metrics'}), 'metrics_data', args.timeout
+                )
+                results['server_metrics'] = reply.get('metrics')
+                await control.send('shutdown')
+            process.wait(args.timeout)
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Drive the audio control server with WebSocket workloads")
+    parser.add_argument('--workload', choices=WORKLOADS + ('all',), default='all', help="workload to run (default: each in turn except mixed)")
+    parser.add_argument('--iterations', type=int, default=200, help="messages per workload stream")
+    parser.add_argument('--clients', type=int, default=4, help="concurrent clients for the apps workload")
+    parser.add_argument('--sim-sessions', type=int, default=8, help="AUDIOSTOP_SIM_SESSIONS for the server")
+    parser.add_argument('--sim-latency-ms', type=float, default=0.0, help="AUDIOSTOP_SIM_LATENCY_MS for the server")
+    parser.add_argument('--server', help="server executable (default: run audio_control_server.py with this Python)")
+    parser.add_argument('--timeout', type=float, default=30.0, help="seconds to wait for the server and each reply")
+    parser.add_argument('--output', help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    try:
+        results = asyncio.run(run_benchmark(args))
+    except Exception as e:
+        print(json.dumps({'success': False, 'error': str(e)}))
+        sys.exit(1)
+
+    report = json.dumps(results, indent=4)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(report)
+    print(report)
@@ -0,0 +1,72 @@
+"""
+Queue-based logging pipeline
+
+Log calls on the event loop only build a LogRecord and put it on a queue; a
+background listener thread formats it and writes it to the console and to a
+rotating log file. The level comes from config.json and can be changed at runtime.
+"""
+import logging
+import logging.handlers
+import queue
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_DATE_FORMAT = '%H:%M:%S'
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+_listener = None
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves all formatting to the listener thread
+
+    The stock QueueHandler formats the message on the logging thread before
+    enqueueing it, which is exactly the work we want off the event loop.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def start_logging(level='INFO', log_file=None, max_bytes=1024 * 1024, backup_count=3):
+    """Route the root logger through a queue to console (and log_file) handlers"""
+    global _listener
+    stop_logging()
+
+    formatter = logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(DeferredQueueHandler(log_queue))
+    set_log_level(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def set_log_level(level):
+    """Change the root log level at runtime; returns the normalized level name"""
+    name = str(level).upper()
+    if name not in LOG_LEVELS:
+        raise ValueError(f"Unknown log level: {level}")
+    logging.getLogger().setLevel(name)
+    # Frame-level websockets logging is never worth its cost on the hot path
+    logging.getLogger('websockets').setLevel(max(logging.INFO, logging.getLevelName(name)))
+    return name
+
+
+def stop_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,138 @@
+"""
+Low-overhead latency histograms and counters for the hot path
+
+Recording a sample is an append to a bounded deque; percentiles are only computed
+when someone asks for them (get_metrics, or the dump written on shutdown).
+"""
+import collections
+import contextlib
+import json
+import threading
+import time
+
+
+class LatencyHistogram:
+    """Rolling window of recent samples plus lifetime count, total and max"""
+
+    def __init__(self, window=1024):
+        self._samples = collections.deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self._samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def summary(self):
+        """p50/p95/p99 over the rolling window, max/mean over the lifetime, all in ms"""
+        samples = sorted(self._samples)
+        if not samples:
+            return {'count': 0}
+
+        def percentile(p):
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 3)
+
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count * 1000, 3),
+            'p50_ms': percentile(0.50),
+            'p95_ms': percentile(0.95),
+            'p99_ms': percentile(0.99),
+            'max_ms': round(self.max * 1000, 3)
+        }
+
+
+class Metrics:
+    """Named latency histograms and counters, safe to record from any thread"""
+
+    def __init__(self, window=1024):
+        self.window = window
+        self.started = time.time()
+        self._histograms = {}
+        self._counters = collections.Counter()
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        """Add a latency sample (seconds) to histogram name"""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = LatencyHistogram(self.window)
+            histogram.record(seconds)
+
+    def increment(self, name, amount=1):
+        """Add amount to counter name"""
+        if amount:
+            with self._lock:
+                self._counters[name] += amount
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        """Record the duration of a with-block (works around awaits too)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def snapshot(self):
+        """Return all histograms and counters as a JSON-serialisable dict"""
+        with self._lock:
+            histograms = {name: histogram.summary() for name, histogram in sorted(self._histograms.items())}
+            counters = dict(sorted(self._counters.items()))
+        return {
+            'uptime_seconds': round(time.time() - self.started, 1),
+            'latency': histograms,
+            'counters': counters
+        }
+
+    def dump(self, path):
+        """Write a snapshot to path as JSON"""
+        with open(path, 'w') as metrics_file:
+            json.dump(self.snapshot(), metrics_file, indent=4)
+
+
+class InstrumentedBackend:
+    """Wraps an AudioBackend and records every call as backend.<method>"""
+
+    INSTRUMENTED_CALLS = (
+        'enumerate_sessions',
+        'get_volume',
+        'set_volume',
+        'process_alive',
+        'list_pids',
+        'list_processes',
+        'process_create_time',
+        'process_info',
+        'watch_sessions'
+    )
+
+    def __init__(self, backend, metrics):
+        self._backend = backend
+        self._metrics = metrics
+        for name in self.INSTRUMENTED_CALLS:
+            setattr(self, name, self._instrument(name))
+
+    def _instrument(self, name):
+        backend = self._backend
+        metrics = self._metrics
+        metric_name = f"backend.{name}"
+
+        def call(*args):
+            started = time.perf_counter()
+            try:
+                # Looked up per call so a lazily built backend is not forced into existence here
+                return getattr(backend, name)(*args)
+            except Exception:
+                metrics.increment(f"errors.{metric_name}")
+                raise
+            finally:
+                metrics.record(metric_name, time.perf_counter() - started)
+        return call
+
+    def __getattr__(self, name):
+        return getattr(self._backend, name)
@@ -0,0 +1,98 @@
+"""
+Authoritative mute state with a coalescing command queue
+
+Commands only say which state is wanted. Requests that arrive before the worker
+gets to them collapse into the last one, so a burst of toggles costs at most one
+transition and a mute-then-unmute inside the same tick cancels out. A mute while
+already muted (same rules, session table current) returns without touching the
+backend; a mute during the unmute delay just cancels the pending unmute.
+"""
+import asyncio
+import logging
+
+UNMUTED = 'unmuted'
+MUTED = 'muted'
+UNMUTE_PENDING = 'unmute_pending'
+FADING = 'fading'
+
+
+class MuteController:
+    """Applies the latest requested mute/unmute, skipping transitions that change nothing
+
+    mute() performs a full mute; unmute(on_restoring) waits for the unmute delay and
+    calls on_restoring() right before it starts bringing volumes back;
+    mute_is_current() says whether the last full mute still covers every target.
+    """
+
+    def __init__(self, mute, unmute, mute_is_current, metrics=None):
+        self.state = UNMUTED
+        self._mute = mute
+        self._unmute = unmute
+        self._mute_is_current = mute_is_current
+        self._metrics = metrics
+        self._desired = None
+        self._worker = None
+        self._unmute_task = None
+
+    def _count(self, name):
+        if self._metrics is not None:
+            self._metrics.increment(f"mute_queue.{name}")
+
+    async def request(self, command):
+        """Ask for 'mute' or 'unmute'; returns once the queue has applied the latest request"""
+        if command not in ('mute', 'unmute'):
+            raise ValueError(f"Unknown mute command: {command}")
+        if self._desired is not None:
+            self._count('coalesced')
+        self._desired = command
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._drain())
+        # Shielded: a caller going away must not stop the transition for everyone else
+        await asyncio.shield(self._worker)
+
+    async def _drain(self):
+        # Let every command that arrives in this tick land before deciding
+        await asyncio.sleep(0)
+        while self._desired is not None:
+            command, self._desired = self._desired, None
+            try:
+                if command == 'mute':
+                    await self._apply_mute()
+                else:
+                    self._apply_unmute()
+            except Exception as e:
+                logging.error(f"Failed to apply {command}: {e}")
+
+    async def _apply_mute(self):
+        if self._unmute_task is not None and not self._unmute_task.done():
+            self._unmute_task.cancel()
+            self._unmute_task = None
+            if self.state == UNMUTE_PENDING:
+                # Nothing was restored yet: everything we muted is still silent
+                self.state = MUTED
+        if self.state == MUTED and self._mute_is_current():
+            self._count('skipped')
+            logging.debug("Already muted, nothing to do")
+            return
+        await self._mute()
+        self.state = MUTED
+
+    def _apply_unmute(self):
+        if self.state != MUTED:
+            self._count('skipped')
+            return
+        self.state = UNMUTE_PENDING
+        self._unmute_task = asyncio.create_task(self._run_unmute())
+
+    async def _run_unmute(self):
+        task = asyncio.current_task()
+        try:
+            await self._unmute(self._on_restoring)
+        finally:
+            # A mute that cancelled us has already set the state
+            if self._unmute_task is task:
+                self._unmute_task = None
+                self.state = UNMUTED
+
+    def _on_restoring(self):
+        self.state = FADING
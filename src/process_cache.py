@@ -0,0 +1,130 @@
+"""
+Bounded process metadata cache
+
+Entries are keyed by (pid, create_time) so a recycled pid never returns another
+process's name or path. Scans are incremental: the backend lists every process
+with its start time in one cheap pass, and only (pid, create_time) pairs that
+are not cached yet are looked up. The cache grows to hold every live process,
+so a busy machine does not evict and re-look-up its own processes on each scan.
+"""
+import collections
+import threading
+
+
+class ProcessInfo:
+    """Name, executable path and start time of one process"""
+
+    __slots__ = ('pid', 'name', 'exe', 'create_time')
+
+    def __init__(self, pid, name, exe, create_time):
+        self.pid = pid
+        self.name = name
+        self.exe = exe
+        self.create_time = create_time
+
+    @property
+    def key(self):
+        return (self.pid, self.create_time)
+
+
+class ProcessInfoCache:
+    """LRU cache of ProcessInfo keyed by (pid, create_time)"""
+
+    def __init__(self, backend, max_entries=1024):
+        self.backend = backend
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._capacity = max_entries
+        self._entries = collections.OrderedDict()
+        self._by_pid = {}
+        self._lock = threading.Lock()
+
+    def _store(self, info):
+        with self._lock:
+            old_key = self._by_pid.get(info.pid)
+            if old_key is not None and old_key != info.key:
+                self._entries.pop(old_key, None)
+            self._entries[info.key] = info
+            self._entries.move_to_end(info.key)
+            self._by_pid[info.pid] = info.key
+            while len(self._entries) > self._capacity:
+                evicted, _ = self._entries.popitem(last=False)
+                if self._by_pid.get(evicted[0]) == evicted:
+                    del self._by_pid[evicted[0]]
+
+    def _forget(self, pid):
+        with self._lock:
+            key = self._by_pid.pop(pid, None)
+            if key is not None:
+                self._entries.pop(key, None)
+
+    def _lookup(self, pid):
+        fields = self.backend.process_info(pid)
+        if fields is None:
+            self._forget(pid)
+            return None
+        info = ProcessInfo(pid, *fields)
+        self._store(info)
+        return info
+
+    def _cached(self, key):
+        with self._lock:
+            info = self._entries.get(key)
+            if info is not None:
+                self._entries.move_to_end(key)
+            return info
+
+    def get(self, pid, validate=True):
+        """Return ProcessInfo for pid, or None if the process is gone
+
+        With validate, the cached entry is only used if the running process still
+        has the same create_time (one cheap call instead of a full lookup).
+        """
+        with self._lock:
+            key = self._by_pid.get(pid)
+            info = self._entries.get(key) if key is not None else None
+            if info is not None:
+                self._entries.move_to_end(key)
+
+        if info is not None and (not validate or self.backend.process_create_time(pid) == info.create_time):
+            self.hits += 1
+            return info
+
+        self.misses += 1
+        return self._lookup(pid)
+
+    def scan(self, should_stop=None):
+        """Return ProcessInfo for every running process, looking up only processes not cached yet
+
+        should_stop() is checked between lookups; when it returns True the scan
+        gives up and returns None (processes it did not reach are looked up next time).
+        """
+        listing = self.backend.list_processes()
+        live_pids = {pid for pid, _ in listing}
+        with self._lock:
+            # Room for every live process, so this scan never evicts what it just looked up
+            self._capacity = max(self.max_entries, len(listing) + 64)
+            gone_pids = self._by_pid.keys() - live_pids
+
+        for pid in gone_pids:
+            self._forget(pid)
+
+        results = []
+        for pid, create_time in listing:
+            if should_stop is not None and should_stop():
+                return None
+            # A recycled pid has a different create_time, so it misses and is looked up
+            info = self._cached((pid, create_time)) if create_time is not None else None
+            if info is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                info = self._lookup(pid)
+            if info is not None:
+                results.append(info)
+        return results
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,154 @@
+"""
+WebSocket command protocol: parsing, validation and dispatch
+
+Messages are either one of the bare legacy commands ('mute', 'unmute',
+'shutdown'), recognised by a set lookup before anything is parsed, or a JSON
+object with a 'type' tag and an optional protocol version 'v'. JSON commands are
+checked against the schema their handler was registered with, then dispatched
+through a table instead of an if-chain. Malformed or unknown messages get an
+'error' response instead of being silently dropped.
+
+Commands registered as slow (app enumeration) run as their own tasks with
+bounded concurrency, so a mute that arrives right after them is handled at once
+instead of waiting in the connection's message order. A command can name a slow
+command it supersedes; that client's pending runs of it are cancelled first, so
+an unsubscribe cannot be overtaken by the subscribe it was meant to undo.
+"""
+import asyncio
+import json
+import logging
+import time
+
+PROTOCOL_VERSION = 1
+BARE_COMMANDS = frozenset(('mute', 'unmute', 'shutdown'))
+
+# Returned by a handler to stop reading from the connection
+CLOSE = object()
+# Returned by dispatch for a slow command that was handed to its own task
+QUEUED = object()
+
+NUMBER = (int, float)
+
+
+class ProtocolError(Exception):
+    """A message that cannot be handled; code is sent back to the client"""
+
+    def __init__(self, code, message, command=None):
+        super().__init__(message)
+        self.code = code
+        self.command = command
+
+    def response(self):
+        response = {'type': 'error', 'v': PROTOCOL_VERSION, 'code': self.code, 'error': str(self)}
+        if self.command:
+            response['command'] = self.command
+        return response
+
+
+def _types(expected):
+    return expected if isinstance(expected, tuple) else (expected,)
+
+
+def _type_name(expected):
+    return ' or '.join(t.__name__ for t in _types(expected))
+
+
+def validate(command, data, schema):
+    """Check data against {field: (type or tuple of types, required)}; unknown fields pass"""
+    for field, (expected, required) in schema.items():
+        if field not in data:
+            if required:
+                raise ProtocolError('invalid_message', f"missing field '{field}'", command)
+            continue
+        value = data[field]
+        # bool is an int subclass, but true is not a valid delay or step count
+        if not isinstance(value, expected) or (isinstance(value, bool) and bool not in _types(expected)):
+            raise ProtocolError(
+                'invalid_message', f"field '{field}' must be {_type_name(expected)}", command
+            )
+
+
+class CommandDispatcher:
+    """Table of command handlers keyed by message type"""
+
+    def __init__(self, max_slow=2, metrics=None):
+        self._handlers = {}
+        self._slow_slots = asyncio.Semaphore(max_slow)
+        self._metrics = metrics
+
+    def command(self, name, schema=None, slow=False, cancels=None):
+        """Decorator: register handler(client, data) for messages of type name
+
+        slow handlers run in the background, at most max_slow at a time across all clients.
+        cancels names a slow command whose unfinished runs for the same client are
+        cancelled before this handler runs.
+        """
+        def register(handler):
+            self._handlers[name] = (handler, schema or {}, slow, cancels)
+            return handler
+        return register
+
+    @property
+    def commands(self):
+        return sorted(self._handlers)
+
+    def parse(self, message):
+        """Return (command name, data) for a raw message; raises ProtocolError"""
+        if message in BARE_COMMANDS:
+            return message, None
+        if not isinstance(message, str) or not message.startswith('{'):
+            raise ProtocolError('invalid_message', "expected a JSON object or a bare command")
+        try:
+            data = json.loads(message)
+        except ValueError as e:
+            raise ProtocolError('invalid_json', str(e))
+        if not isinstance(data, dict) or not isinstance(data.get('type'), str):
+            raise ProtocolError('invalid_message', "missing 'type'")
+
+        name = data['type']
+        version = data.get('v', PROTOCOL_VERSION)
+        if not isinstance(version, int) or version > PROTOCOL_VERSION:
+            raise ProtocolError('unsupported_version', f"protocol version {version!r} is not supported", name)
+        entry = self._handlers.get(name)
+        if entry is None:
+            raise ProtocolError('unknown_command', f"unknown command '{name}'", name)
+        validate(name, data, entry[1])
+        return name, data
+
+    async def dispatch(self, client, message):
+        """Parse and run one message; returns (command name, handler result)
+
+        Protocol errors, from parsing or raised by a handler, are answered with an
+        'error' message on the client's socket. Rejected messages are named 'invalid'
+        so clients cannot create arbitrary metric names.
+        """
+        name = 'invalid'
+        try:
+            name, data = self.parse(message)
+            handler, _, slow, cancels = self._handlers[name]
+            if cancels:
+                client.cancel_tasks(cancels)
+            if slow:
+                client.spawn(self._run_slow(client, name, handler, data), name)
+                return name, QUEUED
+            return name, await handler(client, data)
+        except ProtocolError as e:
+            await self._reject(client, e)
+            return name, None
+
+    async def _run_slow(self, client, name, handler, data):
+        started = time.perf_counter()
+        try:
+            async with self._slow_slots:
+                await handler(client, data)
+        except ProtocolError as e:
+            await self._reject(client, e)
+        except Exception as e:
+            logging.error(f"Error handling {name}: {e}")
+        finally:
+            if self._metrics is not None:
+                self._metrics.record(f"command.{name}", time.perf_counter() - started)
+
+    async def _reject(self, client, error):
+        logging.warning("Rejected message (%s): %s", error.code, error)
+        await client.websocket.send(json.dumps(error.response()))
@@ -0,0 +1,120 @@
+"""
+Opt-in trace of inbound commands and backend volume calls
+
+Set AUDIOSTOP_RECORD to a file path and the server appends one compact JSON line
+per event, with t = seconds on the monotonic clock since recording started:
+
+    {"k":"start","t":0.0,"wall":1760000000.0,"backend":"pycaw","config":{...}}
+    {"k":"open","t":0.41,"c":1}
+    {"k":"cmd","t":0.52,"c":1,"m":"mute"}
+    {"k":"sessions","t":0.52,"s":[[4120,"chrome.exe"],[5312,"Spotify.exe"]]}
+    {"k":"get","t":0.53,"pid":4120,"n":"chrome.exe","l":1.0,"d":0.0002}
+    {"k":"set","t":0.53,"pid":4120,"n":"chrome.exe","l":0.0,"d":0.0004}
+    {"k":"close","t":9.87,"c":1}
+
+d is how long the backend call took. The session list is only written when it
+changes. replay.py feeds such a trace back into a server and compares timings.
+"""
+import json
+import logging
+import threading
+import time
+
+
+class CommandRecorder:
+    """Append-only NDJSON event log, safe to write from any thread"""
+
+    FLUSH_INTERVAL = 1.0
+
+    def __init__(self, path):
+        self.path = path
+        self.started = time.monotonic()
+        self._file = open(path, 'a', encoding='utf-8', buffering=1 << 16)
+        self._lock = threading.Lock()
+        self._last_flush = self.started
+        self._sessions = None
+
+    def write(self, kind, **fields):
+        now = time.monotonic()
+        line = json.dumps({'k': kind, 't': round(now - self.started, 6), **fields}, separators=(',', ':'))
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line + '\n')
+            # Buffered, but never more than a second behind (a crash loses at most that)
+            if now - self._last_flush > self.FLUSH_INTERVAL:
+                self._file.flush()
+                self._last_flush = now
+
+    def start(self, backend, config):
+        self.write('start', wall=round(time.time(), 3), backend=backend, config=config)
+
+    def client_opened(self, client_id):
+        self.write('open', c=client_id)
+
+    def client_closed(self, client_id):
+        self.write('close', c=client_id)
+
+    def command(self, client_id, message):
+        if isinstance(message, bytes):
+            message = message.decode('utf-8', 'replace')
+        self.write('cmd', c=client_id, m=message)
+
+    def sessions(self, sessions):
+        listing = sorted((session.pid, session.name) for session in sessions)
+        if listing != self._sessions:
+            self._sessions = listing
+            self.write('sessions', s=listing)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class RecordingBackend:
+    """Wraps an AudioBackend and records enumerations and volume calls"""
+
+    def __init__(self, backend, recorder):
+        self._backend = backend
+        self._recorder = recorder
+
+    def enumerate_sessions(self, known=None):
+        sessions = self._backend.enumerate_sessions(known)
+        self._recorder.sessions(sessions)
+        return sessions
+
+    def get_volume(self, session):
+        started = time.perf_counter()
+        level = self._backend.get_volume(session)
+        self._recorder.write(
+            'get', pid=session.pid, n=session.name, l=round(level, 4), d=round(time.perf_counter() - started, 6)
+        )
+        return level
+
+    def set_volume(self, session, level):
+        started = time.perf_counter()
+        self._backend.set_volume(session, level)
+        self._recorder.write(
+            'set', pid=session.pid, n=session.name, l=round(level, 4), d=round(time.perf_counter() - started, 6)
+        )
+
+    def __getattr__(self, name):
+        # Looked up on the wrapped backend each time, so a lazy backend stays unloaded
+        return getattr(self._backend, name)
+
+
+def read_trace(path):
+    """Return the events of a trace file (a torn last line from a crash is skipped)"""
+    events = []
+    with open(path, encoding='utf-8') as trace_file:
+        for number, line in enumerate(trace_file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                logging.warning(f"Skipping malformed trace line {number}")
+    return events
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Replay a recorded command trace and report timing deviations
+
+Takes a trace written with AUDIOSTOP_RECORD (see recorder.py), starts the server
+against the simulated backend with the recorded config and session names, and
+sends the recorded commands again over one connection per recorded client. The
+replayed server records its own trace; the volume calls each command caused are
+then paired with the recorded ones (same command, same app) and their timings
+and final levels are compared.
+
+    realtime  commands are sent at their recorded offsets; deviation is measured on
+              the timeline since the first command
+    asap      commands are sent back to back; deviation is measured from the command
+              that caused the volume calls (bursts coalesce, so expect fewer of them)
+
+'shutdown' commands in the trace are not replayed. Sessions that appeared in the
+middle of the recording are not recreated.
+
+    python replay.py trace.ndjson
+    python replay.py trace.ndjson --speed asap --tolerance-ms 50 --output report.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from load_benchmark import git_revision
+from recorder import read_trace
+from startup_benchmark import connect_when_listening, server_command
+
+SPEEDS = ('realtime', 'asap')
+REPLAYED_EVENTS = ('open', 'cmd', 'close')
+
+
+def segments(events):
+    """Split a trace into server runs (each starts with a 'start' event)"""
+    runs = []
+    for event in events:
+        if event.get('k') == 'start' or not runs:
+            runs.append([])
+        runs[-1].append(event)
+    return runs
+
+
+def command_label(message):
+    """Message type of a recorded command ('mute', 'playhead', ...)"""
+    if not message.startswith('{'):
+        return message
+    try:
+        return json.loads(message).get('type', 'invalid')
+    except (ValueError, AttributeError):
+        return 'invalid'
+
+
+def volume_effects(events):
+    """Group a trace's set_volume calls by the command before them and the app they touched
+
+    Returns {(command index, app): effect}. Fade steps can be dropped under load,
+    so a whole group is compared rather than individual calls: its first and last
+    call ('first_ms'/'last_ms', since the first command on the 'timeline' or since
+    its own command), how many calls it made and the level it ended at.
+    """
+    effects = {}
+    first = None
+    last_command = None
+    index = -1
+    for event in events:
+        kind = event.get('k')
+        if kind == 'cmd':
+            if command_label(event['m']) == 'shutdown':
+                continue
+            index += 1
+            last_command = event
+            if first is None:
+                first = event['t']
+        elif kind == 'set' and first is not None:
+            timeline_ms = (event['t'] - first) * 1000
+            since_ms = (event['t'] - last_command['t']) * 1000
+            effect = effects.get((index, event['n']))
+            if effect is None:
+                effect = effects[(index, event['n'])] = {
+                    'command_index': index,
+                    'command': command_label(last_command['m']),
+                    'app': event['n'],
+                    'calls': 0,
+                    'timeline': {'first_ms': timeline_ms},
+                    'since_command': {'first_ms': since_ms}
+                }
+            effect['calls'] += 1
+            effect['level'] = event['l']
+            effect['timeline']['last_ms'] = timeline_ms
+            effect['since_command']['last_ms'] = since_ms
+    return effects
+
+
+def summarize(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return {
+        'min': round(ordered[0], 2),
+        'median': round(statistics.median(ordered), 2),
+        'p95': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+        'max': round(ordered[-1], 2)
+    }
+
+
+def compare(recorded, replayed, speed, tolerance_ms=None, worst=10):
+    """Pair the volume effects of two traces and report how far the replay drifted"""
+    basis = 'timeline' if speed == 'realtime' else 'since_command'
+    paired = []
+    level_mismatches = []
+    for key, effect in sorted(recorded.items()):
+        other = replayed.get(key)
+        if other is None:
+            continue
+        first = other[basis]['first_ms'] - effect[basis]['first_ms']
+        last = other[basis]['last_ms'] - effect[basis]['last_ms']
+        paired.append((first, last, effect, other))
+        if abs(other['level'] - effect['level']) > 0.001:
+            level_mismatches.append({
+                'command_index': effect['command_index'],
+                'app': effect['app'],
+                'recorded': effect['level'],
+                'replayed': other['level']
+            })
+
+    # The last call of a group is when the audio was fully silenced or fully back
+    paired.sort(key=lambda item: abs(item[1]), reverse=True)
+    report = {
+        'basis': basis,
+        'effects': {
+            'recorded': len(recorded),
+            'replayed': len(replayed),
+            'paired': len(paired),
+            'missing_in_replay': len(recorded.keys() - replayed.keys()),
+            'extra_in_replay': len(replayed.keys() - recorded.keys())
+        },
+        'volume_calls': {
+            'recorded': sum(effect['calls'] for effect in recorded.values()),
+            'replayed': sum(effect['calls'] for effect in replayed.values())
+        },
+        'first_call_deviation_ms': summarize([item[0] for item in paired]),
+        'last_call_deviation_ms': summarize([item[1] for item in paired]),
+        'level_mismatches': level_mismatches,
+        'worst': [
+            {
+                'command_index': effect['command_index'],
+                'command': effect['command'],
+                'app': effect['app'],
+                'level': effect['level'],
+                'recorded_last_ms': round(effect[basis]['last_ms'], 2),
+                'replayed_last_ms': round(other[basis]['last_ms'], 2),
+                'first_deviation_ms': round(first, 2),
+                'last_deviation_ms': round(last, 2)
+            }
+            for first, last, effect, other in paired[:worst]
+        ]
+    }
+    if tolerance_ms is not None:
+        report['tolerance_ms'] = tolerance_ms
+        report['over_tolerance'] = sum(
+            1 for first, last, _, _ in paired if max(abs(first), abs(last)) > tolerance_ms
+        )
+    return report
+
+
+def recorded_latency_ms(events):
+    """Median recorded set_volume duration, used as the simulated backend's latency"""
+    durations = [event['d'] for event in events if event.get('k') == 'set' and 'd' in event]
+    return round(statistics.median(durations) * 1000, 3) if durations else 0.0
+
+
+async def drain(websocket):
+    # Broadcasts must be read, or the server's sends would block on a full socket
+    try:
+        async for _ in websocket:
+            pass
+    except Exception:
+        pass
+
+
+async def feed(process, timeline, speed, timeout):
+    """Send the recorded open/cmd/close events; returns how many commands were sent"""
+    connections = {}
+    readers = []
+    sent = 0
+    started = time.perf_counter()
+    origin = timeline[0]['t'] if timeline else 0.0
+
+    async def connection(client_id):
+        websocket = connections.get(client_id)
+        if websocket is None:
+            websocket = connections[client_id] = await connect_when_listening(process, time.perf_counter() + timeout)
+            readers.append(asyncio.create_task(drain(websocket)))
+        return websocket
+
+    try:
+        for event in timeline:
+            if speed == 'realtime':
+                delay = started + (event['t'] - origin) - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            kind = event['k']
+            if kind == 'open':
+                await connection(event['c'])
+            elif kind == 'close':
+                websocket = connections.pop(event['c'], None)
+                if websocket is not None:
+                    await websocket.close()
+            elif command_label(event['m']) != 'shutdown':
+                await (await connection(event['c'])).send(event['m'])
+                sent += 1
+    finally:
+        for websocket in connections.values():
+            await websocket.close()
+        for reader in readers:
+            reader.cancel()
+    return sent
+
+
+def settle_seconds(events):
+    """How long the recorded server kept adjusting volumes after the last command"""
+    last_command = max((event['t'] for event in events if event.get('k') == 'cmd'), default=0.0)
+    last_set = max((event['t'] for event in events if event.get('k') == 'set'), default=0.0)
+    return max(0.0, last_set - last_command)
+
+
+async def run_replay(args):
+    runs = segments(read_trace(args.trace))
+    if not runs:
+        raise RuntimeError("trace is empty")
+    events = runs[args.segment]
+    header = events[0] if events[0].get('k') == 'start' else {}
+    sessions = next((event['s'] for event in events if event.get('k') == 'sessions'), [])
+    timeline = [event for event in events if event.get('k') in REPLAYED_EVENTS]
+    latency_ms = recorded_latency_ms(events) if args.sim_latency_ms is None else args.sim_latency_ms
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        config = dict(header.get('config') or {})
+        config.pop('metrics_file', None)
+        with open(os.path.join(config_dir, 'config.json'), 'w') as config_file:
+            json.dump(config, config_file)
+        replay_trace = os.path.join(config_dir, 'replay.ndjson')
+
+        env = dict(
+            os.environ,
+            AUDIOSTOP_BACKEND='simulated',
+            AUDIOSTOP_CONFIG_DIR=config_dir,
+            AUDIOSTOP_SIM_LATENCY_MS=str(latency_ms),
+            AUDIOSTOP_RECORD=replay_trace
+        )
+        if sessions:
+            env['AUDIOSTOP_SIM_NAMES'] = ','.join(name for _, name in sessions)
+            env['AUDIOSTOP_SIM_SESSIONS'] = str(len(sessions))
+        process = subprocess.Popen(
+            server_command(args.server), env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            async with await connect_when_listening(process, time.perf_counter() + args.timeout) as control:
+                # Commands sent before warm-up would measure startup, not the trace
+                deadline = time.perf_counter() + args.timeout
+                while json.loads(await asyncio.wait_for(control.recv(), max(deadline - time.perf_counter(), 0.001))).get('type') != 'ready':
+                    pass
+                reader = asyncio.create_task(drain(control))
+
+                started = time.perf_counter()
+                sent = await feed(process, timeline, args.speed, args.timeout)
+                fed_seconds = time.perf_counter() - started
+                # Let pending unmute delays and fades finish as they did in the recording
+                await asyncio.sleep(settle_seconds(events) + args.settle)
+
+                reader.cancel()
+                await control.send('shutdown')
+            process.wait(args.timeout)
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+        replayed_runs = segments(read_trace(replay_trace))
+        replayed = replayed_runs[-1] if replayed_runs else []
+
+    report = {
+        'trace': args.trace,
+        'revision': git_revision(),
+        'speed': args.speed,
+        'segment': args.segment,
+        'recorded_backend': header.get('backend'),
+        'sessions': len(sessions),
+        'sim_latency_ms': latency_ms,
+        'commands': sent,
+        'feed_seconds': round(fed_seconds, 3),
+        'recorded_seconds': round(timeline[-1]['t'] - timeline[0]['t'], 3) if timeline else 0.0
+    }
+    report.update(compare(volume_effects(events), volume_effects(replayed), args.speed, args.tolerance_ms))
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay a recorded AudioStop trace and report timing deviations")
+    parser.add_argument('trace', help="trace file written with AUDIOSTOP_RECORD")
+    parser.add_argument('--speed', choices=SPEEDS, default='realtime', help="send commands at recorded offsets or back to back")
+    parser.add_argument('--segment', type=int, default=-1, help="server run within the trace to replay (default: the last)")
+    parser.add_argument('--sim-latency-ms', type=float, help="simulated backend latency (default: median recorded set_volume time)")
+    parser.add_argument('--settle', type=float, default=1.0, help="extra seconds to wait for fades after the last command")
+    parser.add_argument('--tolerance-ms', type=float, help="exit with status 2 if any command's volume calls deviate by more than this")
+    parser.add_argument('--server', help="server executable (default: run audio_control_server.py with this Python)")
+    parser.add_argument('--timeout', type=float, default=30.0, help="seconds to wait for the server")
+    parser.add_argument('--output', help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    try:
+        report = asyncio.run(run_replay(args))
+    except Exception as e:
+        print(json.dumps({'success': False, 'error': str(e)}))
+        sys.exit(1)
+
+    output = json.dumps(report, indent=4)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output)
+    print(output)
+    if report.get('over_tolerance'):
+        sys.exit(2)
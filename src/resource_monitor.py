@@ -0,0 +1,220 @@
+"""
+Resource watchdog for long-running sessions
+
+The server lives as long as Premiere does, often ten hours or more, so a leak of
+a few COM wrappers per enumeration adds up. ResourceMonitor samples RSS, native
+thread count, handle count (file descriptors off Windows) and live objects by
+type at an interval, compares each sample with the baseline taken after warm-up,
+and logs a warning each time a figure grows past another multiple of its
+threshold. tracemalloc snapshots can be taken and diffed on demand
+(memory_snapshot messages) to find the allocation site of whatever is growing.
+"""
+import asyncio
+import collections
+import gc
+import logging
+import os
+import threading
+import time
+import tracemalloc
+
+# Default growth over the baseline before a warning is logged
+DEFAULT_THRESHOLDS = {
+    'rss_mb': 100.0,
+    'threads': 20,
+    'handles': 500,
+    'objects': 100000
+}
+
+
+def count_objects():
+    """Live gc-tracked objects by type name"""
+    return collections.Counter(type(obj).__name__ for obj in gc.get_objects())
+
+
+class ResourceSample:
+    """One reading of the process's resource usage"""
+
+    __slots__ = ('time', 'rss_mb', 'threads', 'python_threads', 'handles', 'objects', 'types')
+
+    def __init__(self, rss_mb, threads, handles, types):
+        self.time = time.time()
+        self.rss_mb = rss_mb
+        self.threads = threads
+        self.python_threads = threading.active_count()
+        self.handles = handles
+        self.types = types
+        self.objects = sum(types.values())
+
+    def to_dict(self):
+        return {
+            'time': round(self.time, 3),
+            'rss_mb': self.rss_mb,
+            'threads': self.threads,
+            'python_threads': self.python_threads,
+            'handles': self.handles,
+            'objects': self.objects
+        }
+
+
+class ResourceMonitor:
+    """Samples resource usage on an interval and warns about sustained growth"""
+
+    def __init__(self, interval=60.0, thresholds=None, history=60, top_types=15, metrics=None):
+        self.interval = interval
+        self.thresholds = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+        self.top_types = top_types
+        self.baseline = None
+        self.latest = None
+        self.history = collections.deque(maxlen=history)
+        self._metrics = metrics
+        self._warned = {}
+        self._trace_baseline = None
+        self._task = None
+        self._process = None
+
+    def _handles(self):
+        if hasattr(self._process, 'num_handles'):
+            return self._process.num_handles()
+        return self._process.num_fds()
+
+    def sample(self):
+        """Take a reading (walks every tracked object, so run it off the event loop)"""
+        if self._process is None:
+            # Imported here rather than at startup, which is kept free of heavy imports
+            try:
+                import psutil
+                self._process = psutil.Process(os.getpid())
+            except ImportError:
+                self._process = False
+        if self._process:
+            with self._process.oneshot():
+                rss_mb = round(self._process.memory_info().rss / (1024 * 1024), 1)
+                threads = self._process.num_threads()
+                handles = self._handles()
+        else:
+            rss_mb, threads, handles = None, threading.active_count(), None
+        return ResourceSample(rss_mb, threads, handles, count_objects())
+
+    def start(self):
+        """Take the baseline and start sampling (interval <= 0 disables the monitor)"""
+        if self.interval <= 0 or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.check()
+            except Exception as e:
+                logging.debug(f"Resource sample failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def check(self):
+        """Take a sample, compare it with the baseline and warn about growth"""
+        started = time.perf_counter()
+        sample = await asyncio.to_thread(self.sample)
+        if self._metrics is not None:
+            self._metrics.record('resources.sample', time.perf_counter() - started)
+        self.latest = sample
+        self.history.append(sample.to_dict())
+        if self.baseline is None:
+            self.baseline = sample
+            logging.info(
+                "Resource baseline: %s MB RSS, %d threads, %s handles, %d objects",
+                sample.rss_mb, sample.threads, sample.handles, sample.objects
+            )
+            return sample
+
+        for name, growth in self.growth().items():
+            threshold = self.thresholds.get(name)
+            if growth is None or not threshold:
+                continue
+            # Warn again only when growth passes the next multiple of the threshold
+            level = int(growth // threshold)
+            if level > self._warned.get(name, 0):
+                self._warned[name] = level
+                logging.warning(
+                    "Resource growth: %s up %s since start (threshold %s); fastest-growing types: %s",
+                    name, growth, threshold,
+                    ', '.join(f"{type_name} +{count}" for type_name, count in self.type_growth(5))
+                )
+        return sample
+
+    def growth(self):
+        """Change of each figure from the baseline to the latest sample"""
+        if self.baseline is None or self.latest is None:
+            return {}
+        growth = {}
+        for name in ('rss_mb', 'threads', 'handles', 'objects'):
+            before, after = getattr(self.baseline, name), getattr(self.latest, name)
+            growth[name] = None if before is None or after is None else round(after - before, 1)
+        return growth
+
+    def type_growth(self, limit=None):
+        """[(type name, added objects)] for the types that grew most since the baseline"""
+        if self.baseline is None or self.latest is None:
+            return []
+        delta = self.latest.types - self.baseline.types
+        return delta.most_common(limit or self.top_types)
+
+    def report(self):
+        """Baseline, latest sample, growth and recent history as a JSON-serialisable dict"""
+        return {
+            'interval_seconds': self.interval,
+            'thresholds': self.thresholds,
+            'baseline': self.baseline.to_dict() if self.baseline else None,
+            'latest': self.latest.to_dict() if self.latest else None,
+            'growth': self.growth(),
+            'type_growth': dict(self.type_growth()),
+            'top_types': dict(self.latest.types.most_common(self.top_types)) if self.latest else {},
+            'history': list(self.history),
+            'tracing': tracemalloc.is_tracing()
+        }
+
+    # tracemalloc: start once (it slows allocation down), then diff against the first snapshot
+    def start_tracing(self, frames=1):
+        """Start tracemalloc and take the snapshot later diffs compare against"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self._trace_baseline = self._take_snapshot()
+        return self._trace_stats()
+
+    @staticmethod
+    def _take_snapshot():
+        # tracemalloc's own bookkeeping and the import machinery are noise in a diff
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>')
+        ))
+
+    def stop_tracing(self):
+        self._trace_baseline = None
+        tracemalloc.stop()
+
+    def trace_diff(self, limit=20, key_type='lineno', reset=False):
+        """Top allocation sites by growth since start_tracing (or the last reset)"""
+        if not tracemalloc.is_tracing() or self._trace_baseline is None:
+            raise RuntimeError("tracing is not started")
+        snapshot = self._take_snapshot()
+        stats = snapshot.compare_to(self._trace_baseline, key_type)
+        if reset:
+            self._trace_baseline = snapshot
+        return dict(self._trace_stats(), top=[
+            {
+                'site': str(stat.traceback),
+                'size_diff_kb': round(stat.size_diff / 1024, 1),
+                'size_kb': round(stat.size / 1024, 1),
+                'count_diff': stat.count_diff
+            }
+            for stat in stats[:limit]
+        ])
+
+    def _trace_stats(self):
+        current, peak = tracemalloc.get_traced_memory()
+        return {'traced_kb': round(current / 1024, 1), 'peak_kb': round(peak / 1024, 1)}
@@ -0,0 +1,190 @@
+"""
+Per-application mute rules compiled into a fast matcher
+
+Rules come from the 'rules' config key; the legacy 'target_processes' list is
+turned into exact-name rules after them. A RuleSet is compiled once per config
+change: exact names go into a dict, glob/regex/path patterns are precompiled,
+and every (name, exe) answer is memoized, so matching a session is a dict hit
+after the first time its process name is seen.
+
+    {"match": "Spotify.exe", "action": "duck", "duck_percent": 20}
+    {"match": "*.exe", "kind": "glob", "unmute_delay_seconds": 1.0}
+    {"match": "^(chrome|msedge)\\.exe$", "kind": "regex", "fade": {"duration_seconds": 1.0, "curve": "equal_power"}}
+    {"match": "C:/Games/*", "kind": "path"}
+
+The first matching rule wins. Names and paths match case-insensitively, as Windows does.
+"""
+import fnmatch
+import logging
+import math
+import re
+
+from fade_engine import CURVES
+
+MATCH_KINDS = ('exact', 'glob', 'regex', 'path')
+ACTIONS = ('mute', 'duck')
+
+# Upper bounds for configured timings; anything larger is a typo (or 1e309)
+MAX_SECONDS = 3600.0
+MAX_FADE_STEPS = 1000
+
+
+def parse_seconds(value):
+    """A duration in seconds, negative values clamped to 0; raises ValueError if not finite or too long"""
+    seconds = float(value)
+    if not math.isfinite(seconds) or seconds > MAX_SECONDS:
+        raise ValueError(f"{value!r} is not a duration up to {MAX_SECONDS:g} seconds")
+    return max(0.0, seconds)
+
+
+def parse_steps(value):
+    """A fade step count, at least 1; raises ValueError above MAX_FADE_STEPS"""
+    steps = float(value)
+    if not math.isfinite(steps) or steps > MAX_FADE_STEPS:
+        raise ValueError(f"{value!r} is not a step count up to {MAX_FADE_STEPS}")
+    return max(1, int(steps))
+
+
+class Rule:
+    """One compiled rule: what it matches and what happens to matching sessions"""
+
+    __slots__ = ('index', 'match', 'kind', 'action', 'level', 'unmute_delay_seconds', 'fade')
+
+    def __init__(self, index, match, kind='exact', action='mute', level=0.0, unmute_delay_seconds=None, fade=None):
+        self.index = index
+        self.match = match
+        self.kind = kind
+        self.action = action
+        # Fraction of the original volume a matching session is set to (0.0 = mute)
+        self.level = level
+        # None means the global unmute_delay_seconds / fade settings; fade is (duration, steps, curve)
+        self.unmute_delay_seconds = unmute_delay_seconds
+        self.fade = fade
+
+    def __repr__(self):
+        return f"Rule({self.kind} {self.match!r} -> {self.action})"
+
+
+def parse_rule(raw, index):
+    """Build a Rule from its config dict; raises ValueError if it is malformed"""
+    if not isinstance(raw, dict) or not isinstance(raw.get('match'), str) or not raw['match']:
+        raise ValueError("a rule needs a non-empty 'match' string")
+    kind = raw.get('kind', 'exact')
+    if kind not in MATCH_KINDS:
+        raise ValueError(f"unknown match kind {kind!r}")
+    if kind == 'regex':
+        re.compile(raw['match'])
+    action = raw.get('action', 'mute')
+    if action not in ACTIONS:
+        raise ValueError(f"unknown action {action!r}")
+
+    level = 0.0
+    if action == 'duck':
+        percent = float(raw.get('duck_percent', 20))
+        if not 0 <= percent <= 100:
+            raise ValueError("duck_percent must be between 0 and 100")
+        level = percent / 100.0
+
+    delay = raw.get('unmute_delay_seconds')
+    if delay is not None:
+        delay = parse_seconds(delay)
+
+    fade = raw.get('fade')
+    if fade is not None:
+        if not isinstance(fade, dict):
+            raise ValueError("fade must be an object")
+        curve = fade.get('curve')
+        if curve is not None and curve not in CURVES:
+            raise ValueError(f"unknown fade curve {curve!r}")
+        duration = fade.get('duration_seconds')
+        steps = fade.get('steps')
+        fade = (
+            None if duration is None else parse_seconds(duration),
+            None if steps is None else parse_steps(steps),
+            curve
+        )
+
+    return Rule(index, raw['match'], kind, action, level, delay, fade)
+
+
+def _normalize_path(path):
+    return path.replace('\\', '/')
+
+
+class RuleSet:
+    """Compiled, memoizing matcher over an ordered list of rules"""
+
+    MEMO_LIMIT = 4096
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self._exact = {}
+        self._patterns = []
+        for rule in self.rules:
+            if rule.kind == 'exact':
+                self._exact.setdefault(rule.match.casefold(), rule)
+            elif rule.kind == 'regex':
+                self._patterns.append((rule, re.compile(rule.match, re.IGNORECASE).search))
+            elif rule.kind == 'glob':
+                self._patterns.append((rule, re.compile(fnmatch.translate(rule.match), re.IGNORECASE).match))
+            else:
+                pattern = fnmatch.translate(_normalize_path(rule.match))
+                self._patterns.append((rule, re.compile(pattern, re.IGNORECASE).match))
+        self.needs_exe = any(rule.kind == 'path' for rule in self.rules)
+        self._memo = {}
+
+    @classmethod
+    def compile(cls, raw_rules, target_processes=()):
+        """Compile config rules plus the legacy target_processes names; bad rules are skipped"""
+        rules = []
+        for raw in raw_rules or []:
+            try:
+                rules.append(parse_rule(raw, len(rules)))
+            except (ValueError, TypeError, re.error) as e:
+                logging.warning(f"Ignoring rule {raw!r}: {e}")
+        for name in target_processes or []:
+            rules.append(Rule(len(rules), name))
+        return cls(rules)
+
+    def match(self, name, exe=None):
+        """Return the first rule matching a process name (and exe path), or None"""
+        memo_key = (name, exe)
+        try:
+            return self._memo[memo_key]
+        except KeyError:
+            pass
+
+        found = self._exact.get(name.casefold())
+        # A pattern rule listed before the exact rule still takes precedence
+        for rule, test in self._patterns:
+            if found is not None and rule.index > found.index:
+                break
+            if rule.kind == 'path':
+                if exe and test(_normalize_path(exe)):
+                    found = rule
+                    break
+            elif test(name):
+                found = rule
+                break
+
+        if len(self._memo) >= self.MEMO_LIMIT:
+            self._memo.clear()
+        self._memo[memo_key] = found
+        return found
+
+    def match_sessions(self, sessions, exe_of=None):
+        """Return [(session, rule)] for the sessions some rule matches
+
+        exe_of(pid) is only called when a path rule exists (run this on the backend
+        thread in that case, since it looks processes up).
+        """
+        matched = []
+        for session in sessions:
+            exe = exe_of(session.pid) if self.needs_exe and exe_of else None
+            rule = self.match(session.name, exe)
+            if rule is not None:
+                matched.append((session, rule))
+        return matched
+
+    def __len__(self):
+        return len(self.rules)
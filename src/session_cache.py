@@ -0,0 +1,96 @@
+"""
+Persistent table of audio sessions and their resolved volume interfaces
+"""
+import logging
+import threading
+import time
+
+
+class SessionCache:
+    """Audio sessions keyed by (pid, session instance identifier)"""
+
+    def __init__(self, backend, max_age_seconds=2.0):
+        self.backend = backend
+        self.max_age_seconds = max_age_seconds
+        self.last_refresh = 0.0
+        self._sessions = {}
+        # One {key: entry, or None if discarded} per refresh in progress: changes made
+        # while it enumerates are newer than what it found and win over it
+        self._changes = []
+        self._lock = threading.Lock()
+
+    def is_stale(self):
+        """True if the table was never filled or is older than max_age_seconds"""
+        return time.monotonic() - self.last_refresh > self.max_age_seconds
+
+    def refresh(self):
+        """Re-enumerate sessions, resolving interfaces only for new ones (run on a backend thread)
+
+        Returns (added entries, removed keys) relative to the table as it was when
+        the new one replaced it, so sessions a notification added meanwhile are not
+        reported twice. Sessions added or discarded while it enumerates are kept
+        as they are instead of being overwritten by the older enumeration.
+        """
+        changes = {}
+        with self._lock:
+            known = dict(self._sessions)
+            self._changes.append(changes)
+
+        fresh = {}
+        try:
+            for entry in self.backend.enumerate_sessions(known):
+                # Drop sessions whose process has died (Windows keeps reporting expired sessions)
+                if not self.backend.process_alive(entry.pid):
+                    continue
+                fresh[entry.key] = entry
+        except BaseException:
+            with self._lock:
+                self._changes.remove(changes)
+            raise
+
+        with self._lock:
+            self._changes.remove(changes)
+            for key, entry in changes.items():
+                if entry is None:
+                    fresh.pop(key, None)
+                else:
+                    fresh[key] = entry
+            added = [entry for key, entry in fresh.items() if key not in self._sessions]
+            removed = [key for key in self._sessions if key not in fresh]
+            self._sessions = fresh
+            self.last_refresh = time.monotonic()
+
+        if added or removed:
+            logging.debug("Session table refreshed: +%d -%d (%d total)", len(added), len(removed), len(fresh))
+        return added, removed
+
+    def get(self, key):
+        """Return the cached session for key, or None"""
+        with self._lock:
+            return self._sessions.get(key)
+
+    def all(self):
+        """Return every cached session"""
+        with self._lock:
+            return list(self._sessions.values())
+
+    def add(self, entry):
+        """Insert a session reported by a notification; False if it was already known"""
+        with self._lock:
+            if entry.key in self._sessions:
+                return False
+            self._sessions[entry.key] = entry
+            for changes in self._changes:
+                changes[entry.key] = entry
+            return True
+
+    def discard(self, key):
+        """Forget a session that expired or whose interface stopped working"""
+        with self._lock:
+            for changes in self._changes:
+                changes[key] = None
+            return self._sessions.pop(key, None) is not None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
@@ -0,0 +1,174 @@
+"""
+Audio session and application inspection shared by the server and the CLI tools
+
+The ignored/priority lists and the app entry format live here so the server's
+get_audio_apps reply, list_audio_apps.py and list_audio_sessions.py all agree.
+Results are produced by generators, one entry at a time, so callers can stream
+them while a slow process scan is still running. SessionInspector keeps its
+session table and process cache between scans, which is what makes repeated
+scans (watch mode) cheap: only new sessions and new pids are looked up.
+"""
+import time
+
+from app_subscriptions import diff_apps
+from process_cache import ProcessInfoCache
+from session_cache import SessionCache
+
+# System processes and Adobe hosts never offered as mute targets
+IGNORED_PROCESSES = frozenset((
+    'audiodg.exe',
+    'System',
+    'svchost.exe',
+    'Adobe Premiere Pro.exe',
+    'AfterFX.exe',
+    'Photoshop.exe',
+    'csrss.exe',
+    'winlogon.exe',
+    'dwm.exe',
+    'explorer.exe',
+    'taskhost.exe',
+    'taskhostw.exe'
+))
+
+# Known audio applications: sorted first, and listed even without an audio session
+PRIORITY_APPS = frozenset((
+    'Spotify.exe',
+    'chrome.exe',
+    'firefox.exe',
+    'msedge.exe',
+    'brave.exe',
+    'opera.exe',
+    'Discord.exe',
+    'Deezer.exe',
+    'iTunes.exe',
+    'vlc.exe',
+    'AIMP.exe',
+    'foobar2000.exe',
+    'steam.exe',
+    'battle.net.exe',
+    'Origin.exe',
+    'EpicGamesLauncher.exe',
+    'Teams.exe',
+    'Zoom.exe',
+    'Skype.exe',
+    'WhatsApp.exe',
+    'Telegram.exe',
+    'OBS64.exe',
+    'obs32.exe',
+    'Streamlabs OBS.exe'
+))
+
+
+def app_entry(name, pid, full_path, active):
+    """One entry of the audio app list, as sent to clients"""
+    return {
+        'name': name,
+        'exe': name,
+        'fullPath': full_path,
+        'pid': pid,
+        'priority': name in PRIORITY_APPS,
+        'active': active
+    }
+
+
+def session_apps(sessions, exe_of, seen):
+    """Yield an app entry for each session's process the first time its name is seen
+
+    exe_of(pid) returns the process's exe path or None; seen is updated in place.
+    """
+    for session in sessions:
+        name = session.name
+        if not name or name in seen or name in IGNORED_PROCESSES:
+            continue
+        seen.add(name)
+        yield app_entry(name, session.pid, exe_of(session.pid) or '', True)
+
+
+def process_apps(processes, seen):
+    """Yield entries for running priority apps that have no audio session (not already in seen)"""
+    for info in processes:
+        name = info.name
+        if name not in PRIORITY_APPS or name in seen or name in IGNORED_PROCESSES:
+            continue
+        seen.add(name)
+        yield app_entry(name, info.pid, info.exe, False)
+
+
+def sort_apps(apps):
+    """Sort in place: active sessions first, then priority apps, then alphabetically"""
+    apps.sort(key=lambda app: (not app['active'], not app['priority'], app['name'].lower()))
+    return apps
+
+
+class SessionInspector:
+    """Session and app scans against a backend, with caches kept between scans
+
+    Calls the backend directly, so use it from one thread that has called
+    backend.initialize_thread().
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.session_cache = SessionCache(backend)
+        self.process_cache = ProcessInfoCache(backend)
+
+    def exe_of(self, pid):
+        info = self.process_cache.get(pid)
+        return info.exe if info is not None else None
+
+    def iter_sessions(self):
+        """Refresh the session table and yield one record per session"""
+        self.session_cache.refresh()
+        for session in self.session_cache.all():
+            try:
+                volume = round(self.backend.get_volume(session), 3)
+                muted = self.backend.get_mute(session)
+            except Exception:
+                # Expired between enumeration and the volume read
+                continue
+            yield {
+                'name': session.name,
+                'pid': session.pid,
+                'instance': str(session.key[1]),
+                'exe': self.exe_of(session.pid) or '',
+                'volume': volume,
+                'muted': muted,
+                'priority': session.name in PRIORITY_APPS,
+                'ignored': session.name in IGNORED_PROCESSES
+            }
+
+    def iter_apps(self):
+        """Yield app entries as they are found: apps with sessions, then idle priority apps"""
+        seen = set()
+        self.session_cache.refresh()
+        yield from session_apps(self.session_cache.all(), self.exe_of, seen)
+        yield from process_apps(self.process_cache.scan(), seen)
+
+
+def session_id(record):
+    return (record['pid'], record['instance'])
+
+
+def app_id(record):
+    return record['name']
+
+
+def watch_changes(scan, key, interval, sleep=time.sleep):
+    """Rescan every interval and yield (event, record) for what changed since the last scan
+
+    scan() returns an iterable of records and key(record) identifies one. The first
+    scan reports everything as 'added'; records that change are 'updated' and those
+    that disappear are 'removed' (with their last known contents).
+    """
+    previous = {}
+    while True:
+        current = {key(record): record for record in scan()}
+        added, removed, updated = diff_apps(previous, current)
+        for record in added:
+            yield 'added', record
+        for record in updated:
+            yield 'updated', record
+        for name in removed:
+            yield 'removed', previous[name]
+        previous = current
+        sleep(interval)
@@ -0,0 +1,118 @@
+"""
+Event-driven session discovery
+
+Keeps the session table current from the backend's new-session / session-state
+notifications instead of enumerating on every command. A slow reconcile pass
+catches anything a notification missed; backends without notifications fall
+back to polling at the fast interval. Until the first notification actually
+arrives the watcher keeps polling too, since a backend can accept the
+subscription and still never call back. Sessions found or lost by a refresh go
+through the same added/removed handlers as notified ones, so a target that
+starts while muted is muted either way.
+"""
+import asyncio
+import logging
+
+from com_executor import PRIORITY_LOW
+
+
+class SessionWatcher:
+    """Feeds session notifications into a SessionCache on the event loop"""
+
+    def __init__(self, backend, executor, cache, on_added=None, on_removed=None,
+                 poll_interval=2.0, reconcile_interval=30.0):
+        self.backend = backend
+        self.executor = executor
+        self.cache = cache
+        self.on_added = on_added
+        self.on_removed = on_removed
+        self.poll_interval = poll_interval
+        self.reconcile_interval = reconcile_interval
+        self.watching = False
+        # Set once a notification has arrived; only then is the table trusted between reconciles
+        self.notified = False
+        self._loop = None
+        self._stop_watching = None
+        self._task = None
+
+    async def start(self):
+        """Fill the table, subscribe to notifications and start the reconcile loop"""
+        self._loop = asyncio.get_running_loop()
+        await self.executor.run(self.cache.refresh)
+        try:
+            self._stop_watching = await self.executor.run(
+                self.backend.watch_sessions, self._added_threadsafe, self._removed_threadsafe
+            )
+            self.watching = True
+            logging.info("✓ Watching audio session notifications")
+        except NotImplementedError:
+            logging.info(f"Backend {self.backend.name} has no session notifications, polling instead")
+        except Exception as e:
+            logging.warning(f"Session notifications unavailable, polling instead: {e}")
+
+        self.cache.max_age_seconds = self.poll_interval * 2
+        self._task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self):
+        """Unsubscribe and stop the reconcile loop"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self._stop_watching:
+            try:
+                await self.executor.run(self._stop_watching)
+            except Exception as e:
+                logging.debug(f"Failed to stop session notifications: {e}")
+            self._stop_watching = None
+        self.watching = False
+        self.notified = False
+
+    async def refresh(self, priority=PRIORITY_LOW):
+        """Re-enumerate the table and announce what appeared or went away since the last look"""
+        added, removed = await self.executor.run(self.cache.refresh, priority=priority)
+        for entry in added:
+            self._announce_added(entry)
+        for key in removed:
+            self._announce_removed(key)
+
+    async def _refresh_periodically(self):
+        while True:
+            await asyncio.sleep(self.reconcile_interval if self.notified else self.poll_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logging.debug(f"Session refresh failed: {e}")
+
+    # Notification callbacks arrive on backend threads; hop onto the event loop
+    def _added_threadsafe(self, entry):
+        self._loop.call_soon_threadsafe(self._session_added, entry)
+
+    def _removed_threadsafe(self, key):
+        self._loop.call_soon_threadsafe(self._session_removed, key)
+
+    def _notification_received(self):
+        if not self.notified:
+            self.notified = True
+            # Let lookups trust the table for as long as the notifications keep it current
+            self.cache.max_age_seconds = self.reconcile_interval * 2
+            logging.debug("First session notification received, reconciling every %ss", self.reconcile_interval)
+
+    def _session_added(self, entry):
+        self._notification_received()
+        if self.cache.add(entry):
+            self._announce_added(entry)
+
+    def _session_removed(self, key):
+        self._notification_received()
+        if self.cache.discard(key):
+            self._announce_removed(key)
+
+    def _announce_added(self, entry):
+        logging.debug("Session appeared: %s (PID %s)", entry.name, entry.pid)
+        if self.on_added:
+            self.on_added(entry)
+
+    def _announce_removed(self, key):
+        logging.debug("Session expired: PID %s", key[0])
+        if self.on_removed:
+            self.on_removed(key)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the audio control server
+
+Spawns the server repeatedly and measures, from the moment the process is
+started, how long it takes until a WebSocket connection is accepted and until
+the server's 'ready' message arrives. Prints a JSON report.
+
+    python startup_benchmark.py --runs 10
+    python startup_benchmark.py --server exec/audio_control_server.exe --backend pycaw
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import websockets
+
+SERVER_URL = 'ws://localhost:3350'
+
+
+def server_command(server=None):
+    """Command line that starts the server (the built executable, or the script with this Python)"""
+    if server:
+        return [server]
+    return [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'audio_control_server.py')]
+
+
+async def connect_when_listening(process, deadline):
+    """Retry connecting until the server accepts; raises if it exits or the deadline passes"""
+    while True:
+        try:
+            return await websockets.connect(SERVER_URL, open_timeout=max(deadline - time.perf_counter(), 0.1))
+        except OSError:
+            if time.perf_counter() > deadline or process.poll() is not None:
+                raise RuntimeError("server did not start listening")
+            await asyncio.sleep(0.005)
+
+
+async def measure_run(command, env, timeout):
+    """Start the server once; return {'listening_ms', 'ready_ms', 'server_timings'}"""
+    started = time.perf_counter()
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = started + timeout
+        websocket = await connect_when_listening(process, deadline)
+        listening = time.perf_counter() - started
+
+        async with websocket:
+            while True:
+                remaining = deadline - time.perf_counter()
+                message = json.loads(await asyncio.wait_for(websocket.recv(), max(remaining, 0.001)))
+                if message.get('type') == 'ready':
+                    break
+            ready = time.perf_counter() - started
+            await websocket.send('shutdown')
+
+        process.wait(timeout)
+        return {
+            'listening_ms': round(listening * 1000, 1),
+            'ready_ms': round(ready * 1000, 1),
+            'server_timings': message.get('timings', {})
+        }
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+def summarize(values):
+    return {
+        'min': min(values),
+        'median': round(statistics.median(values), 1),
+        'max': max(values)
+    }
+
+
+async def run_benchmark(args):
+    command = server_command(args.server)
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        env = dict(os.environ, AUDIOSTOP_BACKEND=args.backend, AUDIOSTOP_CONFIG_DIR=config_dir)
+        runs = []
+        for _ in range(args.runs):
+            runs.append(await measure_run(command, env, args.timeout))
+
+    return {
+        'command': command,
+        'backend': args.backend,
+        'runs': runs,
+        'listening_ms': summarize([run['listening_ms'] for run in runs]),
+        'ready_ms': summarize([run['ready_ms'] for run in runs])
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure audio control server startup time")
+    parser.add_argument('--runs', type=int, default=5, help="number of server starts")
+    parser.add_argument('--server', help="server executable (default: run audio_control_server.py with this Python)")
+    parser.add_argument('--backend', default='simulated', help="AUDIOSTOP_BACKEND for the server (default: simulated)")
+    parser.add_argument('--timeout', type=float, default=30.0, help="seconds to wait for each start")
+    args = parser.parse_args()
+
+    try:
+        print(json.dumps(asyncio.run(run_benchmark(args)), indent=4))
+    except Exception as e:
+        print(json.dumps({'success': False, 'error': str(e)}))
+        sys.exit(1)
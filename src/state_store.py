@@ -0,0 +1,167 @@
+"""
+Versioned, immutable server settings with change notifications
+
+The settings the mute path reads (muting enabled, unmute delay, targets and their
+compiled rules, fade profile) live in one immutable ServerState. An update builds
+a new state and swaps it in with a single assignment, so any thread reads a
+consistent snapshot by taking store.current, without a lock and without seeing
+half of an update. Components that care about a change are told about it
+instead of re-reading globals: listeners run right after the swap (on the event
+loop), and tasks can await the next version.
+"""
+import asyncio
+import logging
+
+from fade_engine import CURVES
+from log_pipeline import LOG_LEVELS
+from rules import RuleSet, parse_seconds, parse_steps
+
+FIELDS = (
+    'muting_enabled',
+    'unmute_delay_seconds',
+    'target_processes',
+    'rules',
+    'fade_duration_seconds',
+    'fade_steps',
+    'fade_curve',
+    'log_level'
+)
+
+
+def _element_error(name, element):
+    """Why an element of target_processes/rules is unusable, or None if it is fine"""
+    if name == 'target_processes':
+        if not isinstance(element, str) or not element:
+            return "not a process name"
+    elif not isinstance(element, dict) or not isinstance(element.get('match'), str) or not element['match']:
+        return "a rule needs a non-empty 'match' string"
+    return None
+
+
+def _normalize(name, value):
+    """Coerce a config value to the type the server uses; raises ValueError/TypeError
+
+    Bad elements of target_processes and rules are dropped with a warning, so one
+    typo does not discard the rest of the list.
+    """
+    if name == 'muting_enabled':
+        return bool(value)
+    if name in ('unmute_delay_seconds', 'fade_duration_seconds'):
+        return parse_seconds(value)
+    if name == 'fade_steps':
+        return parse_steps(value)
+    if name == 'fade_curve':
+        if not isinstance(value, str) or value not in CURVES:
+            raise ValueError(f"unknown fade curve {value!r}")
+        return value
+    if name == 'log_level':
+        level = str(value).upper()
+        if level not in LOG_LEVELS:
+            raise ValueError(f"unknown log level {value!r}")
+        return level
+    # Lists become tuples so a snapshot cannot be changed through a reference to it
+    if not isinstance(value, (list, tuple)):
+        raise TypeError(f"{name} must be a list")
+    valid = []
+    for element in value:
+        error = _element_error(name, element)
+        if error:
+            logging.warning(f"Ignoring {name} entry {element!r}: {error}")
+        else:
+            valid.append(element)
+    return tuple(valid)
+
+
+class ServerState:
+    """One version of the runtime settings; never modified after construction"""
+
+    __slots__ = ('version', 'rule_set') + FIELDS
+
+    def __init__(self, version, values, rule_set=None):
+        for name in FIELDS:
+            object.__setattr__(self, name, values[name])
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'rule_set', rule_set or RuleSet.compile(self.rules, self.target_processes))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ServerState is immutable; use StateStore.update")
+
+    @classmethod
+    def from_config(cls, config, defaults):
+        """Build version 1 from a config dict, falling back to defaults for bad or missing values"""
+        values = {}
+        for name in FIELDS:
+            try:
+                values[name] = _normalize(name, config.get(name, defaults[name]))
+            except (ValueError, TypeError) as e:
+                logging.warning(f"Ignoring {name} from config: {e}")
+                values[name] = _normalize(name, defaults[name])
+        return cls(1, values)
+
+    def to_config(self):
+        """The settings as they are stored in config.json"""
+        config = {name: getattr(self, name) for name in FIELDS}
+        config['target_processes'] = list(self.target_processes)
+        config['rules'] = list(self.rules)
+        return config
+
+
+class StateStore:
+    """Holds the current ServerState and swaps in a new version on every change"""
+
+    def __init__(self, state):
+        # Reading this attribute is the whole read path: one reference, always consistent
+        self.current = state
+        self._listeners = []
+        self._next_version = None
+
+    def subscribe(self, listener, keys=None):
+        """Call listener(state, changed, source) after updates touching any of keys (all if None)"""
+        self._listeners.append((listener, frozenset(keys) if keys else None))
+
+    def update(self, changes, source=None):
+        """Apply the known keys in changes as one new version; returns the names that changed
+
+        Invalid values are skipped with a warning. Must be called on the event loop.
+        source is passed to listeners (e.g. so a broadcast can skip the client that asked).
+        """
+        old = self.current
+        values = {name: getattr(old, name) for name in FIELDS}
+        changed = set()
+        for name in FIELDS:
+            if name not in changes:
+                continue
+            try:
+                value = _normalize(name, changes[name])
+            except (ValueError, TypeError) as e:
+                logging.warning(f"Ignoring {name}: {e}")
+                continue
+            if value != values[name]:
+                values[name] = value
+                changed.add(name)
+        if not changed:
+            return changed
+
+        # Rules are only recompiled when they could have changed
+        rule_set = None if changed & {'target_processes', 'rules'} else old.rule_set
+        self.current = state = ServerState(old.version + 1, values, rule_set)
+
+        if self._next_version is not None:
+            self._next_version.set_result(state)
+            self._next_version = None
+        for listener, keys in list(self._listeners):
+            if keys is None or keys & changed:
+                try:
+                    listener(state, changed, source)
+                except Exception as e:
+                    logging.error(f"State listener failed: {e}")
+        return changed
+
+    async def wait_for_change(self, timeout=None):
+        """Wait for the next version; returns it, or None if timeout passed first"""
+        if self._next_version is None:
+            self._next_version = asyncio.get_running_loop().create_future()
+        try:
+            return await asyncio.wait_for(asyncio.shield(self._next_version), timeout)
+        except asyncio.TimeoutError:
+            return None
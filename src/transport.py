@@ -0,0 +1,73 @@
+"""
+Transport state machine fed by playhead position samples
+
+Turns a stream of (timestamp, position) samples into playing / scrubbing / paused
+states with debouncing and hysteresis, so frame steps, timeline clicks, drags
+and poll jitter never toggle the mute path. Only real transport changes produce
+commands: entering playing -> 'mute', leaving playing -> 'unmute'. Playback is
+only recognised after several consecutive samples moving forward at close to
+normal speed; a single step or a drag faster than that counts as scrubbing.
+"""
+
+PLAYING = 'playing'
+SCRUBBING = 'scrubbing'
+PAUSED = 'paused'
+
+
+class TransportStateMachine:
+    """Debounced, hysteresis-based playback detector for one playhead stream"""
+
+    def __init__(self, play_samples=3, pause_seconds=0.3, min_play_rate=0.5, max_play_rate=2.0):
+        # Consecutive forward samples needed before we call it playback
+        self.play_samples = play_samples
+        # How long the playhead must stand still before playback counts as stopped
+        self.pause_seconds = pause_seconds
+        # Playback speeds (position seconds per wall-clock second) accepted as playing, around 1x
+        # with room for poll jitter; slower is a frame step, faster is a drag or jump
+        self.min_play_rate = min_play_rate
+        self.max_play_rate = max_play_rate
+        self.state = PAUSED
+        self._last_time = None
+        self._last_position = None
+        self._forward_run = 0
+        self._still_since = None
+
+    def feed(self, timestamp, position):
+        """Process one sample; return 'mute' / 'unmute' on a transport change, else None"""
+        if self._last_time is None or timestamp <= self._last_time:
+            if self._last_time is None:
+                self._last_time, self._last_position = timestamp, position
+            return None
+
+        elapsed = timestamp - self._last_time
+        rate = (position - self._last_position) / elapsed
+        self._last_time, self._last_position = timestamp, position
+
+        if rate == 0:
+            if self._still_since is None:
+                self._still_since = timestamp - elapsed
+            self._forward_run = 0
+            if self.state != PAUSED and timestamp - self._still_since >= self.pause_seconds:
+                return self._transition(PAUSED)
+            return None
+
+        self._still_since = None
+        if self.min_play_rate <= rate <= self.max_play_rate:
+            self._forward_run += 1
+            if self.state != PLAYING and self._forward_run >= self.play_samples:
+                return self._transition(PLAYING)
+            return None
+
+        # Backwards, frame step or jump: scrubbing, unless playback is already running
+        self._forward_run = 0
+        if self.state == PAUSED:
+            return self._transition(SCRUBBING)
+        return None
+
+    def _transition(self, state):
+        previous, self.state = self.state, state
+        if state == PLAYING:
+            return 'mute'
+        if previous == PLAYING:
+            return 'unmute'
+        return None
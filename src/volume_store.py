@@ -0,0 +1,131 @@
+"""
+Pre-mute volume snapshots with a crash-recovery journal
+
+At mute time every session's original volume is recorded, keyed by session
+identity; unmute restores exactly those values without reading anything back.
+The table is journaled to disk so a server that crashed while apps were muted
+can put their volumes back on the next start.
+"""
+import asyncio
+import json
+import logging
+import os
+
+
+class VolumeSnapshot:
+    """Original volume of one session we muted (or ducked to level)"""
+
+    __slots__ = ('key', 'name', 'pid', 'volume', 'level', 'rule')
+
+    def __init__(self, key, name, pid, volume, level=0.0, rule=None):
+        self.key = key
+        self.name = name
+        self.pid = pid
+        self.volume = volume
+        self.level = level
+        # The rule that silenced the session (decides unmute delay and fade; not journaled)
+        self.rule = rule
+
+
+class VolumeSnapshotStore:
+    """{session key: VolumeSnapshot}, used from the event loop"""
+
+    def __init__(self, journal_path):
+        self.journal_path = journal_path
+        self._snapshots = {}
+        self._dirty = False
+        self._save_task = None
+
+    def record(self, results):
+        """Remember previous volumes from mute_sessions results; return how many were new
+
+        Sessions already in the table keep their original value (a second mute
+        would read 0.0 or a half-faded level), and sessions that were already
+        silent are left alone so unmute never raises an app the user had at 0 %.
+        """
+        added = 0
+        for result in results:
+            if not result['success'] or result['key'] in self._snapshots:
+                continue
+            if result['previous'] <= 0.0:
+                continue
+            self._snapshots[result['key']] = VolumeSnapshot(
+                result['key'], result['name'], result['pid'], result['previous'],
+                result.get('level', 0.0), result.get('rule')
+            )
+            added += 1
+        if added:
+            self.schedule_save()
+        return added
+
+    def snapshots(self):
+        """Return the recorded snapshots"""
+        return list(self._snapshots.values())
+
+    def forget(self, keys):
+        """Drop snapshots once their volume has been restored (or the session is gone)"""
+        removed = 0
+        for key in keys:
+            if self._snapshots.pop(key, None) is not None:
+                removed += 1
+        if removed:
+            self.schedule_save()
+        return removed
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    # Journal
+    def schedule_save(self):
+        """Write the journal soon, off the event loop; overlapping requests coalesce"""
+        self._dirty = True
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.create_task(self._save())
+
+    async def _save(self):
+        while self._dirty:
+            self._dirty = False
+            entries = [
+                {'key': list(s.key), 'name': s.name, 'pid': s.pid, 'volume': s.volume, 'level': s.level}
+                for s in self._snapshots.values()
+            ]
+            try:
+                await asyncio.to_thread(self._write_journal, entries)
+            except Exception as e:
+                logging.error(f"Failed to write volume journal: {e}")
+
+    async def flush(self):
+        """Wait for any pending journal write"""
+        if self._save_task is not None:
+            await self._save_task
+
+    def _write_journal(self, entries):
+        if not entries:
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            return
+        temp_path = f"{self.journal_path}.tmp"
+        with open(temp_path, 'w') as journal_file:
+            json.dump({'version': 1, 'sessions': entries}, journal_file)
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+        os.replace(temp_path, self.journal_path)
+
+    def load_journal(self):
+        """Load snapshots left behind by a previous run into the table; returns the loaded ones"""
+        try:
+            with open(self.journal_path, 'r') as journal_file:
+                journal = json.load(journal_file)
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable volume journal: {e}")
+            return []
+
+        loaded = []
+        for entry in journal.get('sessions', []):
+            key = tuple(entry['key'])
+            snapshot = VolumeSnapshot(key, entry['name'], entry['pid'], entry['volume'], entry.get('level', 0.0))
+            self._snapshots[key] = snapshot
+            loaded.append(snapshot)
+        return loaded
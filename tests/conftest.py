@@ -0,0 +1,8 @@
+"""
+The server modules live side by side in src/ and import each other by name, as
+they do when PyInstaller bundles them, so the tests put src/ on the path too.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
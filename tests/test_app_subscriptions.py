@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+from app_subscriptions import AppListPublisher, diff_apps
+
+
+class FakeSocket:
+    def __init__(self, broken=False):
+        self.sent = []
+        self.broken = broken
+
+    async def send(self, message):
+        if self.broken:
+            raise ConnectionError("closed")
+        self.sent.append(json.loads(message))
+
+
+def app(name, volume=1.0):
+    return {'name': name, 'volume': volume}
+
+
+def test_diff_apps():
+    old = {'a': app('a'), 'b': app('b'), 'c': app('c')}
+    new = {'a': app('a'), 'b': app('b', 0.5), 'd': app('d')}
+    assert diff_apps(old, new) == ([app('d')], ['c'], [app('b', 0.5)])
+    assert diff_apps(new, dict(new)) == ([], [], [])
+
+
+def publisher(apps):
+    async def collect():
+        return list(apps)
+    return AppListPublisher(collect, lambda: ['a'], interval=60.0, debounce=0.0)
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_subscriber_gets_a_snapshot_then_only_deltas():
+    async def main():
+        apps = [app('a'), app('b')]
+        publish = publisher(apps)
+        socket = FakeSocket()
+        await publish.subscribe(socket)
+
+        # Nothing changed: nothing is sent
+        publish.notify_changed()
+        await settle()
+        apps[:] = [app('a', 0.2), app('c')]
+        publish.notify_changed()
+        await settle()
+        publish.unsubscribe(socket)
+        return socket.sent
+
+    snapshot, delta = asyncio.run(main())
+    assert snapshot['type'] == 'audio_apps_snapshot'
+    assert [entry['name'] for entry in snapshot['apps']] == ['a', 'b']
+    assert snapshot['current_targets'] == ['a']
+    assert delta == {'type': 'audio_apps_delta', 'added': [app('c')], 'removed': ['b'], 'updated': [app('a', 0.2)]}
+
+
+def test_failed_subscriber_is_dropped_and_last_unsubscribe_stops_scanning():
+    async def main():
+        apps = [app('a')]
+        publish = publisher(apps)
+        good, broken = FakeSocket(), FakeSocket()
+        await publish.subscribe(good)
+        await publish.subscribe(broken)
+        broken.broken = True
+        apps.append(app('b'))
+        publish.notify_changed()
+        await settle()
+        dropped = broken not in publish.subscribers
+
+        assert publish.unsubscribe(good)
+        assert not publish.unsubscribe(good)
+        await settle()
+        return dropped, publish._task, len(good.sent)
+
+    dropped, task, sent = asyncio.run(main())
+    assert dropped
+    assert task is None
+    assert sent == 2
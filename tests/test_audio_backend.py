@@ -0,0 +1,76 @@
+import pytest
+
+from audio_backend import LazyBackend, SimulatedBackend, create_backend
+
+
+def test_simulated_sessions_and_volumes():
+    backend = SimulatedBackend(session_count=3, names=['a.exe', 'b.exe'])
+    sessions = backend.enumerate_sessions()
+    assert [session.name for session in sessions] == ['a.exe', 'b.exe', 'a.exe']
+    backend.set_volume(sessions[1], 0.25)
+    assert backend.get_volume(sessions[1]) == 0.25
+    assert backend.volumes()[sessions[1].key] == 0.25
+    assert backend.calls['set_volume'] == 1
+
+
+def test_enumeration_reuses_known_entries():
+    backend = SimulatedBackend(session_count=2)
+    known = {session.key: session for session in backend.enumerate_sessions()}
+    assert all(session is known[session.key] for session in backend.enumerate_sessions(known))
+
+
+def test_killed_process_takes_its_sessions_with_it():
+    backend = SimulatedBackend(session_count=2)
+    session = backend.enumerate_sessions()[0]
+    backend.kill_process(session.pid)
+    assert not backend.process_alive(session.pid)
+    assert backend.process_info(session.pid) is None
+    assert session.key not in backend.volumes()
+    with pytest.raises(RuntimeError):
+        backend.get_volume(session)
+
+
+def test_reused_pid_gets_a_new_start_time():
+    backend = SimulatedBackend(session_count=1)
+    pid = backend.enumerate_sessions()[0].pid
+    started = backend.process_create_time(pid)
+    backend.kill_process(pid)
+    backend.add_session('b.exe', pid=pid)
+    assert backend.process_create_time(pid) > started
+    assert (pid, backend.process_create_time(pid)) in backend.list_processes()
+
+
+def test_watchers_hear_about_new_and_ended_sessions():
+    backend = SimulatedBackend(session_count=0)
+    added, removed = [], []
+    stop = backend.watch_sessions(added.append, removed.append)
+    session = backend.add_session('a.exe')
+    backend.remove_session(session.key)
+    stop()
+    backend.add_session('b.exe')
+    assert [entry.name for entry in added] == ['a.exe']
+    assert removed == [session.key]
+
+
+def test_create_backend_from_environment(monkeypatch):
+    monkeypatch.setenv('AUDIOSTOP_BACKEND', 'simulated')
+    monkeypatch.setenv('AUDIOSTOP_SIM_NAMES', 'x.exe,y.exe')
+    backend = create_backend()
+    assert backend.name == 'simulated'
+    assert [session.name for session in backend.enumerate_sessions()] == ['x.exe', 'y.exe']
+    with pytest.raises(ValueError):
+        create_backend('nope')
+
+
+def test_lazy_backend_builds_on_first_use():
+    built = []
+
+    def factory():
+        built.append(True)
+        return SimulatedBackend(session_count=1)
+
+    backend = LazyBackend('simulated', factory)
+    assert backend.name == 'simulated' and not backend.loaded
+    assert len(backend.enumerate_sessions()) == 1
+    backend.enumerate_sessions()
+    assert built == [True] and backend.loaded
@@ -0,0 +1,101 @@
+import asyncio
+import threading
+
+import pytest
+
+from audio_backend import SimulatedBackend
+from com_executor import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL, ComExecutor
+
+
+class CountingBackend(SimulatedBackend):
+    """Simulated backend that remembers which threads initialized it"""
+
+    def __init__(self):
+        super().__init__(session_count=0)
+        self.initialized = []
+        self.uninitialized = []
+
+    def initialize_thread(self):
+        self.initialized.append(threading.current_thread().name)
+
+    def uninitialize_thread(self):
+        self.uninitialized.append(threading.current_thread().name)
+
+
+@pytest.fixture
+def executor():
+    executor = ComExecutor(CountingBackend())
+    yield executor
+    executor.shutdown()
+
+
+def test_calls_run_on_one_initialized_worker(executor):
+    names = {executor.submit(lambda: threading.current_thread().name).result(2) for _ in range(5)}
+    assert names == {'com-worker-0'}
+    assert executor.backend.initialized == ['com-worker-0']
+
+
+def test_await_from_the_event_loop(executor):
+    async def main():
+        return await executor.run(pow, 2, 10)
+
+    assert asyncio.run(main()) == 1024
+
+
+def test_batch_keeps_going_after_a_failing_call(executor):
+    def fail():
+        raise ValueError("boom")
+
+    results = executor.submit_batch([(pow, (2, 3)), (fail, ()), (abs, (-1,))]).result(2)
+    assert results[0] == 8 and results[2] == 1
+    assert isinstance(results[1], ValueError)
+
+
+def test_shutdown_runs_queued_work_then_uninitializes():
+    backend = CountingBackend()
+    executor = ComExecutor(backend)
+    futures = [executor.submit(pow, i, 2) for i in range(5)]
+    executor.shutdown()
+    assert [future.result(0) for future in futures] == [0, 1, 4, 9, 16]
+    assert backend.uninitialized == ['com-worker-0']
+
+
+def test_higher_priority_work_runs_first(executor):
+    started, release = threading.Event(), threading.Event()
+    order = []
+
+    def block():
+        started.set()
+        release.wait(2)
+
+    executor.submit(block)
+    started.wait(2)
+    futures = [
+        executor.submit(order.append, 'low-1', priority=PRIORITY_LOW),
+        executor.submit(order.append, 'normal', priority=PRIORITY_NORMAL),
+        executor.submit(order.append, 'low-2', priority=PRIORITY_LOW),
+        executor.submit(order.append, 'high', priority=PRIORITY_HIGH)
+    ]
+    release.set()
+    for future in futures:
+        future.result(2)
+    # Only the item already running is waited for; equal priorities keep their order
+    assert order == ['high', 'normal', 'low-1', 'low-2']
+
+
+def test_cancelled_work_is_skipped(executor):
+    started, release = threading.Event(), threading.Event()
+    ran = []
+
+    def block():
+        started.set()
+        release.wait(2)
+
+    executor.submit(block)
+    started.wait(2)
+    dropped = executor.submit(ran.append, 'dropped', priority=PRIORITY_LOW)
+    kept = executor.submit(ran.append, 'kept', priority=PRIORITY_LOW)
+    assert dropped.cancel()
+    release.set()
+    kept.result(2)
+    assert ran == ['kept']
@@ -0,0 +1,82 @@
+import asyncio
+import json
+import threading
+
+from config_store import ConfigStore
+
+
+def read(path):
+    with open(path) as config_file:
+        return json.load(config_file)
+
+
+def test_load_creates_file_from_defaults(tmp_path):
+    path = tmp_path / 'config.json'
+    store = ConfigStore(str(path), {'a': 1})
+    assert store.load() == {'a': 1}
+    assert read(path) == {'a': 1}
+
+
+def test_updates_are_coalesced_into_one_write(tmp_path):
+    path = tmp_path / 'config.json'
+
+    async def main():
+        store = ConfigStore(str(path), {'a': 0}, debounce=0.05)
+        store.load()
+        writes = store.writes
+        for value in range(10):
+            store.update({'a': value})
+        await store.flush()
+        return store.writes - writes
+
+    assert asyncio.run(main()) == 1
+    assert read(path) == {'a': 9}
+
+
+def test_update_during_write_is_not_lost(tmp_path):
+    path = tmp_path / 'config.json'
+
+    async def main():
+        store = ConfigStore(str(path), {'a': 0}, debounce=0.0)
+        store.load()
+        writing = threading.Event()
+        proceed = threading.Event()
+        write = store._write
+
+        def slow_write(data):
+            writing.set()
+            proceed.wait(5)
+            write(data)
+        store._write = slow_write
+
+        store.update({'a': 1})
+        await asyncio.to_thread(writing.wait, 5)
+        # The first write has its snapshot already; this change must get a write of its own
+        store.update({'a': 2})
+        proceed.set()
+        await store.flush()
+
+    asyncio.run(main())
+    assert read(path) == {'a': 2}
+
+
+def test_external_edit_is_reloaded(tmp_path):
+    path = tmp_path / 'config.json'
+    reloaded = []
+
+    async def main():
+        store = ConfigStore(str(path), {'a': 0}, watch_interval=0.02, on_reload=reloaded.append)
+        store.load()
+        store.start_watching()
+        await asyncio.sleep(0.05)
+        with open(path, 'w') as config_file:
+            json.dump({'a': 5}, config_file)
+        for _ in range(50):
+            if reloaded:
+                break
+            await asyncio.sleep(0.02)
+        store.stop_watching()
+        return store.data
+
+    assert asyncio.run(main()) == {'a': 5}
+    assert reloaded == [{'a': 5}]
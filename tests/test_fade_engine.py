@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from audio_backend import SimulatedBackend
+from com_executor import ComExecutor
+from fade_engine import FadeEngine, build_curve
+
+
+@pytest.mark.parametrize('curve', ['linear', 'equal_power', 'logarithmic'])
+def test_curves_run_from_silence_to_full(curve):
+    table = build_curve(curve, 10)
+    assert len(table) == 11
+    assert table[0] == pytest.approx(0.0)
+    assert table[-1] == pytest.approx(1.0)
+    assert list(table) == sorted(table)
+
+
+def test_unknown_curve_is_rejected():
+    with pytest.raises(ValueError):
+        build_curve('square', 10)
+
+
+def run_with_engine(test, sessions=2):
+    backend = SimulatedBackend(session_count=sessions)
+    executor = ComExecutor(backend)
+    try:
+        return backend, asyncio.run(test(FadeEngine(executor, backend), backend.enumerate_sessions()))
+    finally:
+        executor.shutdown()
+
+
+def test_fades_all_sessions_to_their_end_level():
+    async def test(engine, sessions):
+        return await engine.fade([(session, 1.0, 0.25) for session in sessions], duration=0.05, steps=5)
+
+    backend, finished = run_with_engine(test)
+    assert finished is True
+    assert set(backend.volumes().values()) == {0.25}
+
+
+def test_ticks_are_batched_across_sessions():
+    async def test(engine, sessions):
+        return await engine.fade([(session, 0.0, 1.0) for session in sessions], duration=0.05, steps=5)
+
+    backend, _ = run_with_engine(test, sessions=4)
+    # One batch per tick (at most steps + 1), each setting every session
+    assert backend.calls['set_volume'] % 4 == 0
+    assert backend.calls['set_volume'] <= 4 * 6
+
+
+def test_cancel_leaves_sessions_where_they_are():
+    async def test(engine, sessions):
+        done = engine.fade([(sessions[0], 1.0, 0.0)], duration=5.0, steps=100)
+        await asyncio.sleep(0.1)
+        cancelled = engine.cancel()
+        return await done, cancelled, engine.active
+
+    backend, (finished, cancelled, active) = run_with_engine(test, sessions=1)
+    assert (finished, cancelled, active) == (False, 1, False)
+    assert 0.0 < list(backend.volumes().values())[0] < 1.0
+
+
+def test_new_fade_replaces_running_one():
+    async def test(engine, sessions):
+        first = engine.fade([(sessions[0], 1.0, 0.0)], duration=5.0, steps=100)
+        second = engine.fade([(sessions[0], 0.5, 1.0)], duration=0.05, steps=5)
+        return await first, await second
+
+    backend, results = run_with_engine(test, sessions=1)
+    assert results == (False, True)
+    assert list(backend.volumes().values()) == [1.0]
+
+
+def test_configure():
+    engine = FadeEngine(None, None)
+    engine.configure(duration=-1, steps=0, curve='equal_power')
+    assert (engine.duration, engine.steps, engine.curve) == (0.0, 1, 'equal_power')
+    with pytest.raises(ValueError):
+        engine.configure(curve='square')
@@ -0,0 +1,97 @@
+import asyncio
+
+from mute_controller import MUTED, UNMUTE_PENDING, UNMUTED, MuteController
+
+
+class FakeMutePath:
+    """Records what the controller asked for; unmute waits until released"""
+
+    def __init__(self):
+        self.mutes = 0
+        self.unmutes = 0
+        self.current = True
+        self.release = asyncio.Event()
+
+    async def mute(self):
+        self.mutes += 1
+
+    async def unmute(self, on_restoring):
+        await self.release.wait()
+        on_restoring()
+        self.unmutes += 1
+
+    def controller(self):
+        return MuteController(self.mute, self.unmute, lambda: self.current)
+
+
+def test_burst_collapses_into_last_request():
+    async def main():
+        path = FakeMutePath()
+        controller = path.controller()
+        await asyncio.gather(
+            controller.request('mute'), controller.request('unmute'), controller.request('mute')
+        )
+        return path, controller
+
+    path, controller = asyncio.run(main())
+    assert path.mutes == 1
+    assert controller.state == MUTED
+
+
+def test_mute_while_muted_is_skipped_unless_stale():
+    async def main():
+        path = FakeMutePath()
+        controller = path.controller()
+        await controller.request('mute')
+        await controller.request('mute')
+        skipped = path.mutes
+        path.current = False
+        await controller.request('mute')
+        return skipped, path.mutes
+
+    assert asyncio.run(main()) == (1, 2)
+
+
+def test_unmute_then_mute_cancels_pending_unmute():
+    async def main():
+        path = FakeMutePath()
+        controller = path.controller()
+        await controller.request('mute')
+        await controller.request('unmute')
+        pending = controller.state
+        await controller.request('mute')
+        path.release.set()
+        await asyncio.sleep(0)
+        return path, controller, pending
+
+    path, controller, pending = asyncio.run(main())
+    assert pending == UNMUTE_PENDING
+    assert controller.state == MUTED
+    assert path.mutes == 1
+    assert path.unmutes == 0
+
+
+def test_unmute_completes():
+    async def main():
+        path = FakeMutePath()
+        controller = path.controller()
+        await controller.request('mute')
+        path.release.set()
+        await controller.request('unmute')
+        for _ in range(3):
+            await asyncio.sleep(0)
+        return path, controller
+
+    path, controller = asyncio.run(main())
+    assert path.unmutes == 1
+    assert controller.state == UNMUTED
+
+
+def test_unmute_without_mute_does_nothing():
+    async def main():
+        path = FakeMutePath()
+        controller = path.controller()
+        await controller.request('unmute')
+        return controller
+
+    assert asyncio.run(main()).state == UNMUTED
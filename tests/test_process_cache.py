@@ -0,0 +1,60 @@
+from audio_backend import SimulatedBackend
+from process_cache import ProcessInfoCache
+
+
+def test_scan_looks_up_each_process_once():
+    backend = SimulatedBackend(session_count=3, process_count=20)
+    cache = ProcessInfoCache(backend)
+    first = cache.scan()
+    lookups = backend.calls['process_info']
+    second = cache.scan()
+    assert len(first) == len(second) == 23
+    assert backend.calls['process_info'] == lookups
+    assert cache.hits == 23
+
+
+def test_recycled_pid_is_looked_up_again():
+    backend = SimulatedBackend(session_count=1)
+    cache = ProcessInfoCache(backend)
+    pid = backend.enumerate_sessions()[0].pid
+    assert cache.get(pid).name == 'chrome.exe'
+
+    backend.kill_process(pid)
+    backend.add_session('Spotify.exe', pid=pid)
+    assert cache.get(pid).name == 'Spotify.exe'
+    assert [info.name for info in cache.scan()] == ['Spotify.exe']
+
+
+def test_get_without_validation_trusts_the_cache():
+    backend = SimulatedBackend(session_count=1)
+    cache = ProcessInfoCache(backend)
+    pid = backend.enumerate_sessions()[0].pid
+    cache.get(pid)
+    calls = dict(backend.calls)
+    assert cache.get(pid, validate=False).pid == pid
+    assert backend.calls == calls
+
+
+def test_dead_processes_are_dropped():
+    backend = SimulatedBackend(session_count=2)
+    cache = ProcessInfoCache(backend)
+    cache.scan()
+    backend.kill_process(backend.enumerate_sessions()[0].pid)
+    assert len(cache.scan()) == 1
+    assert len(cache) == 1
+
+
+def test_capacity_grows_to_the_live_process_count():
+    backend = SimulatedBackend(session_count=0, process_count=300)
+    cache = ProcessInfoCache(backend, max_entries=100)
+    cache.scan()
+    lookups = backend.calls['process_info']
+    cache.scan()
+    assert len(cache) == 300
+    assert backend.calls['process_info'] == lookups
+
+
+def test_scan_stops_when_asked():
+    backend = SimulatedBackend(session_count=0, process_count=10)
+    cache = ProcessInfoCache(backend)
+    assert cache.scan(should_stop=lambda: True) is None
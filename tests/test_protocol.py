@@ -0,0 +1,144 @@
+import asyncio
+import json
+
+import pytest
+
+from clients import ClientState
+from protocol import CLOSE, NUMBER, PROTOCOL_VERSION, CommandDispatcher, ProtocolError, QUEUED
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+
+def dispatcher():
+    commands = CommandDispatcher()
+    handled = []
+
+    @commands.command('mute')
+    async def on_mute(client, data):
+        handled.append(('mute', data))
+
+    @commands.command('shutdown')
+    async def on_shutdown(client, data):
+        return CLOSE
+
+    @commands.command('update', {'delay': (NUMBER, False), 'enabled': (bool, False), 'names': (list, True)})
+    async def on_update(client, data):
+        handled.append(('update', data))
+
+    @commands.command('fail')
+    async def on_fail(client, data):
+        raise ProtocolError('invalid_message', "handler refused", 'fail')
+
+    return commands, handled
+
+
+def send(*messages):
+    """Dispatch messages on one client; returns (results, replies, handled)"""
+    async def main():
+        commands, handled = dispatcher()
+        client = ClientState(1, FakeSocket())
+        results = [await commands.dispatch(client, message) for message in messages]
+        return results, client.websocket.sent, handled
+    return asyncio.run(main())
+
+
+def test_bare_and_json_commands_reach_their_handlers():
+    results, replies, handled = send('mute', json.dumps({'type': 'mute', 'v': 1}))
+    assert results == [('mute', None), ('mute', None)]
+    assert handled == [('mute', None), ('mute', {'type': 'mute', 'v': 1})]
+    assert replies == []
+
+
+def test_handler_result_is_passed_back():
+    results, _, _ = send('shutdown')
+    assert results == [('shutdown', CLOSE)]
+
+
+@pytest.mark.parametrize('message, code, command', [
+    ('{"type": ', 'invalid_json', None),
+    ('hello', 'invalid_message', None),
+    ('[1, 2]', 'invalid_message', None),
+    ('{"v": 1}', 'invalid_message', None),
+    ('{"type": "launch"}', 'unknown_command', 'launch'),
+    ('{"type": "mute", "v": 2}', 'unsupported_version', 'mute'),
+    ('{"type": "update"}', 'invalid_message', 'update'),
+    ('{"type": "update", "names": "a.exe"}', 'invalid_message', 'update'),
+    ('{"type": "update", "names": [], "delay": true}', 'invalid_message', 'update'),
+    ('{"type": "update", "names": [], "enabled": 1}', 'invalid_message', 'update'),
+    ('{"type": "fail"}', 'invalid_message', 'fail')
+])
+def test_bad_messages_get_an_error_reply(message, code, command):
+    results, replies, handled = send(message)
+    assert handled == []
+    assert len(replies) == 1
+    reply = replies[0]
+    assert (reply['type'], reply['v'], reply['code'], reply.get('command')) == ('error', PROTOCOL_VERSION, code, command)
+    # Rejected messages are counted as 'invalid', so clients cannot invent metric names
+    assert results[0] == ('fail' if command == 'fail' else 'invalid', None)
+
+
+def test_valid_schema_passes_unknown_fields_through():
+    _, replies, handled = send(json.dumps({'type': 'update', 'names': [], 'delay': 1.5, 'enabled': False, 'extra': 1}))
+    assert replies == []
+    assert handled[0][1]['delay'] == 1.5
+
+
+def test_commands_are_listed():
+    commands, _ = dispatcher()
+    assert commands.commands == ['fail', 'mute', 'shutdown', 'update']
+
+
+def test_slow_commands_run_in_the_background():
+    async def main():
+        commands = CommandDispatcher()
+        release = asyncio.Event()
+        done = []
+
+        @commands.command('scan', slow=True)
+        async def on_scan(client, data):
+            await release.wait()
+            done.append('scan')
+
+        client = ClientState(1, FakeSocket())
+        result = await commands.dispatch(client, '{"type": "scan"}')
+        pending = list(client.tasks)
+        release.set()
+        await asyncio.gather(*pending)
+        return result, done
+
+    assert asyncio.run(main()) == (('scan', QUEUED), ['scan'])
+
+
+def test_unsubscribe_cancels_a_pending_subscribe():
+    async def main():
+        commands = CommandDispatcher()
+        subscribed = set()
+        release = asyncio.Event()
+
+        @commands.command('subscribe', slow=True)
+        async def on_subscribe(client, data):
+            await release.wait()
+            subscribed.add(client.id)
+
+        @commands.command('unsubscribe', cancels='subscribe')
+        async def on_unsubscribe(client, data):
+            subscribed.discard(client.id)
+
+        other = ClientState(2, FakeSocket())
+        client = ClientState(1, FakeSocket())
+        await commands.dispatch(other, '{"type": "subscribe"}')
+        await commands.dispatch(client, '{"type": "subscribe"}')
+        await commands.dispatch(client, '{"type": "unsubscribe"}')
+        release.set()
+        for _ in range(5):
+            await asyncio.sleep(0)
+        return subscribed
+
+    # Only the client that unsubscribed loses its pending subscribe
+    assert asyncio.run(main()) == {2}
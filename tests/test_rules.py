@@ -0,0 +1,83 @@
+import pytest
+
+from audio_backend import AudioSession
+from rules import MAX_FADE_STEPS, Rule, RuleSet, parse_rule, parse_seconds, parse_steps
+
+
+def session(name, pid=1):
+    return AudioSession((pid, name), pid, name, None)
+
+
+def test_exact_names_match_case_insensitively():
+    rules = RuleSet.compile([], ['Spotify.exe'])
+    assert rules.match('spotify.EXE').match == 'Spotify.exe'
+    assert rules.match('chrome.exe') is None
+
+
+def test_first_matching_rule_wins_over_later_exact_rule():
+    rules = RuleSet.compile([
+        {'match': 'spot*.exe', 'kind': 'glob', 'action': 'duck', 'duck_percent': 30},
+        {'match': 'Spotify.exe'}
+    ])
+    rule = rules.match('Spotify.exe')
+    assert rule.kind == 'glob'
+    assert rule.level == pytest.approx(0.3)
+
+
+def test_regex_and_path_rules():
+    rules = RuleSet.compile([
+        {'match': '^(chrome|msedge)\\.exe$', 'kind': 'regex'},
+        {'match': 'C:/Games/*', 'kind': 'path'}
+    ])
+    assert rules.match('msedge.exe').kind == 'regex'
+    assert rules.needs_exe
+    assert rules.match('game.exe', 'C:\\Games\\game.exe').kind == 'path'
+    assert rules.match('game.exe', 'D:\\Other\\game.exe') is None
+
+
+def test_match_sessions_looks_up_exe_only_for_path_rules():
+    looked_up = []
+
+    def exe_of(pid):
+        looked_up.append(pid)
+        return None
+
+    rules = RuleSet.compile([], ['a.exe'])
+    matched = rules.match_sessions([session('a.exe', 1), session('b.exe', 2)], exe_of)
+    assert [s.name for s, _ in matched] == ['a.exe']
+    assert looked_up == []
+
+
+@pytest.mark.parametrize('raw', [
+    {},
+    {'match': ''},
+    {'match': 5},
+    {'match': 'a.exe', 'kind': 'fuzzy'},
+    {'match': '(', 'kind': 'regex'},
+    {'match': 'a.exe', 'action': 'boost'},
+    {'match': 'a.exe', 'action': 'duck', 'duck_percent': 150},
+    {'match': 'a.exe', 'unmute_delay_seconds': float('inf')},
+    {'match': 'a.exe', 'fade': {'steps': 1e309}},
+    {'match': 'a.exe', 'fade': {'curve': 'square'}},
+    'a.exe'
+])
+def test_malformed_rules_are_skipped(raw):
+    rules = RuleSet.compile([raw, {'match': 'ok.exe'}])
+    assert [rule.match for rule in rules.rules] == ['ok.exe']
+
+
+def test_rule_fade_override():
+    rule = parse_rule({'match': 'a.exe', 'fade': {'duration_seconds': 1.5, 'steps': 30, 'curve': 'equal_power'}}, 0)
+    assert rule.fade == (1.5, 30, 'equal_power')
+    assert isinstance(rule, Rule)
+
+
+def test_timing_bounds():
+    assert parse_seconds(-2) == 0.0
+    assert parse_steps(0) == 1
+    assert parse_steps(MAX_FADE_STEPS) == MAX_FADE_STEPS
+    for value in (float('inf'), float('nan'), 1e309, 10 ** 6):
+        with pytest.raises(ValueError):
+            parse_seconds(value)
+        with pytest.raises(ValueError):
+            parse_steps(value)
@@ -0,0 +1,170 @@
+import asyncio
+
+import pytest
+
+from audio_backend import SimulatedBackend
+from com_executor import ComExecutor
+from session_cache import SessionCache
+from session_watcher import SessionWatcher
+
+
+class PollingBackend(SimulatedBackend):
+    """Simulated backend without session notifications"""
+
+    def watch_sessions(self, on_added, on_removed):
+        raise NotImplementedError
+
+
+async def settle(condition, timeout=2.0):
+    """Wait until condition() holds (the watcher works in the background)"""
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+def watch(backend, test, **kwargs):
+    executor = ComExecutor(backend)
+    cache = SessionCache(backend)
+    added, removed = [], []
+
+    async def main():
+        watcher = SessionWatcher(backend, executor, cache, added.append, removed.append, **kwargs)
+        await watcher.start()
+        try:
+            await test(watcher, cache, added, removed)
+        finally:
+            await watcher.stop()
+
+    try:
+        asyncio.run(main())
+    finally:
+        executor.shutdown()
+
+
+def test_refresh_reports_added_and_removed_sessions():
+    backend = SimulatedBackend(session_count=2)
+    cache = SessionCache(backend)
+    added, removed = cache.refresh()
+    assert len(added) == 2 and removed == []
+
+    gone = added[0]
+    backend.kill_process(gone.pid)
+    new = backend.add_session('a.exe')
+    added, removed = cache.refresh()
+    assert [entry.key for entry in added] == [new.key]
+    assert removed == [gone.key]
+    assert cache.refresh() == ([], [])
+
+
+def test_polling_refresh_goes_through_the_handlers():
+    backend = PollingBackend(session_count=1)
+
+    async def test(watcher, cache, added, removed):
+        assert not watcher.watching
+        session = backend.add_session('a.exe')
+        await settle(lambda: added)
+        backend.kill_process(session.pid)
+        await settle(lambda: removed)
+        assert [entry.key for entry in added] == [session.key]
+        assert removed == [session.key]
+
+    watch(backend, test, poll_interval=0.02)
+
+
+def test_notifications_are_announced_once():
+    backend = SimulatedBackend(session_count=1)
+
+    async def test(watcher, cache, added, removed):
+        assert watcher.watching
+        session = backend.add_session('a.exe')
+        await settle(lambda: added)
+        # The reconcile pass finds the session already in the table
+        await watcher.refresh()
+        assert [entry.key for entry in added] == [session.key]
+        assert cache.get(session.key) is not None
+
+    watch(backend, test, reconcile_interval=60.0)
+
+
+def test_reconcile_catches_missed_notifications():
+    backend = SimulatedBackend(session_count=1)
+
+    async def test(watcher, cache, added, removed):
+        # Sessions that change behind the watcher's back, as after a lost notification
+        with backend._lock:
+            watchers, backend._watchers = backend._watchers, []
+        session = backend.add_session('a.exe')
+        backend._watchers = watchers
+        await settle(lambda: added)
+        assert [entry.key for entry in added] == [session.key]
+
+    watch(backend, test, poll_interval=0.02, reconcile_interval=0.02)
+
+
+@pytest.mark.parametrize('backend_class', [SimulatedBackend, PollingBackend])
+def test_stop_ends_the_refresh_loop(backend_class):
+    backend = backend_class(session_count=1)
+
+    async def test(watcher, cache, added, removed):
+        await watcher.stop()
+        backend.add_session('a.exe')
+        await asyncio.sleep(0.1)
+        assert added == []
+
+    watch(backend, test, poll_interval=0.02, reconcile_interval=0.02)
+
+
+def test_table_is_only_trusted_once_a_notification_arrives():
+    backend = SimulatedBackend(session_count=1)
+
+    async def test(watcher, cache, added, removed):
+        # Subscribed, but nothing has called back yet: keep polling
+        assert watcher.watching and not watcher.notified
+        assert cache.max_age_seconds == 0.04
+        with backend._lock:
+            watchers, backend._watchers = backend._watchers, []
+        silent = backend.add_session('a.exe')
+        await settle(lambda: added)
+        assert cache.max_age_seconds == 0.04
+
+        backend._watchers = watchers
+        backend.add_session('b.exe')
+        await settle(lambda: watcher.notified)
+        assert cache.max_age_seconds == 120.0
+        assert added[0].key == silent.key
+
+    watch(backend, test, poll_interval=0.02, reconcile_interval=60.0)
+
+
+class PausingBackend(SimulatedBackend):
+    """Lets a test act while enumerate_sessions is running"""
+
+    during_enumeration = None
+
+    def enumerate_sessions(self, known=None):
+        sessions = super().enumerate_sessions(known)
+        if self.during_enumeration:
+            self.during_enumeration()
+        return sessions
+
+
+def test_changes_made_during_a_refresh_survive_it():
+    backend = PausingBackend(session_count=2)
+    cache = SessionCache(backend)
+    cache.refresh()
+    expired = cache.all()[0]
+
+    def notify():
+        backend.during_enumeration = None
+        cache.add(backend.add_session('a.exe'))
+        backend.kill_process(expired.pid)
+        cache.discard(expired.key)
+
+    backend.during_enumeration = notify
+    added, removed = cache.refresh()
+    keys = {entry.key for entry in cache.all()}
+    assert len(keys) == 2 and expired.key not in keys
+    # Both changes were already applied by the notifications, so the refresh reports neither
+    assert (added, removed) == ([], [])
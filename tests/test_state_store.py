@@ -0,0 +1,128 @@
+import asyncio
+import math
+
+import pytest
+
+from rules import MAX_FADE_STEPS
+from state_store import ServerState, StateStore
+
+DEFAULTS = {
+    'muting_enabled': True,
+    'unmute_delay_seconds': 3.0,
+    'target_processes': ['chrome.exe'],
+    'rules': [],
+    'fade_duration_seconds': 0.4,
+    'fade_steps': 20,
+    'fade_curve': 'linear',
+    'log_level': 'INFO'
+}
+
+
+def store(config=None):
+    return StateStore(ServerState.from_config(config or {}, DEFAULTS))
+
+
+def test_state_is_immutable():
+    state = store().current
+    with pytest.raises(AttributeError):
+        state.fade_steps = 5
+    assert state.target_processes == ('chrome.exe',)
+
+
+def test_update_bumps_version_and_notifies_interested_listeners():
+    state_store = store()
+    seen = []
+    state_store.subscribe(lambda state, changed, source: seen.append(('fade', changed, source)), keys=('fade_steps',))
+    state_store.subscribe(lambda state, changed, source: seen.append(('rules', changed, source)), keys=('rules',))
+
+    assert state_store.update({'fade_steps': 10, 'unknown': 1}, source='panel') == {'fade_steps'}
+    assert state_store.current.version == 2
+    assert seen == [('fade', {'fade_steps'}, 'panel')]
+    assert state_store.update({'fade_steps': 10}) == set()
+    assert state_store.current.version == 2
+
+
+def test_rules_are_recompiled_only_when_they_change():
+    state_store = store()
+    rule_set = state_store.current.rule_set
+    state_store.update({'unmute_delay_seconds': 1.0})
+    assert state_store.current.rule_set is rule_set
+    state_store.update({'target_processes': ['a.exe', 'b.exe']})
+    assert len(state_store.current.rule_set) == 2
+
+
+@pytest.mark.parametrize('changes', [
+    {'fade_steps': MAX_FADE_STEPS + 1},
+    {'fade_steps': 10 ** 12},
+    {'fade_steps': float('inf')},
+    {'fade_duration_seconds': 1e309},
+    {'unmute_delay_seconds': float('nan')},
+    {'unmute_delay_seconds': 'soon'},
+    {'fade_curve': 'square'},
+    {'fade_curve': ['linear']},
+    {'target_processes': 'chrome.exe'},
+    {'log_level': 'LOUD'}
+])
+def test_invalid_values_are_ignored(changes):
+    state_store = store()
+    assert state_store.update(changes) == set()
+    assert state_store.current.version == 1
+    assert math.isfinite(state_store.current.fade_duration_seconds)
+
+
+def test_bad_list_entries_are_dropped_one_by_one():
+    state_store = store()
+    state_store.update({
+        'target_processes': ['a.exe', 3, None, '', 'b.exe'],
+        'rules': [{'match': 'c.exe'}, {'match': 5}, 'd.exe', {'kind': 'glob'}]
+    })
+    state = state_store.current
+    assert state.target_processes == ('a.exe', 'b.exe')
+    assert state.rules == ({'match': 'c.exe'},)
+    assert [rule.match for rule in state.rule_set.rules] == ['c.exe', 'a.exe', 'b.exe']
+
+
+def test_bad_config_values_fall_back_to_defaults():
+    state = store({'fade_steps': 10 ** 9, 'unmute_delay_seconds': -1, 'target_processes': [1, 'x.exe']}).current
+    assert state.fade_steps == DEFAULTS['fade_steps']
+    assert state.unmute_delay_seconds == 0.0
+    assert state.target_processes == ('x.exe',)
+
+
+def test_failing_listener_does_not_stop_the_update():
+    state_store = store()
+    seen = []
+
+    def broken(state, changed, source):
+        raise RuntimeError("listener bug")
+    state_store.subscribe(broken)
+    state_store.subscribe(lambda state, changed, source: seen.append(state.version))
+    state_store.update({'muting_enabled': False})
+    assert seen == [2]
+
+
+def test_wait_for_change():
+    async def main():
+        state_store = store()
+        waiter = asyncio.create_task(state_store.wait_for_change(1.0))
+        await asyncio.sleep(0)
+        state_store.update({'fade_curve': 'equal_power'})
+        timed_out = await state_store.wait_for_change(0.01)
+        return await waiter, timed_out
+
+    state, timed_out = asyncio.run(main())
+    assert state.version == 2
+    assert timed_out is None
+
+
+def test_to_config_round_trips():
+    state = store({'rules': [{'match': 'a.exe'}]}).current
+    config = state.to_config()
+    assert config['rules'] == [{'match': 'a.exe'}]
+    assert ServerState.from_config(config, DEFAULTS).to_config() == config
+
+
+def test_log_level_is_persisted_normalized():
+    state_store = store()
+    assert state_store.update({'log_level': 'debug'}) == {'log_level'}
+    assert state_store.current.to_config()['log_level'] == 'DEBUG'
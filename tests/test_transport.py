@@ -0,0 +1,79 @@
+from transport import PAUSED, PLAYING, SCRUBBING, TransportStateMachine
+
+
+def play(machine, start, seconds, rate=1.0, interval=0.1, position=0.0):
+    """Feed samples of playback at rate; returns the commands produced"""
+    commands = []
+    steps = int(round(seconds / interval))
+    for i in range(1, steps + 1):
+        commands.append(machine.feed(start + i * interval, position + i * interval * rate))
+    return [command for command in commands if command]
+
+
+def test_playback_needs_several_samples_near_normal_speed():
+    machine = TransportStateMachine()
+    assert machine.feed(0.0, 10.0) is None
+    assert machine.feed(0.1, 10.1) is None
+    assert machine.feed(0.2, 10.2) is None
+    assert machine.feed(0.3, 10.3) == 'mute'
+    assert machine.state == PLAYING
+
+
+def test_jittery_polls_still_count_as_playback():
+    machine = TransportStateMachine()
+    machine.feed(0.0, 0.0)
+    commands = [machine.feed(t, p) for t, p in [(0.08, 0.1), (0.23, 0.2), (0.3, 0.3)]]
+    assert commands == [None, None, 'mute']
+
+
+def test_single_frame_step_does_not_mute():
+    machine = TransportStateMachine()
+    machine.feed(0.0, 5.0)
+    # One frame forward (1/25 s) between two polls, then the playhead stands still
+    commands = [machine.feed(0.1, 5.04)] + [machine.feed(0.1 * i, 5.04) for i in range(2, 10)]
+    assert all(command is None for command in commands)
+    # Scrubbing, then paused once the playhead has stood still: never playing
+    assert machine.state == PAUSED
+
+
+def test_fast_forward_drag_does_not_mute():
+    machine = TransportStateMachine()
+    machine.feed(0.0, 0.0)
+    assert play(machine, 0.0, 1.0, rate=3.0) == []
+    assert machine.state == SCRUBBING
+    # Normal playback after the drag is still recognised
+    assert play(machine, 1.0, 0.3, position=3.0) == ['mute']
+
+
+def test_pause_unmutes_after_pause_seconds():
+    machine = TransportStateMachine(pause_seconds=0.3)
+    machine.feed(0.0, 0.0)
+    play(machine, 0.0, 0.5)
+    assert machine.feed(0.6, 0.5) is None
+    assert machine.feed(0.7, 0.5) is None
+    assert machine.feed(0.8, 0.5) == 'unmute'
+    assert machine.state == PAUSED
+
+
+def test_jumps_and_backward_scrubs_never_mute():
+    machine = TransportStateMachine()
+    machine.feed(0.0, 0.0)
+    assert machine.feed(0.1, 30.0) is None
+    assert machine.feed(0.2, 12.0) is None
+    assert machine.state == SCRUBBING
+
+
+def test_jump_during_playback_keeps_playing():
+    machine = TransportStateMachine()
+    machine.feed(0.0, 0.0)
+    play(machine, 0.0, 0.3)
+    assert machine.feed(0.4, 60.0) is None
+    assert machine.state == PLAYING
+
+
+def test_out_of_order_samples_are_ignored():
+    machine = TransportStateMachine()
+    machine.feed(1.0, 5.0)
+    assert machine.feed(0.5, 6.0) is None
+    assert machine.feed(1.0, 7.0) is None
+    assert machine.state == PAUSED
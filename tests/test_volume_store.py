@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+from volume_store import VolumeSnapshotStore
+
+
+def result(key, previous, success=True, level=0.0):
+    return {'key': key, 'name': f"{key[1]}.exe", 'pid': key[0], 'previous': previous, 'success': success, 'level': level}
+
+
+def test_record_keeps_the_original_volume():
+    async def main():
+        store = VolumeSnapshotStore('unused')
+        store.schedule_save = lambda: None
+        first = store.record([result((1, 'a'), 0.8), result((2, 'b'), 0.0), result((3, 'c'), 0.5, success=False)])
+        # A second mute reads the silenced level; the original must survive
+        second = store.record([result((1, 'a'), 0.0)])
+        return store, first, second
+
+    store, first, second = asyncio.run(main())
+    assert (first, second) == (1, 0)
+    assert [(s.key, s.volume) for s in store.snapshots()] == [((1, 'a'), 0.8)]
+
+
+def test_journal_round_trip(tmp_path):
+    path = str(tmp_path / 'volume_journal.json')
+
+    async def main():
+        store = VolumeSnapshotStore(path)
+        store.record([result((1, 'a'), 0.8), result((2, 'b'), 0.6, level=0.2)])
+        await store.flush()
+
+    asyncio.run(main())
+    with open(path) as journal_file:
+        assert json.load(journal_file)['version'] == 1
+
+    restored = VolumeSnapshotStore(path)
+    loaded = restored.load_journal()
+    assert sorted((s.key, s.volume, s.level) for s in loaded) == [((1, 'a'), 0.8, 0.0), ((2, 'b'), 0.6, 0.2)]
+    assert len(restored) == 2
+
+
+def test_forgetting_everything_removes_the_journal(tmp_path):
+    path = tmp_path / 'volume_journal.json'
+
+    async def main():
+        store = VolumeSnapshotStore(str(path))
+        store.record([result((1, 'a'), 0.8)])
+        await store.flush()
+        existed = path.exists()
+        assert store.forget([(1, 'a'), (9, 'z')]) == 1
+        await store.flush()
+        return existed
+
+    assert asyncio.run(main())
+    assert not path.exists()
+
+
+def test_load_journal_only_returns_what_it_loaded(tmp_path):
+    path = tmp_path / 'volume_journal.json'
+    path.write_text(json.dumps({'version': 1, 'sessions': [{'key': [1, 'a'], 'name': 'a.exe', 'pid': 1, 'volume': 0.7}]}))
+
+    async def main():
+        store = VolumeSnapshotStore(str(path))
+        store.record([result((2, 'b'), 0.9)])
+        return store, store.load_journal()
+
+    store, loaded = asyncio.run(main())
+    assert [s.key for s in loaded] == [(1, 'a')]
+    assert len(store) == 2
+
+
+def test_unreadable_journal_is_ignored(tmp_path):
+    path = tmp_path / 'volume_journal.json'
+    path.write_text('{"version": 1, "sessions": [')
+    assert VolumeSnapshotStore(str(path)).load_journal() == []
+    assert VolumeSnapshotStore(str(tmp_path / 'missing.json')).load_journal() == []